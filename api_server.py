@@ -0,0 +1,359 @@
+"""
+Headless HTTP API for the caption and mood services, for integrations that don't
+go through the Streamlit UI.
+
+    python api_server.py --port 8000
+
+Endpoints (images are sent as multipart form files, or as base64 strings in a
+JSON body):
+
+    GET  /health         queue depth, limits, scheduler, model routing and profiling stats
+    POST /caption        image + style_description [+ variants] -> {"caption": ..., "variants": [...]}
+    POST /mood           image -> {"scores": ...}
+    POST /analyze        image + style_description -> {"caption": ..., "scores": ...}
+    POST /batch/mood     images (repeated field) -> NDJSON stream, one line per image
+                         as soon as its request finishes
+
+Requests beyond API_MAX_CONCURRENT wait in a queue of at most API_MAX_QUEUED;
+when that is full the server answers 429 with a Retry-After header instead of
+letting latency grow without bound. Batch requests run in the scheduler's 'batch'
+class (see scheduler.py), so they never hold up single-image requests.
+"""
+import os
+import json
+import base64
+import asyncio
+import argparse
+import contextvars
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+import profiling
+from scheduler import INTERACTIVE, BATCH, scheduling, get_scheduler
+from hashtag_index import start_hashtag_index
+from utils import (genai, model_router, new_session_budget, get_instagram_caption_from_bytes, get_instagram_caption_variants_from_bytes,
+                   get_outfit_mood_scores_from_bytes, get_outfit_mood_scores_batch_from_bytes)
+
+# Largest accepted image, in bytes
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# Largest number of images in one batch request
+MAX_BATCH_IMAGES = 100
+# Concurrent API requests one batch may have in flight
+BATCH_PARALLELISM = 2
+# Seconds clients are told to wait after a 429
+RETRY_AFTER_SECONDS = 2
+
+
+class Overloaded(Exception):
+    """Raised when the request queue is full."""
+
+
+class RequestError(Exception):
+    """Raised for invalid client input; carries the HTTP status to return."""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AdmissionControl:
+    """
+    Limits how many requests run at once and how many may wait for a slot.
+
+    Attributes:
+    ----------
+    max_concurrent : int
+        Requests allowed to run at the same time.
+    max_queued : int
+        Requests allowed to wait for a slot; further requests are rejected.
+    running : int
+        Requests currently running.
+    waiting : int
+        Requests currently waiting for a slot.
+    """
+    def __init__(self, max_concurrent=8, max_queued=32):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.running = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def acquire(self):
+        """Waits for a slot; raises Overloaded if the queue is already full."""
+        if self._semaphore.locked() and self.waiting >= self.max_queued:
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release(self):
+        self.running -= 1
+        self._semaphore.release()
+
+
+def _decode_image(data, name):
+    if not data:
+        raise RequestError(f"'{name}' is empty")
+    if len(data) > MAX_IMAGE_BYTES:
+        raise RequestError(f"'{name}' exceeds {MAX_IMAGE_BYTES // (1024 * 1024)} MB", status_code=413)
+    return data
+
+
+async def read_request(request, multiple=False):
+    """
+    Reads images and form fields from a multipart form or a JSON body.
+
+    Multipart requests carry the image in an 'image' field ('images', repeated, for
+    batches); JSON bodies carry base64 strings under the same keys.
+
+    Returns:
+    -------
+    tuple
+        (list of image bytes, dict of the remaining string fields)
+    """
+    field = "images" if multiple else "image"
+    images, fields = [], {}
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()
+            if not isinstance(body, dict):
+                raise RequestError("JSON body must be an object")
+            encoded = body.pop(field, None)
+            encoded = encoded if isinstance(encoded, list) else [encoded] if encoded else []
+            images = [_decode_image(base64.b64decode(value), field) for value in encoded]
+        except (ValueError, TypeError) as e:
+            raise RequestError(f"Invalid JSON body: {e}")
+        fields = {key: str(value) for key, value in body.items()}
+    else:
+        async with request.form(max_files=MAX_BATCH_IMAGES, max_fields=100) as form:
+            for key, value in form.multi_items():
+                if key == field and hasattr(value, "read"):
+                    images.append(_decode_image(await value.read(), field))
+                elif isinstance(value, str):
+                    fields[key] = value
+
+    if not images:
+        raise RequestError(f"Missing '{field}'")
+    if not multiple and len(images) > 1:
+        raise RequestError(f"Send one '{field}'; use /batch/mood for several images")
+    if len(images) > MAX_BATCH_IMAGES:
+        raise RequestError(f"At most {MAX_BATCH_IMAGES} images per batch", status_code=413)
+    return images, fields
+
+
+def _style_description(fields):
+    style_description = fields.get("style_description", "").strip()
+    if not style_description:
+        raise RequestError("Missing 'style_description'")
+    return style_description
+
+
+def _profiled(name, fn, *args):
+    with profiling.profile_request(name):
+        return fn(*args)
+
+
+def _run(request, fn, *args, priority=INTERACTIVE):
+    """Runs a blocking service call on the server's worker threads in a priority class."""
+    with scheduling(priority, owner=request.client.host if request.client else None):
+        context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(request.app.state.executor, context.run, _profiled,
+                                                      f"api{request.url.path}", fn, *args)
+
+
+async def _admitted(request, handler):
+    """Runs a handler inside an admission slot, mapping errors to HTTP responses."""
+    admission = request.app.state.admission
+    try:
+        await admission.acquire()
+    except Overloaded:
+        return _overloaded()
+    try:
+        return JSONResponse(await handler())
+    except RequestError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    finally:
+        admission.release()
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    A streaming response that holds an admission slot until it is done.
+
+    The slot is released when the response finishes, fails or the client goes away,
+    including before the body generator has started, when the generator's own
+    cleanup would never run.
+    """
+    def __init__(self, content, admission, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                self.admission.release()
+
+
+def _overloaded():
+    return JSONResponse({"error": "Server busy, retry later"}, status_code=429,
+                        headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+async def health(request):
+    admission = request.app.state.admission
+    return JSONResponse({
+        "status": "ok",
+        "running": admission.running,
+        "waiting": admission.waiting,
+        "max_concurrent": admission.max_concurrent,
+        "max_queued": admission.max_queued,
+        "scheduler": get_scheduler().stats(),
+        "routing": model_router.stats(),
+        "profiling": profiling.stats() if profiling.enabled() else None,
+    })
+
+
+async def caption(request):
+    async def handler():
+        images, fields = await read_request(request)
+        style_description = _style_description(fields)
+        try:
+            variants = max(1, min(int(fields.get("variants", 1)), 5))
+        except ValueError:
+            raise RequestError("'variants' must be a number")
+        # Every caption request asks for fresh captions; mood scores may come from history
+        captions = await _run(request, get_instagram_caption_variants_from_bytes, images[0], style_description,
+                              variants, new_session_budget(), False)
+        return {"caption": captions[0], "variants": captions}
+    return await _admitted(request, handler)
+
+
+async def mood(request):
+    async def handler():
+        images, _ = await read_request(request)
+        return {"scores": await _run(request, get_outfit_mood_scores_from_bytes, images[0], new_session_budget())}
+    return await _admitted(request, handler)
+
+
+async def analyze(request):
+    async def handler():
+        images, fields = await read_request(request)
+        style_description = _style_description(fields)
+        budget = new_session_budget()
+        caption_text, scores = await asyncio.gather(
+            _run(request, get_instagram_caption_from_bytes, images[0], style_description, budget, False),
+            _run(request, get_outfit_mood_scores_from_bytes, images[0], budget),
+        )
+        return {"caption": caption_text, "scores": scores}
+    return await _admitted(request, handler)
+
+
+async def batch_mood(request):
+    """Streams one NDJSON line per image as each multi-image request completes."""
+    admission = request.app.state.admission
+    try:
+        await admission.acquire()
+    except Overloaded:
+        return _overloaded()
+
+    # Until the response takes over the slot, any failure (including Starlette's own
+    # HTTPException for malformed multipart bodies) must give it back
+    handed_off = False
+    try:
+        images, fields = await read_request(request, multiple=True)
+        images_per_request = max(1, min(int(fields.get("images_per_request", 4)), 10))
+        prefilter_margin = int(fields["prefilter_margin"]) if fields.get("prefilter_margin") else None
+        handed_off = True
+    except (RequestError, ValueError) as e:
+        return JSONResponse({"error": str(e)}, status_code=getattr(e, "status_code", 400))
+    finally:
+        if not handed_off:
+            admission.release()
+
+    async def stream():
+        parallelism = asyncio.Semaphore(BATCH_PARALLELISM)
+
+        async def score_chunk(start):
+            async with parallelism:
+                chunk = images[start:start + images_per_request]
+                results = await _run(request, get_outfit_mood_scores_batch_from_bytes, chunk,
+                                     images_per_request, prefilter_margin, priority=BATCH)
+                return start, results
+
+        tasks = [asyncio.ensure_future(score_chunk(start))
+                 for start in range(0, len(images), images_per_request)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                start, results = await next_done
+                for offset, result in enumerate(results):
+                    yield json.dumps({"index": start + offset, **result}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return AdmittedStreamingResponse(stream(), admission, media_type="application/x-ndjson")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Load or build the hashtag index before the first caption request needs it
+    start_hashtag_index(genai)
+    yield
+
+
+def create_app(max_concurrent=None, max_queued=None):
+    """
+    Builds the API application.
+
+    Parameters:
+    ----------
+    max_concurrent : int, optional
+        Requests processed at once; defaults to $API_MAX_CONCURRENT or 8.
+    max_queued : int, optional
+        Requests allowed to wait before the server answers 429; defaults to
+        $API_MAX_QUEUED or 32.
+
+    Returns:
+    -------
+    starlette.applications.Starlette
+    """
+    max_concurrent = max_concurrent or int(os.getenv("API_MAX_CONCURRENT", "8"))
+    max_queued = max_queued if max_queued is not None else int(os.getenv("API_MAX_QUEUED", "32"))
+
+    app = Starlette(routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/caption", caption, methods=["POST"]),
+        Route("/mood", mood, methods=["POST"]),
+        Route("/analyze", analyze, methods=["POST"]),
+        Route("/batch/mood", batch_mood, methods=["POST"]),
+    ], lifespan=lifespan)
+    app.state.admission = AdmissionControl(max_concurrent, max_queued)
+    # Combined analysis runs two calls per request, so allow two threads per slot
+    app.state.executor = ThreadPoolExecutor(max_workers=max_concurrent * 2, thread_name_prefix="api")
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Headless caption and mood API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrent", type=int, default=None)
+    parser.add_argument("--max-queued", type=int, default=None)
+    parser.add_argument("--profile", choices=profiling.PROFILE_MODES, default=None,
+                        help="profile service calls (overrides $PROFILE); see profiling.py")
+    args = parser.parse_args()
+
+    if args.profile:
+        profiling.enable(args.profile)
+
+    uvicorn.run(create_app(args.max_concurrent, args.max_queued), host=args.host, port=args.port)
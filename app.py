@@ -1,7 +1,13 @@
 import streamlit as st
 import os
+import threading
+from utils import genai
+from hashtag_index import start_hashtag_index
+from profiling import profile_request
 from pages.instagram_caption import show_instagram_caption_page
 from pages.outfit_mood_score import show_outfit_mood_score_page
+from pages.lookbook_mood_score import show_lookbook_mood_score_page
+from pages.history import show_history_page
 
 # Configure the page
 st.set_page_config(
@@ -34,7 +40,17 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def warm_up_api():
+    """Open API connections and load the hashtag index once per server process, so the
+    first request doesn't pay for TLS setup or embedding the hashtag vocabulary"""
+    if os.getenv("OPENAI_WARM_UP", "1").lower() in ("1", "true", "yes"):
+        threading.Thread(target=genai.warm_up, daemon=True).start()
+    start_hashtag_index(genai)
+
 def main():
+    warm_up_api()
+    
     # Header
     st.markdown('<h1 class="main-header">👗 Fashion Social Toolkit</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">Your AI-powered fashion companion for social media</p>', unsafe_allow_html=True)
@@ -45,7 +61,7 @@ def main():
     # Page selection
     page = st.sidebar.selectbox(
         "Choose a tool:",
-        ["Instagram Caption Generator", "Outfit Mood Score"],
+        ["Instagram Caption Generator", "Outfit Mood Score", "Lookbook Mood Score", "Results History"],
         index=0
     )
     
@@ -57,15 +73,30 @@ def main():
     
     • **Instagram Caption Generator**: Create compelling captions for your fashion posts
     • **Outfit Mood Score**: Analyze the mood and style of your outfit
+    • **Lookbook Mood Score**: Score several outfits in one go
+    • **Results History**: Browse your past captions and mood scores
     
     Upload an image and let AI do the magic! ✨
     """)
     
-    # Display selected page
-    if page == "Instagram Caption Generator":
-        show_instagram_caption_page()
-    elif page == "Outfit Mood Score":
-        show_outfit_mood_score_page()
+    # Token usage for this session, if a budget is configured
+    budget = st.session_state.get("token_budget")
+    if budget is not None and budget.per_session:
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### 🪙 Token Budget")
+        st.sidebar.progress(min(1.0, budget.spent / budget.per_session))
+        st.sidebar.caption(f"{budget.spent:,} of {budget.per_session:,} tokens used this session")
+    
+    # Display selected page; each rerun is one profiled request when PROFILE is set
+    with profile_request(f"page:{page}"):
+        if page == "Instagram Caption Generator":
+            show_instagram_caption_page()
+        elif page == "Outfit Mood Score":
+            show_outfit_mood_score_page()
+        elif page == "Lookbook Mood Score":
+            show_lookbook_mood_score_page()
+        elif page == "Results History":
+            show_history_page()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
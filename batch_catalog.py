@@ -0,0 +1,71 @@
+"""
+Caption a catalog of images offline with the OpenAI Batch API.
+
+    python batch_catalog.py submit catalog/ --style "minimalist spring essentials"
+    python batch_catalog.py collect catalog_batch.json --output captions.csv
+
+`submit` starts the batch and writes a manifest recording the batch ID and image
+order; `collect` waits for the batch, maps each result back to its image and
+writes a CSV. Set OPENAI_BASE_URL to run against mock_openai_server.py.
+"""
+import os
+import csv
+import json
+import argparse
+from utils import submit_catalog_captions, collect_catalog_captions
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def find_images(folder):
+    """Returns the image files in a folder, sorted by name."""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def submit(args):
+    image_paths = find_images(args.folder)
+    if not image_paths:
+        raise SystemExit(f"No images found in {args.folder}")
+    batch_id = submit_catalog_captions(image_paths, args.style, args.model)
+    manifest = {"batch_id": batch_id, "style_description": args.style, "model": args.model,
+                "image_paths": image_paths}
+    with open(args.manifest, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    print(f"Submitted batch {batch_id} for {len(image_paths)} images; manifest written to {args.manifest}")
+
+
+def collect(args):
+    with open(args.manifest) as manifest_file:
+        manifest = json.load(manifest_file)
+    captions = collect_catalog_captions(manifest["batch_id"], manifest["image_paths"],
+                                        manifest["style_description"], manifest["model"],
+                                        poll_interval=args.poll_interval, timeout=args.timeout)
+    with open(args.output, "w", newline="", encoding="utf-8") as output_file:
+        writer = csv.DictWriter(output_file, fieldnames=["image_path", "caption", "error"])
+        writer.writeheader()
+        writer.writerows(captions)
+    failed = sum(caption["caption"] is None for caption in captions)
+    print(f"Wrote {len(captions) - failed} captions to {args.output} ({failed} failed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Caption a catalog with the OpenAI Batch API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="start a caption batch for a folder of images")
+    submit_parser.add_argument("folder")
+    submit_parser.add_argument("--style", required=True, help="style description for every caption")
+    submit_parser.add_argument("--model", default="gpt-4o-mini")
+    submit_parser.add_argument("--manifest", default="catalog_batch.json")
+    submit_parser.set_defaults(func=submit)
+
+    collect_parser = commands.add_parser("collect", help="wait for a batch and write its captions")
+    collect_parser.add_argument("manifest", nargs="?", default="catalog_batch.json")
+    collect_parser.add_argument("--output", default="captions.csv")
+    collect_parser.add_argument("--poll-interval", type=float, default=60)
+    collect_parser.add_argument("--timeout", type=float, default=None)
+    collect_parser.set_defaults(func=collect)
+
+    args = parser.parse_args()
+    args.func(args)
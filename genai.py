@@ -6,14 +6,281 @@ import base64
 import requests
 import time
 import cv2
-import PyPDF2
-from docx import Document
+from io import BytesIO
+from PIL import Image
+from token_budget import image_size, plan_image_request
+from transport import TransportSettings, get_http_client, create_async_http_client
+from scheduler import current_scheduling
+from ingest import pdf_text, docx_text
+from profiling import timed
 import re
-import openai
+import shutil
+import subprocess
+import tempfile
+import traceback
+import asyncio
+import hashlib
+import threading
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 #from IPython.display import display, Image, HTML, Audio
 
 
 
+# Longest frame sides and JPEG qualities tried, best first, when fitting video frames to a payload budget
+VIDEO_FRAME_SIDES = [2048, 1536, 1024, 768, 512, 384]
+VIDEO_JPEG_QUALITIES = [90, 80, 70, 60, 50, 40]
+# Default base64 frame payload per video request
+DEFAULT_VIDEO_PAYLOAD_BYTES = 4_000_000
+
+# Whisper's upload limit, and the share of it a segment is sized to (container
+# overhead, variable bitrate peaks)
+TRANSCRIPTION_MAX_BYTES = 25 * 1024 * 1024
+SEGMENT_SIZE_MARGIN = 0.9
+# Lossy codecs segments are cut from without re-encoding, with the extension to write
+COPYABLE_AUDIO_CODECS = {"mp3": ".mp3", "aac": ".m4a", "opus": ".ogg", "vorbis": ".ogg"}
+# Everything else (WAV, FLAC, video soundtracks...) is re-encoded to mono MP3 at this bitrate
+SEGMENT_BITRATE = 64_000
+# Transcription models that can return word timestamps (verbose_json)
+WORD_TIMESTAMP_MODELS = {"whisper-1"}
+
+# Completion tokens allowed per choice of an image description
+DESCRIPTION_MAX_TOKENS = 1000
+
+# Endpoint used for Batch API requests, and the batch states after which nothing changes
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_FINISHED_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls so that only one of them does the work.
+
+    The first caller for a key runs the function; callers arriving with the same key
+    while it is in flight wait for and share its result (or exception). Once the call
+    finishes the key is forgotten, so later calls run again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` once per in-flight `key` and returns its result.
+
+        Parameters:
+        ----------
+        key : hashable
+            Identifies the request; equal keys are coalesced.
+        fn : callable
+            The function to call.
+
+        Returns:
+        -------
+        object
+            The result of the shared call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn(*args, **kwargs)
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+    async def do_async(self, key, coro_fn, *args, **kwargs):
+        """
+        Awaits `coro_fn(*args, **kwargs)` once per in-flight `key` on the running event loop.
+
+        Parameters:
+        ----------
+        key : hashable
+            Identifies the request; equal keys are coalesced.
+        coro_fn : callable
+            A coroutine function.
+
+        Returns:
+        -------
+        object
+            The result of the shared call. Cancelling one waiter does not cancel the
+            shared call for the others.
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(loop_key)
+            if task is None:
+                task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+                self._tasks[loop_key] = task
+
+                def forget(_task):
+                    with self._lock:
+                        if self._tasks.get(loop_key) is _task:
+                            del self._tasks[loop_key]
+
+                task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        """Returns the number of distinct requests currently in flight."""
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
+
+
+def request_key(**params):
+    """
+    Builds a content key for an API request from its parameters.
+
+    Parameters are serialized as sorted JSON and hashed with SHA-256, so requests with
+    the same model, prompt and image bytes map to the same key.
+    """
+    payload = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+# Errors that mean the upstream API is unhealthy. Client errors (400, 401, 404,
+# 422...) are about the request itself and never trip the circuit breaker.
+TRANSIENT_API_ERRORS = (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                        openai.InternalServerError)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream API is unhealthy.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls are
+    rejected with CircuitOpenError for `recovery_timeout` seconds. It then goes
+    half-open and lets up to `half_open_max_calls` probe calls through: a successful
+    probe closes the breaker, a failed one re-opens it.
+
+    Only errors of `failure_types` (by default TRANSIENT_API_ERRORS: timeouts,
+    connection errors, 429 and 5xx) count as failures; see `is_failure`.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1,
+                 failure_types=TRANSIENT_API_ERRORS):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_types = failure_types
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """The current state: 'closed', 'open' or 'half_open'."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._probes = 0
+            return self._state
+
+    def before_call(self):
+        """
+        Checks whether a call may proceed.
+
+        Raises:
+        ------
+        CircuitOpenError
+            If the breaker is open, or half-open with all probe slots taken.
+        """
+        state = self.state
+        with self._lock:
+            if state == self.OPEN:
+                retry_in = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                raise CircuitOpenError(f"Circuit open after repeated API errors; retrying in {retry_in:.0f}s")
+            if state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError("Circuit half-open; recovery probe in progress")
+                self._probes += 1
+
+    def record_success(self):
+        """Records a successful call, closing the breaker."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def is_failure(self, error):
+        """Returns True if an exception says the upstream API is unhealthy."""
+        return isinstance(error, self.failure_types)
+
+    def record_error(self, error):
+        """
+        Records a call that raised: a failure if `is_failure`. Otherwise the API did
+        answer, so the consecutive-failure count is reset and a half-open probe
+        gives back its slot.
+        """
+        if self.is_failure(error):
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self):
+        """Records a failed call, opening the breaker if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
+
+
+class LatencyTracker:
+    """Keeps a rolling window of call latencies and reports percentiles."""
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Adds a latency sample in seconds."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        """Returns the p-th percentile (0-100) of the window, or None if it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(p / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+
 class GenAI:
     """
     A class for interacting with the OpenAI API to generate text, images, video descriptions,
@@ -23,8 +290,23 @@ class GenAI:
     ----------
     client : openai.Client
         An instance of the OpenAI client initialized with the API key.
+    transport : TransportSettings or None
+        Settings of the shared HTTP client, or None for the openai library default.
+    single_flight : SingleFlight or None
+        Coalesces identical in-flight vision requests of the same priority class, or
+        None if coalescing is disabled.
+    circuit_breaker : CircuitBreaker or None
+        Fails vision requests fast while the API is erroring, or None if disabled.
+    latency : LatencyTracker
+        Rolling latencies of successful vision requests, used to time hedges.
+    token_budget : TokenBudget or None
+        Default budget applied to vision requests that don't pass their own.
+    scheduler : PriorityScheduler or None
+        Orders vision requests by priority class, or None if unscheduled.
     """
-    def __init__(self, openai_api_key):
+    def __init__(self, openai_api_key, coalesce=True, circuit_breaker=True, hedge_percentile=None,
+                 hedge_min_samples=20, hedge_default_delay=None, token_budget=None, base_url=None,
+                 transport=None, scheduler=None):
         """
         Initializes the GenAI class with the provided OpenAI API key.
 
@@ -32,9 +314,96 @@ class GenAI:
         ----------
         openai_api_key : str
             The API key for accessing OpenAI's services.
+        coalesce : bool, optional
+            If True (default), identical concurrent image description requests share
+            a single API call.
+        circuit_breaker : bool or CircuitBreaker, optional
+            True (default) for a breaker with default settings, a CircuitBreaker
+            instance to customize it, or False to disable.
+        hedge_percentile : float, optional
+            If set (e.g. 95), a vision request still running after this percentile of
+            recent latencies is duplicated and the first response wins. Disabled by default.
+        hedge_min_samples : int, optional
+            Latency samples needed before the percentile is trusted (default is 20).
+        hedge_default_delay : float, optional
+            Hedge delay in seconds to use until enough samples exist. If None (default),
+            no hedging happens until then.
+        token_budget : TokenBudget, optional
+            Default per-call/per-session token limits for vision requests (default is None,
+            unlimited).
+        base_url : str, optional
+            API base URL, e.g. a local stand-in from mock_openai_server.py. Defaults to
+            $OPENAI_BASE_URL or the OpenAI API.
+        transport : TransportSettings or False, optional
+            Connection pool, HTTP/2, timeout and proxy settings. Defaults to
+            `TransportSettings.from_env()`. Instances with equal settings share one
+            HTTP client and connection pool; False uses the openai library's own client.
+        scheduler : PriorityScheduler, optional
+            Gates vision requests by the caller's priority class (see scheduler.py),
+            so interactive calls go ahead of background and batch work. Default is
+            None, unscheduled.
         """
-        self.client = openai.Client(api_key=openai_api_key)
+        if transport is None:
+            transport = TransportSettings.from_env()
+        self.transport = transport or None
+        transport_options = {}
+        if self.transport:
+            transport_options = {"http_client": get_http_client(self.transport), "timeout": self.transport.timeout()}
+        self.client = openai.Client(api_key=openai_api_key, base_url=base_url, **transport_options)
         self.openai_api_key = openai_api_key
+        self.base_url = base_url
+        self.single_flight = SingleFlight() if coalesce else None
+        if circuit_breaker is True:
+            circuit_breaker = CircuitBreaker()
+        self.circuit_breaker = circuit_breaker or None
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_default_delay = hedge_default_delay
+        self.latency = LatencyTracker()
+        self._hedge_executor = None
+        self.token_budget = token_budget
+        self.scheduler = scheduler
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        """An openai.AsyncClient created on first use."""
+        if self._async_client is None:
+            transport_options = {}
+            if self.transport:
+                transport_options = {"http_client": create_async_http_client(self.transport),
+                                     "timeout": self.transport.timeout()}
+            self._async_client = openai.AsyncClient(api_key=self.openai_api_key, base_url=self.base_url,
+                                                    **transport_options)
+        return self._async_client
+
+    def warm_up(self, connections=2):
+        """
+        Opens keep-alive connections to the API ahead of the first real request.
+
+        Sends `connections` concurrent model-list requests (which cost no tokens), so
+        DNS lookup, TCP and TLS setup happen here instead of in the first user request.
+        Failures are logged, not raised.
+
+        Parameters:
+        ----------
+        connections : int, optional
+            Number of connections to open (default is 2).
+
+        Returns:
+        -------
+        float or None
+            Seconds taken, or None if the warm-up failed.
+        """
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                for future in [executor.submit(self.client.models.list) for _ in range(connections)]:
+                    future.result()
+        except Exception as e:
+            print(f"API warm-up failed: {e}")
+            return None
+        return time.perf_counter() - start
 
     def generate_text(self, prompt, instructions='You are a helpful AI named Jarvis', model="gpt-4o-mini", output_type='text', temperature =1):
         """
@@ -69,19 +438,25 @@ class GenAI:
         "The weather today is sunny with a high of 75°F."
         """
         completion = self.client.chat.completions.create(
-            model=model,
-            temperature=temperature,
-            response_format={"type": output_type},
-            messages=[
-                {"role": "system", "content": instructions},
-                {"role": "user", "content": prompt}
-            ]
+            **self._text_params(prompt, instructions, model, output_type, temperature)
         )
         response = completion.choices[0].message.content
         response = response.replace("```html", "")
         response = response.replace("```", "")
         return response
 
+    def _text_params(self, prompt, instructions, model, output_type='text', temperature=1):
+        """Builds the chat completion parameters for a `generate_text` request."""
+        return {
+            "model": model,
+            "temperature": temperature,
+            "response_format": {"type": output_type},
+            "messages": [
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": prompt}
+            ],
+        }
+
 
     def generate_chat_response(self, chat_history, user_message, instructions, model="gpt-4o-mini", output_type='text'):
         """
@@ -209,7 +584,8 @@ class GenAI:
         
         return html_code
 
-    def encode_image(self,image_path):
+    @timed("encode_image")
+    def encode_image(self,image_path, max_side=None):
         """
         Encodes an image file into a base64 string.
 
@@ -217,16 +593,67 @@ class GenAI:
         ----------
         image_path : str
             The path to the image file.
+        max_side : int, optional
+            If set and the image is larger, it is downscaled so its longest side is
+            `max_side` pixels and re-encoded as JPEG.
 
         Returns:
         -------
         str
             Base64-encoded image string.
         """
+        if max_side is not None:
+            with Image.open(image_path) as image:
+                if max(image.size) > max_side:
+                    image = image.convert("RGB")
+                    image.thumbnail((max_side, max_side), Image.LANCZOS)
+                    buffer = BytesIO()
+                    image.save(buffer, format="JPEG", quality=85)
+                    return base64.b64encode(buffer.getvalue()).decode('utf-8')
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
-    def generate_image_description(self, image_paths, instructions, model = 'gpt-4o-mini'):
+    def estimate_image_description(self, image_paths, instructions, model='gpt-4o-mini', budget=None, n=1):
+        """
+        Estimates the tokens and input cost of an image description request before sending it.
+
+        Parameters:
+        ----------
+        image_paths : str or list
+            Path(s) to the image file(s).
+        instructions : str
+            Instructions for the description.
+        model : str, optional
+            The OpenAI model to use (default is 'gpt-4o-mini').
+        budget : TokenBudget, optional
+            Budget to fit; defaults to the instance's token_budget.
+        n : int, optional
+            Number of descriptions asked for (default is 1). Each may use up to
+            DESCRIPTION_MAX_TOKENS, which is kept free in the session budget.
+
+        Returns:
+        -------
+        dict
+            Keys 'detail', 'max_side', 'tokens' (input), 'output_tokens' (most the
+            completion may use) and 'cost' (input USD, or None if the model is not
+            priced) for the setting that would be sent.
+
+        Raises:
+        ------
+        TokenBudgetExceeded
+            If the request cannot fit the budget even fully downscaled.
+        """
+        if isinstance(image_paths, str):
+            image_paths = [image_paths]
+        budget = budget or self.token_budget
+        sizes = [image_size(image_path) for image_path in image_paths]
+        output_tokens = n * DESCRIPTION_MAX_TOKENS
+        plan = plan_image_request(sizes, instructions, model, budget.limit(output_tokens) if budget else None)
+        plan['output_tokens'] = output_tokens
+        return plan
+
+    def generate_image_description(self, image_paths, instructions, model = 'gpt-4o-mini', budget=None, return_usage=False,
+                                   n=1):
         """
         Generates a description for one or more images using OpenAI's vision capabilities.
 
@@ -238,45 +665,651 @@ class GenAI:
             Instructions for the description.
         model : str, optional
             The OpenAI model to use (default is 'gpt-4o-mini').
+        budget : TokenBudget, optional
+            Token limits for this request; defaults to the instance's token_budget.
+            With a budget, images are downscaled (or sent at low detail) as needed to
+            fit, the estimate (input plus the most output n descriptions may use) is
+            reserved while the request is in flight, and the tokens used are charged
+            to it.
+        return_usage : bool, optional
+            If True, also return the token usage (default is False).
+        n : int, optional
+            Number of alternative descriptions to generate (default is 1). The images
+            are sent and billed once; only the completion tokens scale with n.
 
         Returns:
         -------
-        str
-            A textual description of the image(s).
+        str, list or tuple
+            A textual description of the image(s) (a list of n descriptions if n > 1),
+            or (description, usage) if `return_usage` is True, where usage is a dict
+            with 'prompt_tokens', 'completion_tokens' and 'total_tokens'.
+
+        Raises:
+        ------
+        TokenBudgetExceeded
+            If the request cannot fit the budget even fully downscaled.
+        """
+        budget = budget or self.token_budget
+        plan = self.estimate_image_description(image_paths, instructions, model, budget, n) if budget else None
+        params = self._image_description_params(image_paths, instructions, model, plan, n)
+
+        def call():
+            completion = self.client.chat.completions.create(**params)
+            return [choice.message.content for choice in completion.choices], self._usage(completion)
+
+        def charged_call():
+            # Only the response that is used is charged, not a losing hedge
+            self._reserve_budget(budget, plan)
+            try:
+                response = self._resilient_call(call)
+            except BaseException:
+                self._release_budget(budget, plan)
+                raise
+            self._charge_budget(budget, response[1], plan)
+            return response
+
+        if self.single_flight is None:
+            response = charged_call()
+        else:
+            # Keyed by priority class too, so an interactive caller never waits behind a
+            # batch-class leader still queued for a scheduler slot
+            response = self.single_flight.do((current_scheduling()[0], request_key(**params)), charged_call)
+        responses, usage = response
+        responses = [response.replace("```html", "").replace("```", "") for response in responses]
+        response = responses if n > 1 else responses[0]
+        if return_usage:
+            return response, usage
+        return response
+
+    async def generate_image_description_async(self, image_paths, instructions, model='gpt-4o-mini', budget=None,
+                                               return_usage=False, n=1):
+        """
+        Async version of `generate_image_description` using `openai.AsyncClient`.
+
+        Parameters:
+        ----------
+        image_paths : str or list
+            Path(s) to the image file(s).
+        instructions : str
+            Instructions for the description.
+        model : str, optional
+            The OpenAI model to use (default is 'gpt-4o-mini').
+        budget : TokenBudget, optional
+            Token limits for this request; defaults to the instance's token_budget.
+        return_usage : bool, optional
+            If True, also return the token usage (default is False).
+        n : int, optional
+            Number of alternative descriptions to generate (default is 1).
+
+        Returns:
+        -------
+        str, list or tuple
+            A textual description of the image(s) (a list if n > 1), or (description, usage).
+        """
+        budget = budget or self.token_budget
+        plan = self.estimate_image_description(image_paths, instructions, model, budget, n) if budget else None
+        params = self._image_description_params(image_paths, instructions, model, plan, n)
+
+        async def call():
+            completion = await self.async_client.chat.completions.create(**params)
+            return [choice.message.content for choice in completion.choices], self._usage(completion)
+
+        async def charged_call():
+            self._reserve_budget(budget, plan)
+            try:
+                response = await self._resilient_call_async(call)
+            except BaseException:
+                self._release_budget(budget, plan)
+                raise
+            self._charge_budget(budget, response[1], plan)
+            return response
+
+        if self.single_flight is None:
+            response = await charged_call()
+        else:
+            response = await self.single_flight.do_async((current_scheduling()[0], request_key(**params)),
+                                                         charged_call)
+        responses, usage = response
+        responses = [response.replace("```html", "").replace("```", "") for response in responses]
+        response = responses if n > 1 else responses[0]
+        if return_usage:
+            return response, usage
+        return response
+
+    def hedge_delay(self):
+        """
+        Returns the seconds to wait before hedging a vision request, or None if
+        hedging is disabled or there are not yet enough latency samples.
+        """
+        if self.hedge_percentile is None:
+            return None
+        if len(self.latency) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return self.latency.percentile(self.hedge_percentile)
+
+    @timed("api_call")
+    def _resilient_call(self, call):
+        """Runs an API call in a scheduler slot, through the circuit breaker and, if enabled, hedging."""
+        if self.scheduler is None:
+            return self._guarded_call(call)
+        with self.scheduler.slot():
+            return self._guarded_call(call)
+
+    def _guarded_call(self, call):
+        """Runs an API call through the circuit breaker and, if enabled, hedging."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call()
+        start = time.perf_counter()
+        try:
+            delay = self.hedge_delay()
+            response = call() if delay is None else self._hedged(call, delay)
+        except Exception as e:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_error(e)
+            raise
+        self.latency.record(time.perf_counter() - start)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_success()
+        return response
+
+    def _hedge_slot(self):
+        """
+        Takes a scheduler slot for a hedged duplicate without waiting.
+
+        Returns a function that frees it (a no-op without a scheduler), or None if
+        no slot is free, in which case the request is not hedged.
+        """
+        if self.scheduler is None:
+            return lambda: None
+        priority = self.scheduler.try_acquire()
+        if priority is None:
+            return None
+        return lambda: self.scheduler.release(priority)
+
+    def _hedged(self, call, delay):
+        """
+        Calls `call`, firing a duplicate if it has not finished after `delay` seconds
+        and the scheduler has a slot free for it.
+        """
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        primary = self._hedge_executor.submit(call)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        release = self._hedge_slot()
+        if release is None:
+            return primary.result()
+
+        # Two calls now run on two slots: the caller's, freed when we return, and the
+        # hedge's, freed only once both calls are done, so a loser that keeps running
+        # in the background still counts against the scheduler's limits
+        hedge = self._hedge_executor.submit(call)
+        outstanding = [2]
+        outstanding_lock = threading.Lock()
+
+        def finished(_future):
+            with outstanding_lock:
+                outstanding[0] -= 1
+                last = outstanding[0] == 0
+            if last:
+                release()
+
+        primary.add_done_callback(finished)
+        hedge.add_done_callback(finished)
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The slower request keeps running in the background; its result is dropped.
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _resilient_call_async(self, call):
+        """Async version of `_resilient_call`."""
+        if self.scheduler is None:
+            return await self._guarded_call_async(call)
+        # Wait for the slot on a worker thread so the event loop keeps running
+        acquiring = asyncio.get_running_loop().run_in_executor(
+            None, self.scheduler.acquire, *current_scheduling())
+        try:
+            priority = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The slot may still be granted after we stop waiting; hand it straight back
+            acquiring.add_done_callback(
+                lambda future: future.exception() is None and self.scheduler.release(future.result()))
+            raise
+        try:
+            return await self._guarded_call_async(call)
+        finally:
+            self.scheduler.release(priority)
+
+    async def _guarded_call_async(self, call):
+        """Async version of `_guarded_call`."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call()
+        start = time.perf_counter()
+        try:
+            delay = self.hedge_delay()
+            response = await call() if delay is None else await self._hedged_async(call, delay)
+        except Exception as e:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_error(e)
+            raise
+        self.latency.record(time.perf_counter() - start)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_success()
+        return response
+
+    async def _hedged_async(self, call, delay):
+        """Async version of `_hedged`; the losing request is cancelled."""
+        primary = asyncio.ensure_future(call())
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        release = self._hedge_slot()
+        if release is None:
+            return await primary
+
+        hedge = asyncio.ensure_future(call())
+        hedge.add_done_callback(lambda _task: release())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _usage(self, completion):
+        """Extracts token usage from a completion as a plain dict."""
+        usage = getattr(completion, "usage", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+        }
+
+    def _reserve_budget(self, budget, plan):
+        """Holds a request's estimated input and maximum output tokens in a budget while it is in flight."""
+        if budget is not None:
+            budget.reserve(plan['tokens'], plan['output_tokens'])
+
+    def _release_budget(self, budget, plan):
+        """Gives back the reservation of a request that failed."""
+        if budget is not None:
+            budget.release(plan['tokens'] + plan['output_tokens'])
+
+    def _charge_budget(self, budget, usage, plan):
+        """Settles a completed request's reservation to its token usage (see `_usage`), or its estimate."""
+        if budget is None:
+            return
+        budget.settle(plan['tokens'] + plan['output_tokens'], usage.get("total_tokens") or plan['tokens'])
+
+    def _image_description_params(self, image_paths, instructions, model, plan=None, n=1):
+        """
+        Builds the chat completion parameters for an image description request,
+        applying the detail level and downscaling of a plan from
+        `estimate_image_description` if given, and asking for `n` choices.
         """
         if isinstance(image_paths, str):
             image_paths = [image_paths]
 
-        image_urls = [f"data:image/jpeg;base64,{self.encode_image(image_path)}" for image_path in image_paths]
+        max_side = plan['max_side'] if plan else None
+        image_urls = [f"data:image/jpeg;base64,{self.encode_image(image_path, max_side)}" for image_path in image_paths]
+
+        def image_part(url):
+            image_url = {"url": url}
+            if plan:
+                image_url["detail"] = plan['detail']
+            return {"type": "image_url", "image_url": image_url}
 
         PROMPT_MESSAGES = [
             {
                 "role": "user",
                 "content": [{"type": "text", "text": instructions},
-                            *map(lambda x: {"type": "image_url", "image_url": {"url": x}}, image_urls),
+                            *map(image_part, image_urls),
                             ],
             },
         ]
         params = {
             "model": model,
             "messages": PROMPT_MESSAGES,
-            "max_tokens": 1000,
+            "max_tokens": DESCRIPTION_MAX_TOKENS,
         }
+        if n > 1:
+            params["n"] = n
+        return params
 
-        completion = self.client.chat.completions.create(**params)
-        response = completion.choices[0].message.content
-        response = response.replace("```html", "")
-        response = response.replace("```", "")
-        return response
+    def batch_request(self, custom_id, params):
+        """
+        Wraps chat completion parameters as one line of a Batch API input file.
+
+        Parameters:
+        ----------
+        custom_id : str
+            Caller-chosen ID, unique within the batch, used to match the result.
+        params : dict
+            Chat completion parameters, e.g. from `_image_description_params`.
+
+        Returns:
+        -------
+        dict
+        """
+        return {"custom_id": str(custom_id), "method": "POST", "url": BATCH_ENDPOINT, "body": params}
 
-    def extract_frames(self, fname_video, max_samples = 15):
+    def image_description_batch_request(self, custom_id, image_paths, instructions, model='gpt-4o-mini'):
+        """Builds a Batch API request equivalent to `generate_image_description`."""
+        return self.batch_request(custom_id, self._image_description_params(image_paths, instructions, model))
+
+    def text_batch_request(self, custom_id, prompt, instructions='You are a helpful AI named Jarvis',
+                           model="gpt-4o-mini", output_type='text', temperature=1):
+        """Builds a Batch API request equivalent to `generate_text`."""
+        return self.batch_request(custom_id, self._text_params(prompt, instructions, model, output_type, temperature))
+
+    def submit_batch(self, requests, completion_window="24h", metadata=None):
+        """
+        Uploads requests as a JSONL file and starts a Batch API job.
+
+        Batch jobs are billed at a discount and finish within the completion window,
+        which suits offline work such as captioning a whole catalog overnight.
+
+        Parameters:
+        ----------
+        requests : iterable
+            Dicts from `batch_request`, `image_description_batch_request` or
+            `text_batch_request`; custom IDs must be unique.
+        completion_window : str, optional
+            How long the API may take (default is '24h', the only window offered).
+        metadata : dict, optional
+            Up to 16 string key/value pairs stored with the batch.
+
+        Returns:
+        -------
+        str
+            The batch ID.
+        """
+        buffer = BytesIO()
+        custom_ids = set()
+        for request in requests:
+            if request["custom_id"] in custom_ids:
+                raise ValueError(f"Duplicate custom_id {request['custom_id']!r} in batch")
+            custom_ids.add(request["custom_id"])
+            buffer.write(json.dumps(request).encode("utf-8") + b"\n")
+        if not custom_ids:
+            raise ValueError("A batch needs at least one request")
+
+        input_file = self.client.files.create(file=("batch_input.jsonl", buffer.getvalue()), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=completion_window,
+            metadata=metadata,
+        )
+        return batch.id
+
+    def wait_for_batch(self, batch_id, poll_interval=30, timeout=None):
+        """
+        Polls a batch until it reaches a final state.
+
+        Parameters:
+        ----------
+        batch_id : str
+            ID returned by `submit_batch`.
+        poll_interval : float, optional
+            Seconds between status checks (default is 30).
+        timeout : float, optional
+            Give up after this many seconds (default is None, wait for the API's
+            completion window).
+
+        Returns:
+        -------
+        openai.types.Batch
+            The batch in its final state ('completed', 'failed', 'expired' or 'cancelled').
+
+        Raises:
+        ------
+        TimeoutError
+            If the batch is still running after `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in BATCH_FINISHED_STATES:
+                return batch
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                raise TimeoutError(f"Batch {batch_id} still {batch.status} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def get_batch_results(self, batch):
+        """
+        Downloads a finished batch's output and error files.
+
+        Parameters:
+        ----------
+        batch : str or openai.types.Batch
+            The batch or its ID.
+
+        Returns:
+        -------
+        dict
+            custom_id -> {'content': str or None, 'usage': dict or None, 'error': str or None}.
+            Requests that produced no line in either file (e.g. in an expired batch)
+            are absent.
+        """
+        if isinstance(batch, str):
+            batch = self.client.batches.retrieve(batch)
+
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+                entry = {"content": None, "usage": body.get("usage"), "error": None}
+                if record.get("error"):
+                    entry["error"] = record["error"].get("message") or str(record["error"])
+                elif response.get("status_code") != 200:
+                    entry["error"] = (body.get("error") or {}).get("message") or f"HTTP {response.get('status_code')}"
+                else:
+                    entry["content"] = body["choices"][0]["message"]["content"]
+                results[record["custom_id"]] = entry
+        return results
+
+    def run_batch(self, requests, poll_interval=30, timeout=None, metadata=None):
+        """
+        Submits requests as a batch, waits for it and returns the results in request order.
+
+        Parameters:
+        ----------
+        requests : list
+            Dicts from the `*_batch_request` builders.
+        poll_interval : float, optional
+            Seconds between status checks (default is 30).
+        timeout : float, optional
+            Seconds to wait before raising TimeoutError (default is None).
+        metadata : dict, optional
+            Metadata stored with the batch.
+
+        Returns:
+        -------
+        list
+            One result dict per request (see `get_batch_results`); requests the batch
+            did not process get an error entry.
+        """
+        requests = list(requests)
+        batch_id = self.submit_batch(requests, metadata=metadata)
+        batch = self.wait_for_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+        results = self.get_batch_results(batch)
+        missing = {"content": None, "usage": None, "error": f"Not processed (batch {batch.status})"}
+        return [results.get(request["custom_id"], missing) for request in requests]
+
+    def iter_frames(self, video, nframes, max_samples=15):
+        """
+        Yields frames sampled at regular intervals from an opened video, one at a time.
+
+        Skipped frames are only grabbed, not decoded, so sampling a long video costs
+        little more than decoding the sampled frames themselves.
+
+        Parameters:
+        ----------
+        video : cv2.VideoCapture
+            An opened video.
+        nframes : float
+            Total number of frames in the video.
+        max_samples : int, optional
+            Maximum number of frames to yield (default is 15).
+
+        Yields:
+        ------
+        numpy.ndarray
+            A BGR frame.
+        """
+        frame_interval = max(1, int(nframes // max_samples))  # Calculate the interval at which to sample frames
+
+        sampled = 0
+        current_frame = 0
+        while sampled < max_samples and video.grab():
+            if current_frame % frame_interval == 0:
+                success, frame = video.retrieve()
+                if not success:
+                    break
+                sampled += 1
+                yield frame
+            current_frame += 1
+
+    def encode_frames(self, frames, target_bytes=None, frame_count=None):
+        """
+        Encodes frames as base64 JPEG, choosing resolution and quality per frame so the
+        total payload stays within `target_bytes`.
+
+        Each frame gets an equal share of the budget left over by the frames before it.
+        The largest size and highest quality that fit are used, from sizes in
+        VIDEO_FRAME_SIDES no larger than the frame itself (its own size first) and
+        qualities in VIDEO_JPEG_QUALITIES. Since consecutive samples tend to compress
+        alike, the search starts at the previous frame's setting and moves down until
+        the frame fits, or back up while it still fits.
+
+        Parameters:
+        ----------
+        frames : iterable
+            BGR frames, consumed one at a time so only one decoded frame is held in
+            memory (e.g. the generator from `iter_frames`).
+        target_bytes : int, optional
+            Total base64 payload budget in bytes. If None, frames are encoded at their
+            native resolution with OpenCV's default quality.
+        frame_count : int, optional
+            Expected number of frames, used to split the budget. If None, `frames` is
+            read into a list first to count them.
+
+        Returns:
+        -------
+        tuple
+            A tuple containing:
+            - A list of base64-encoded JPEG frames
+            - A stats dict with 'frames', 'payload_bytes', 'target_bytes' and
+              'frame_settings' (a (longest side, quality, bytes) tuple per frame)
+        """
+        if frame_count is None:
+            frames = list(frames)
+            frame_count = len(frames)
+        base64Frames = []
+        settings = []
+        remaining = target_bytes
+        previous = None
+
+        for i, frame in enumerate(frames):
+            if target_bytes is None:
+                _, buffer = cv2.imencode(".jpg", frame)
+                encoded = base64.b64encode(buffer).decode("utf-8")
+                settings.append((max(frame.shape[:2]), None, len(encoded)))
+                base64Frames.append(encoded)
+                continue
+
+            frame_budget = remaining / max(1, frame_count - i)
+            # Sides above the frame's own size would re-encode the same pixels
+            sides = sorted({min(max(frame.shape[:2]), side) for side in VIDEO_FRAME_SIDES}, reverse=True)
+            ladder = [(side, quality) for side in sides for quality in VIDEO_JPEG_QUALITIES]
+            resized = {}
+
+            def encode(position):
+                side, quality = ladder[position]
+                if side not in resized:
+                    resized[side] = self._resize_frame(frame, side)
+                _, buffer = cv2.imencode(".jpg", resized[side], [cv2.IMWRITE_JPEG_QUALITY, quality])
+                return base64.b64encode(buffer).decode("utf-8")
+
+            position = 0
+            if previous is not None:
+                position = next((k for k, (side, quality) in enumerate(ladder)
+                                 if side < previous[0] or (side == previous[0] and quality <= previous[1])),
+                                len(ladder) - 1)
+            encoded = encode(position)
+            if len(encoded) <= frame_budget:
+                while position > 0:
+                    candidate = encode(position - 1)
+                    if len(candidate) > frame_budget:
+                        break
+                    position, encoded = position - 1, candidate
+            else:
+                # If nothing fits, the smallest setting is sent anyway
+                while position + 1 < len(ladder):
+                    position += 1
+                    encoded = encode(position)
+                    if len(encoded) <= frame_budget:
+                        break
+            previous = ladder[position]
+            settings.append((max(resized[previous[0]].shape[:2]), previous[1], len(encoded)))
+            base64Frames.append(encoded)
+            remaining -= len(encoded)
+
+        stats = {
+            "frames": len(base64Frames),
+            "payload_bytes": sum(size for _, _, size in settings),
+            "target_bytes": target_bytes,
+            "frame_settings": settings,
+        }
+        return base64Frames, stats
+
+    def _resize_frame(self, frame, max_side):
+        """Downscales a frame so its longest side is at most `max_side` pixels."""
+        height, width = frame.shape[:2]
+        scale = max_side / max(height, width)
+        if scale >= 1:
+            return frame
+        return cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    @timed("extract_frames")
+    def extract_frames(self, fname_video, max_samples = 15, target_bytes=None, return_stats=False):
         """
         Extracts frames from a video file at regular intervals.
 
         Parameters:
         ----------
-        video_path : str
+        fname_video : str
             Path to the video file.
+        max_samples : int, optional
+            Maximum number of frames to sample (default is 15).
+        target_bytes : int, optional
+            Total base64 payload budget for the sampled frames; see `encode_frames`.
+            If None (default), frames are encoded at native resolution.
+        return_stats : bool, optional
+            If True, also return the encoding stats from `encode_frames`.
 
         Returns:
         -------
@@ -285,15 +1318,17 @@ class GenAI:
             - A list of base64-encoded image frames
             - Total number of frames in the video
             - Frames per second (FPS) of the video
+            - The encoding stats, if `return_stats` is True
         """
+        empty = ([], 0, 0, {"frames": 0, "payload_bytes": 0, "target_bytes": target_bytes, "frame_settings": []})
         if not os.path.exists(fname_video):
             
-            return [], 0, 0
+            return empty if return_stats else empty[:3]
 
         video = cv2.VideoCapture(fname_video)  # open the video file
         if not video.isOpened():
             #logger.error(f"Failed to open video file: {fname_video}")
-            return [], 0, 0
+            return empty if return_stats else empty[:3]
 
         nframes = video.get(cv2.CAP_PROP_FRAME_COUNT)  # number of frames in video
         fps = video.get(cv2.CAP_PROP_FPS)  # frames per second in video
@@ -301,25 +1336,22 @@ class GenAI:
         #logger.debug(f"{nframes} frames in video")
         #logger.debug(f"{fps} frames per second")
 
-        base64Frames = []
-        
-        frame_interval = max(1, int(nframes // max_samples))  # Calculate the interval at which to sample frames
-
-        current_frame = 0
-        while video.isOpened():
-            success, frame = video.read()
-            if not success:
-                break
-            if current_frame % frame_interval == 0 and len(base64Frames) < max_samples:
-                _, buffer = cv2.imencode(".jpg", frame)
-                base64Frames.append(base64.b64encode(buffer).decode("utf-8"))
-            current_frame += 1
+        # Number of frames iter_frames will sample, so the budget can be split up front
+        frame_interval = max(1, int(nframes // max_samples))
+        frame_count = min(max_samples, math.ceil(nframes / frame_interval)) if nframes > 0 else max_samples
 
-        video.release()
+        try:
+            base64Frames, stats = self.encode_frames(self.iter_frames(video, nframes, max_samples),
+                                                     target_bytes, frame_count)
+        finally:
+            video.release()
 
+        if return_stats:
+            return base64Frames, nframes, fps, stats
         return base64Frames, nframes, fps
 
-    def generate_video_description(self, fname_video, instructions, max_samples=15, model='gpt-4o-mini'):
+    def generate_video_description(self, fname_video, instructions, max_samples=15, model='gpt-4o-mini',
+                                   target_bytes=DEFAULT_VIDEO_PAYLOAD_BYTES, return_stats=False):
         """
         Generates a textual description of a video by analyzing sampled frames.
 
@@ -333,14 +1365,22 @@ class GenAI:
             Maximum number of frames to sample from the video (default is 15).
         model : str, optional
             OpenAI model used for generating the description (default is 'gpt-4o-mini').
+        target_bytes : int, optional
+            Budget for the base64 frame payload of the request; frame size and JPEG
+            quality are lowered to fit (default is DEFAULT_VIDEO_PAYLOAD_BYTES). None
+            sends frames at native resolution.
+        return_stats : bool, optional
+            If True, also return the frame encoding stats, including the bytes sent.
 
         Returns
         -------
-        str
-            A descriptive summary of the video content.
+        str or tuple
+            A descriptive summary of the video content, or (summary, stats) if
+            `return_stats` is True.
         """
         # Extract sampled frames and video metadata
-        base64Frames_samples, nframes, fps = self.extract_frames(fname_video, max_samples)
+        base64Frames_samples, nframes, fps, stats = self.extract_frames(
+            fname_video, max_samples, target_bytes=target_bytes, return_stats=True)
 
         # Estimate the maximum number of words based on speech rate
         words_per_second = 200 / 60  # Typical speech rate
@@ -370,7 +1410,10 @@ class GenAI:
         response = completion.choices[0].message.content
 
         # Clean up response formatting
-        return response.replace("```html", "").replace("```", "")
+        response = response.replace("```html", "").replace("```", "")
+        if return_stats:
+            return response, stats
+        return response
 
     def generate_audio(self, text, file_path, model='tts-1', voice='nova', speed=1.0):
         """
@@ -418,51 +1461,333 @@ class GenAI:
 
 
 
-    def recognize_speech(self,audio_filename, model = 'whisper-1'):
-        try:
-            
-            #print("Load audio file")
-            audio_file= open(audio_filename, "rb")
+    def probe_audio(self, audio_filename):
+        """
+        Returns the duration, codec and bitrate of an audio file using ffprobe.
 
-            #print("\ttranscribe audio")
+        Returns:
+        -------
+        dict
+            Keys 'duration' (seconds), 'codec' (of the first audio stream, or None)
+            and 'bit_rate' (bits per second, or None if ffprobe can't tell).
+        """
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=codec_name,bit_rate:format=duration,bit_rate", "-of", "json",
+             audio_filename],
+            check=True, capture_output=True, text=True,
+        )
+        info = json.loads(result.stdout)
+        stream = (info.get("streams") or [{}])[0]
+        bit_rate = stream.get("bit_rate") or info["format"].get("bit_rate")
+        return {
+            "duration": float(info["format"]["duration"]),
+            "codec": stream.get("codec_name"),
+            "bit_rate": int(bit_rate) if bit_rate and bit_rate != "N/A" else None,
+        }
+
+    def plan_audio_segments(self, audio_filename, segment_seconds=600, overlap_seconds=5):
+        """
+        Decides how to split an audio file so that every segment fits the upload limit.
+
+        Lossy sources (COPYABLE_AUDIO_CODECS) are cut without re-encoding; anything
+        else is re-encoded to mono MP3 at SEGMENT_BITRATE. Segments are shortened if
+        bitrate x duration would exceed TRANSCRIPTION_MAX_BYTES.
+
+        Parameters:
+        ----------
+        audio_filename : str
+            Path to the audio file.
+        segment_seconds : float, optional
+            Longest segment in seconds (default is 600).
+        overlap_seconds : float, optional
+            Seconds shared between consecutive segments so that words cut at a
+            boundary appear whole in at least one segment (default is 5).
+
+        Returns:
+        -------
+        tuple
+            (segments, codec_args, extension): a list of (start_seconds,
+            length_seconds) in playback order, the ffmpeg codec arguments and the
+            segment file extension. The list is empty if the file can be sent as is.
+        """
+        probe = self.probe_audio(audio_filename)
+        duration = probe["duration"]
+        if probe["codec"] in COPYABLE_AUDIO_CODECS and probe["bit_rate"]:
+            codec_args, ext = ["-c", "copy"], COPYABLE_AUDIO_CODECS[probe["codec"]]
+            bytes_per_second = probe["bit_rate"] / 8
+        else:
+            codec_args = ["-ac", "1", "-c:a", "libmp3lame", "-b:a", str(SEGMENT_BITRATE)]
+            ext, bytes_per_second = ".mp3", SEGMENT_BITRATE / 8
+
+        segment_seconds = min(segment_seconds, TRANSCRIPTION_MAX_BYTES * SEGMENT_SIZE_MARGIN / bytes_per_second)
+        if overlap_seconds >= segment_seconds:
+            raise ValueError("overlap_seconds must be smaller than segment_seconds")
+
+        if duration <= segment_seconds and os.path.getsize(audio_filename) <= TRANSCRIPTION_MAX_BYTES:
+            return [], codec_args, ext
+
+        segments = []
+        start, step = 0.0, segment_seconds - overlap_seconds
+        while True:
+            segments.append((start, segment_seconds))
+            if start + segment_seconds >= duration:
+                break
+            start += step
+        return segments, codec_args, ext
+
+    def cut_audio_segment(self, audio_filename, segment_path, start, length, codec_args):
+        """Writes `length` seconds of an audio file from `start` to `segment_path` with ffmpeg."""
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error",
+             "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+             "-i", audio_filename, "-vn", *codec_args, segment_path],
+            check=True,
+        )
+        return segment_path
+
+    def transcribe_audio_file(self, audio_filename, model='whisper-1', word_timestamps=False):
+        """
+        Transcribes a single audio file in one request.
+
+        Parameters:
+        ----------
+        audio_filename : str
+            Path to the audio file.
+        model : str, optional
+            The OpenAI transcription model to use (default is 'whisper-1').
+        word_timestamps : bool, optional
+            If True, also return each word with its start time, in seconds from the
+            start of the file (default is False). Only models in
+            WORD_TIMESTAMP_MODELS support this.
+
+        Returns:
+        -------
+        str or tuple
+            The transcribed text, or (text, [(word, start seconds), ...]) if
+            `word_timestamps` is True.
+        """
+        with open(audio_filename, "rb") as audio_file:
+            if word_timestamps:
+                transcription = self.client.audio.transcriptions.create(
+                    model=model,
+                    file=audio_file,
+                    response_format="verbose_json",
+                    timestamp_granularities=["word"]
+                )
+                return transcription.text, [(word.word, word.start) for word in transcription.words or []]
             transcription = self.client.audio.transcriptions.create(
-              model="whisper-1", 
-              file=audio_file
+                model=model,
+                file=audio_file
             )
-            # Print the transcribed text
-            #print(transcription.text)
-            
-            return transcription.text
-        except Exception as e:
-            
-            traceback.print_exc()
-            return None
+        return transcription.text
+
+    def stitch_transcripts(self, texts, max_overlap_words=50, max_skip_words=3, min_match=0.8):
+        """
+        Joins segment transcripts, removing words repeated across overlapping segments.
 
+        Segments are cut by time, so each usually ends and begins with a fragment of a
+        word ("...with den" / "ans well with denim..."). For each pair of consecutive
+        transcripts, up to `max_skip_words` trailing words of the first and leading
+        words of the second may be skipped as such fragments; the longest run of words
+        shared by what remains (compared case- and punctuation-insensitively, with at
+        least `min_match` of the words equal) is the overlap. The fragments and the
+        repeated run are dropped, keeping the first transcript's version.
 
-    def read_pdf(self,file_path):
-        # Open the PDF file
-        with open(file_path, 'rb') as file:
-            # Initialize the PDF reader
-            reader = PyPDF2.PdfReader(file)
-            
-            # Initialize an empty string to store the text
-            text = ""
-            
-            # Iterate through each page in the PDF
-            for page in reader.pages:
-                # Extract the text from the page and add it to the text string
-                text += page.extract_text()
-            
+        An overlap found only after skipping fragments must be at least three words
+        long, unless a skipped fragment is confirmed by the other transcript: a
+        trailing fragment that starts the word after the overlap ("den" / "denim"),
+        or a leading fragment that ends the word before it.
+
+        Parameters:
+        ----------
+        texts : list
+            Transcripts of consecutive, overlapping segments.
+        max_overlap_words : int, optional
+            Longest overlap to search for, in words (default is 50).
+        max_skip_words : int, optional
+            Most fragment words skipped at either edge (default is 3).
+        min_match : float, optional
+            Share of words in a candidate overlap that must be equal (default is 0.8).
+
+        Returns:
+        -------
+        str
+            The combined transcript.
+        """
+        def normalize(word):
+            return re.sub(r'[^\w]', '', word.lower())
+
+        def confirmed(tail, head, size, tail_skip, head_skip):
+            """True if a skipped edge fragment is part of a word of the other transcript."""
+            after = head_skip + size
+            fragment = tail[len(tail) - tail_skip] if tail_skip else ""
+            if fragment and after < len(head) and head[after] != fragment and head[after].startswith(fragment):
+                return True
+            before = len(tail) - tail_skip - size - 1
+            fragment = head[head_skip - 1] if head_skip else ""
+            return bool(fragment) and before >= 0 and tail[before] != fragment and tail[before].endswith(fragment)
+
+        stitched = []
+        for text in texts:
+            words = (text or "").split()
+            if stitched and words:
+                tail = [normalize(w) for w in stitched[-max_overlap_words:]]
+                head = [normalize(w) for w in words[:max_overlap_words]]
+                best = None  # (size, tail skip, head skip)
+                for tail_skip in range(min(max_skip_words, len(tail) - 1) + 1):
+                    for head_skip in range(min(max_skip_words, len(head) - 1) + 1):
+                        skipped = tail_skip or head_skip
+                        for size in range(min(len(tail) - tail_skip, len(head) - head_skip), 0, -1):
+                            if best is not None and size <= best[0]:
+                                break
+                            window = tail[len(tail) - tail_skip - size:len(tail) - tail_skip]
+                            equal = sum(a == b for a, b in zip(window, head[head_skip:head_skip + size]))
+                            if equal < min_match * size or window[-1] != head[head_skip + size - 1]:
+                                continue
+                            # A short match after skipping could be a stray common word
+                            if skipped and size < 3 and not confirmed(tail, head, size, tail_skip, head_skip):
+                                continue
+                            best = (size, tail_skip, head_skip)
+                            break
+                if best is not None:
+                    size, tail_skip, head_skip = best
+                    if tail_skip:
+                        del stitched[-tail_skip:]
+                    words = words[head_skip + size:]
+            stitched.extend(words)
+        return ' '.join(stitched)
+
+    def stitch_timed_transcripts(self, transcripts, starts, overlap_seconds):
+        """
+        Joins segment transcripts using word timestamps to drop the overlap.
+
+        Each overlap window is split at its midpoint: the earlier segment keeps the
+        words that start before it and the later segment the words from it on, so
+        fragments cut at either segment edge are dropped with the repeated words.
+        The text is rebuilt from the timestamped words, which carry no punctuation.
+
+        Parameters:
+        ----------
+        transcripts : list
+            (text, [(word, start seconds), ...]) per segment, as returned by
+            `transcribe_audio_file(..., word_timestamps=True)`.
+        starts : list
+            Start of each segment in the recording, in seconds.
+        overlap_seconds : float
+            Overlap between consecutive segments in seconds.
+
+        Returns:
+        -------
+        str
+            The combined transcript.
+        """
+        stitched = []
+        for index, (_, words) in enumerate(transcripts):
+            first_cutoff = overlap_seconds / 2 if index > 0 else float("-inf")
+            last_cutoff = float("inf")
+            if index + 1 < len(transcripts):
+                last_cutoff = starts[index + 1] - starts[index] + overlap_seconds / 2
+            stitched.extend(word for word, start in words if first_cutoff <= start < last_cutoff)
+        return ' '.join(stitched)
+
+    def recognize_speech(self, audio_filename, model='whisper-1', segment_seconds=600,
+                         overlap_seconds=5, max_workers=4, return_timings=False):
+        """
+        Transcribes an audio file, splitting long or large recordings into overlapping
+        segments that are cut, transcribed concurrently and stitched back together.
+
+        Each worker cuts its segment with ffmpeg and uploads it right away, so cutting
+        overlaps with transcription. See `plan_audio_segments` for how segments are
+        sized and encoded to stay under the upload limit.
+
+        Parameters:
+        ----------
+        audio_filename : str
+            Path to the audio file.
+        model : str, optional
+            The OpenAI transcription model to use (default is 'whisper-1').
+        segment_seconds : float, optional
+            Longest segment in seconds (default is 600).
+        overlap_seconds : float, optional
+            Overlap between consecutive segments in seconds (default is 5).
+        max_workers : int, optional
+            Number of segments cut and transcribed in parallel (default is 4).
+        return_timings : bool, optional
+            If True, also return per-segment timings (default is False).
+
+        Returns:
+        -------
+        str or tuple
+            The transcribed text, or None on failure. If `return_timings` is True, a tuple
+            (text, timings) where timings is a list of dicts with keys 'segment',
+            'start', 'cut_seconds', 'seconds' and 'words'.
+        """
+        timings = []
+        temp_dir = None
+        try:
+            segments, codec_args, ext = [], None, None
+            if segment_seconds and shutil.which("ffmpeg") and shutil.which("ffprobe"):
+                segments, codec_args, ext = self.plan_audio_segments(audio_filename, segment_seconds,
+                                                                     overlap_seconds)
+            if segments:
+                temp_dir = tempfile.mkdtemp(prefix="genai_audio_")
+            else:
+                segments = [(0.0, None)]
+
+            # Word timestamps let the overlap be cut by time instead of by matching text
+            word_timestamps = len(segments) > 1 and model in WORD_TIMESTAMP_MODELS
+
+            def transcribe(index, start, length):
+                t0 = time.perf_counter()
+                segment_path = audio_filename
+                if length is not None:
+                    segment_path = self.cut_audio_segment(
+                        audio_filename, os.path.join(temp_dir, f"segment_{index:04d}{ext}"), start, length,
+                        codec_args)
+                t1 = time.perf_counter()
+                result = self.transcribe_audio_file(segment_path, model=model, word_timestamps=word_timestamps)
+                elapsed = time.perf_counter() - t1
+                if segment_path != audio_filename:
+                    os.remove(segment_path)
+                text = result[0] if word_timestamps else result
+                return index, result, {"segment": index, "start": start, "cut_seconds": t1 - t0,
+                                       "seconds": elapsed, "words": len(text.split())}
+
+            results = [None] * len(segments)
+            timings = [None] * len(segments)
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(segments)))) as executor:
+                futures = [executor.submit(transcribe, i, start, length)
+                           for i, (start, length) in enumerate(segments)]
+                for future in as_completed(futures):
+                    index, result, timing = future.result()
+                    results[index] = result
+                    timings[index] = timing
+
+            # Fall back to matching text if any segment came back without word timings
+            if word_timestamps and all(words or not text.strip() for text, words in results):
+                text = self.stitch_timed_transcripts(results, [start for start, _ in segments], overlap_seconds)
+            else:
+                text = self.stitch_transcripts([result[0] if word_timestamps else result for result in results])
+        except Exception:
+            traceback.print_exc()
+            text = None
+        finally:
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        if return_timings:
+            return text, timings
         return text
 
 
+    def read_pdf(self,file_path):
+        """Returns the text of a PDF file. For many files, use ingest.DocumentIngester."""
+        return pdf_text(file_path)[0]
 
     def read_docx(self,file_path):
-        doc = Document(file_path)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return '\n'.join(full_text)
+        """Returns the text of a DOCX file. For many files, use ingest.DocumentIngester."""
+        return docx_text(file_path)[0]
 
 
     def get_embedding(self, text, model='text-embedding-3-small'):
@@ -494,6 +1819,34 @@ class GenAI:
         )
         return response.data[0].embedding
 
+    def get_embeddings(self, texts, model='text-embedding-3-small', batch_size=512):
+        """
+        Generates embedding vectors for several texts, batching them into few requests.
+
+        Parameters:
+        ----------
+        texts : list
+            The input texts. Newline characters are replaced with spaces.
+        model : str, optional
+            The OpenAI embedding model to use. Defaults to 'text-embedding-3-small'.
+        batch_size : int, optional
+            Maximum number of texts per request (default is 512).
+
+        Returns:
+        -------
+        list
+            One embedding vector (list of floats) per input text, in input order.
+        """
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            batch = [text.replace("\n", " ") for text in texts[start:start + batch_size]]
+            response = self.client.embeddings.create(
+                input=batch,
+                model=model
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
 
     def remove_urls(self, text):
         url_pattern = re.compile(r'https?://\S+|www\.\S+')
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from functools import lru_cache
+import numpy as np
+
+# Default location of the precomputed index; override with the HASHTAG_INDEX environment variable
+DEFAULT_INDEX_PATH = "hashtag_index.npz"
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Seconds to wait after a failed build before trying again; meanwhile callers get
+# HashtagIndexUnavailable right away instead of each retrying the embedding calls
+BUILD_RETRY_SECONDS = 300
+
+# Hashtag vocabulary with a short description of when each tag fits. The descriptions
+# are what gets embedded, so a style description like "cozy autumn layers" lands near
+# #sweaterweather even though the words differ.
+HASHTAGS = {
+    "#ootd": "outfit of the day, everyday look",
+    "#fashion": "general fashion post",
+    "#style": "personal style, fashion inspiration",
+    "#styleinspo": "style inspiration, outfit ideas",
+    "#outfitinspo": "outfit inspiration, what to wear",
+    "#whatiwore": "what I wore today, personal outfit diary",
+    "#fashionista": "fashion lover, trendy dresser",
+    "#streetstyle": "street style, urban city outfit, sneakers",
+    "#streetwear": "streetwear, hoodies, oversized, sneakers, urban",
+    "#casualstyle": "casual relaxed everyday comfortable outfit",
+    "#athleisure": "athletic leisure wear, leggings, sporty comfortable",
+    "#minimalstyle": "minimalist clean simple neutral outfit",
+    "#minimalism": "minimalism, understated, less is more",
+    "#neutraltones": "neutral beige cream tones, monochrome",
+    "#monochrome": "monochrome, single color head to toe, black and white",
+    "#allblack": "all black outfit, sleek, dark",
+    "#capsulewardrobe": "capsule wardrobe, versatile essentials",
+    "#elegantstyle": "elegant sophisticated refined outfit",
+    "#classicstyle": "classic timeless tailored look",
+    "#oldmoney": "old money aesthetic, quiet luxury, preppy refined",
+    "#quietluxury": "quiet luxury, understated expensive, cashmere",
+    "#eveningwear": "evening wear, gown, formal night out",
+    "#blacktie": "black tie formal event, tuxedo, gown",
+    "#cocktaildress": "cocktail dress, party, evening",
+    "#datenight": "date night outfit, romantic dinner",
+    "#partylook": "party outfit, going out, night life",
+    "#romanticstyle": "romantic soft feminine dreamy outfit",
+    "#feminine": "feminine, dresses, skirts, soft",
+    "#floral": "floral prints, flowers, spring",
+    "#cottagecore": "cottagecore, prairie dress, countryside, whimsical romantic",
+    "#pastel": "pastel colors, soft pink lilac baby blue",
+    "#whimsical": "whimsical playful quirky fun outfit",
+    "#colorful": "colorful bright bold colors, color blocking",
+    "#maximalism": "maximalist, more is more, clashing prints",
+    "#vintagestyle": "vintage retro thrifted clothing",
+    "#thriftedfashion": "thrifted second hand sustainable fashion",
+    "#y2kfashion": "y2k 2000s fashion, low rise, butterfly clips",
+    "#90sfashion": "90s fashion, grunge, slip dress",
+    "#bohostyle": "boho bohemian free spirited, fringe, flowy",
+    "#festivalfashion": "festival outfit, music festival, boho, sequins",
+    "#edgystyle": "edgy fierce bold outfit, leather, studs",
+    "#grunge": "grunge, ripped, plaid, combat boots",
+    "#leatherjacket": "leather jacket, moto, biker",
+    "#powerdressing": "power dressing, fierce confident statement, suits",
+    "#statementpiece": "statement piece, bold accessory, eye catching",
+    "#workwear": "workwear, office outfit, business casual",
+    "#officestyle": "office style, professional, blazer",
+    "#tailoring": "tailored suit, blazer, trousers",
+    "#denim": "denim, jeans, jean jacket",
+    "#summerstyle": "summer outfit, sundress, shorts, beach",
+    "#beachwear": "beachwear, swimwear, resort",
+    "#resortwear": "resort vacation holiday outfit, linen",
+    "#springfashion": "spring fashion, light layers, florals",
+    "#fallfashion": "fall autumn fashion, layers, earth tones",
+    "#sweaterweather": "sweater weather, cozy knits, autumn",
+    "#winterfashion": "winter fashion, coats, boots, warm layers",
+    "#cozy": "cozy comfortable knitwear, loungewear",
+    "#accessories": "accessories, jewelry, bags, belts",
+    "#shoegame": "shoes, heels, sneakers, footwear",
+    "#handbag": "handbag, purse, designer bag",
+    "#sustainablefashion": "sustainable ethical slow fashion",
+    "#modestfashion": "modest fashion, covered, layered",
+    "#plussizefashion": "plus size fashion, curvy style",
+    "#mensfashion": "menswear, men's style",
+    "#weddingguest": "wedding guest outfit, formal daytime",
+    "#bridal": "bride, wedding dress, bridal look",
+    "#parisianstyle": "parisian chic, effortless french style, breton stripes",
+    "#chic": "chic stylish polished look",
+    "#glam": "glamorous, sparkle, sequins, high glam",
+    "#selfie": "mirror selfie, self portrait",
+}
+
+
+class HashtagIndexUnavailable(Exception):
+    """Raised while the hashtag index cannot be built, until BUILD_RETRY_SECONDS have passed."""
+
+
+def vocabulary_fingerprint(hashtags=None, model=EMBEDDING_MODEL):
+    """Returns a hash of a hashtag vocabulary and the embedding model, to detect a stale saved index."""
+    payload = json.dumps([model, sorted((hashtags or HASHTAGS).items())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HashtagIndex:
+    """
+    An in-memory matrix of unit-normalised hashtag embeddings.
+
+    Retrieval is one matrix-vector product followed by a partial sort, so a query
+    against a few hundred tags takes microseconds once its embedding is known.
+
+    Attributes:
+    ----------
+    tags : list
+        Hashtags, one per matrix row.
+    matrix : numpy.ndarray
+        (len(tags), dim) float32 array of unit-length embeddings.
+    fingerprint : str or None
+        `vocabulary_fingerprint` of the vocabulary and model the index was built
+        from, or None if unknown (an index saved without one).
+    """
+    def __init__(self, tags, matrix, fingerprint=None):
+        self.tags = list(tags)
+        self.matrix = _normalize(np.asarray(matrix, dtype=np.float32))
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, genai, hashtags=None, model=EMBEDDING_MODEL):
+        """
+        Embeds a hashtag vocabulary.
+
+        Parameters:
+        ----------
+        genai : GenAI
+            Client used for the embedding requests.
+        hashtags : dict, optional
+            Hashtag to description; defaults to HASHTAGS.
+        model : str, optional
+            Embedding model (default is EMBEDDING_MODEL).
+
+        Returns:
+        -------
+        HashtagIndex
+        """
+        hashtags = hashtags or HASHTAGS
+        texts = [f"{tag.lstrip('#')}: {description}" for tag, description in hashtags.items()]
+        return cls(hashtags.keys(), genai.get_embeddings(texts, model=model),
+                   vocabulary_fingerprint(hashtags, model))
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index saved with `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else None
+            return cls(data["tags"].tolist(), data["matrix"], fingerprint)
+
+    def save(self, path):
+        """Saves the index as a compressed .npz file."""
+        np.savez_compressed(path, tags=np.array(self.tags), matrix=self.matrix,
+                            fingerprint=np.array(self.fingerprint or ""))
+
+    def top_k(self, query_embedding, k=5):
+        """
+        Returns the k hashtags most similar to a query embedding.
+
+        Parameters:
+        ----------
+        query_embedding : list or numpy.ndarray
+            Embedding of the query text (same model as the index).
+        k : int, optional
+            Number of hashtags to return (default is 5).
+
+        Returns:
+        -------
+        list
+            (hashtag, cosine similarity) tuples, most similar first.
+        """
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        similarities = self.matrix @ query
+        k = min(k, len(self.tags))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(self.tags[i], float(similarities[i])) for i in top]
+
+
+def _normalize(vectors):
+    """Scales vectors (rows, or a single vector) to unit length."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+_index = None
+_index_failed_at = None
+_index_lock = threading.Lock()
+
+
+def get_hashtag_index(genai, path=None):
+    """
+    Returns the process-wide HashtagIndex.
+
+    Loaded from `path` ($HASHTAG_INDEX or DEFAULT_INDEX_PATH) if it was saved for the
+    current HASHTAGS and EMBEDDING_MODEL; otherwise built with the embedding API and
+    saved there for later runs. Callers arriving during a build wait for it.
+
+    Raises:
+    ------
+    HashtagIndexUnavailable
+        If a build failed less than BUILD_RETRY_SECONDS ago.
+    """
+    global _index, _index_failed_at
+    with _index_lock:
+        if _index is not None:
+            return _index
+        if _index_failed_at is not None and time.monotonic() - _index_failed_at < BUILD_RETRY_SECONDS:
+            raise HashtagIndexUnavailable("Hashtag index build failed recently; using default hashtags")
+        path = path or os.getenv("HASHTAG_INDEX", DEFAULT_INDEX_PATH)
+        try:
+            index = HashtagIndex.load(path) if os.path.exists(path) else None
+            if index is None or index.fingerprint != vocabulary_fingerprint():
+                index = HashtagIndex.build(genai)
+                index.save(path)
+        except Exception:
+            _index_failed_at = time.monotonic()
+            raise
+        _index, _index_failed_at = index, None
+        return _index
+
+
+def start_hashtag_index(genai, path=None):
+    """
+    Loads or builds the hashtag index on a background thread, so that the first
+    caption request does not pay for it. Failures are left to `get_hashtag_index`.
+
+    Returns:
+    -------
+    threading.Thread
+    """
+    def load():
+        try:
+            get_hashtag_index(genai, path)
+        except Exception as e:
+            print(f"Error building hashtag index: {e}")
+
+    thread = threading.Thread(target=load, name="hashtag-index", daemon=True)
+    thread.start()
+    return thread
+
+
+def embed_query(genai, text, model=EMBEDDING_MODEL):
+    """Returns the embedding of a query text, cached for repeated style descriptions."""
+    return _embed_query_cached(genai, text.strip().lower(), model)
+
+
+@lru_cache(maxsize=1024)
+def _embed_query_cached(genai, text, model):
+    return tuple(genai.get_embedding(text, model=model))
@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Default database location; override with the HISTORY_DB environment variable
+DEFAULT_DB_PATH = "history.db"
+
+# Seconds a writer waits for another connection's lock before giving up
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    image_hash TEXT NOT NULL,
+    style_description TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL,
+    result TEXT NOT NULL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    latency_ms REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_lookup ON results (kind, image_hash, style_description, model, created_at);
+-- NOCASE so the history page's case-insensitive prefix filter (LIKE 'x%') can use it
+CREATE INDEX IF NOT EXISTS idx_results_style ON results (style_description COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_results_model ON results (model);
+CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at);
+"""
+
+
+def hash_image_file(image_path):
+    """Returns the SHA-256 hex digest of an image file's bytes."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as image_file:
+        for block in iter(lambda: image_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultStore:
+    """
+    SQLite store for caption and mood results, used as a durable cache and for history.
+
+    The database runs in WAL mode so readers never block the writer, and every
+    connection waits up to BUSY_TIMEOUT seconds for locks, so several Streamlit
+    worker processes (and threads, each with its own connection) can write to the
+    same file.
+
+    Attributes:
+    ----------
+    db_path : str
+        Path to the SQLite database file.
+    """
+    def __init__(self, db_path=None):
+        """
+        Parameters:
+        ----------
+        db_path : str, optional
+            Database file; defaults to $HISTORY_DB or DEFAULT_DB_PATH.
+        """
+        self.db_path = db_path or os.getenv("HISTORY_DB", DEFAULT_DB_PATH)
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def add(self, kind, image_hash, result, model, style_description="", usage=None, latency_ms=None):
+        """
+        Stores a result.
+
+        Parameters:
+        ----------
+        kind : str
+            'caption' or 'mood'.
+        image_hash : str
+            SHA-256 of the image bytes.
+        result : object
+            The result; stored as JSON.
+        model : str
+            The model that produced it.
+        style_description : str, optional
+            The style description used for captions (default is '').
+        usage : dict, optional
+            Token usage with keys 'prompt_tokens', 'completion_tokens', 'total_tokens'.
+        latency_ms : float, optional
+            How long the API call took.
+
+        Returns:
+        -------
+        int
+            The new row ID.
+        """
+        usage = usage or {}
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO results (kind, image_hash, style_description, model, result, prompt_tokens, "
+                "completion_tokens, total_tokens, latency_ms, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, image_hash, style_description or "", model, json.dumps(result),
+                 usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens"),
+                 latency_ms, time.time()),
+            )
+            return cursor.lastrowid
+
+    def lookup(self, kind, image_hash, model, style_description="", max_age=None):
+        """
+        Returns the most recent stored result for the same image and inputs, or None.
+
+        Parameters:
+        ----------
+        kind : str
+            'caption' or 'mood'.
+        image_hash : str
+            SHA-256 of the image bytes.
+        model : str
+            The model that produced it.
+        style_description : str, optional
+            The style description used for captions (default is '').
+        max_age : float, optional
+            Ignore results older than this many seconds.
+        """
+        query = ("SELECT result FROM results WHERE kind = ? AND image_hash = ? AND style_description = ? "
+                 "AND model = ?")
+        params = [kind, image_hash, style_description or "", model]
+        if max_age is not None:
+            query += " AND created_at >= ?"
+            params.append(time.time() - max_age)
+        query += " ORDER BY created_at DESC LIMIT 1"
+        row = self._connect().execute(query, params).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def page(self, page=0, page_size=20, kind=None, style_description=None, model=None):
+        """
+        Returns one page of results, newest first.
+
+        Parameters:
+        ----------
+        page : int, optional
+            Zero-based page number (default is 0).
+        page_size : int, optional
+            Rows per page (default is 20).
+        kind, style_description, model : str, optional
+            Filters; style_description matches as a case-insensitive prefix, which
+            the style index can serve (a substring match would scan the table).
+
+        Returns:
+        -------
+        tuple
+            (rows, total) where rows is a list of dicts and total is the number of
+            matching rows across all pages.
+        """
+        clause, params = self._filters(kind, style_description, model)
+        connection = self._connect()
+        total = connection.execute(f"SELECT COUNT(*) FROM results{clause}", params).fetchone()[0]
+        rows = connection.execute(
+            f"SELECT * FROM results{clause} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            params + [page_size, page * page_size],
+        ).fetchall()
+
+        results = []
+        for row in rows:
+            entry = dict(row)
+            entry["result"] = json.loads(entry["result"])
+            results.append(entry)
+        return results, total
+
+    def count(self, kind=None, style_description=None, model=None):
+        """Returns the number of stored results matching the filters of `page`."""
+        clause, params = self._filters(kind, style_description, model)
+        return self._connect().execute(f"SELECT COUNT(*) FROM results{clause}", params).fetchone()[0]
+
+    def _filters(self, kind, style_description, model):
+        """Builds the WHERE clause and parameters for the `page` filters."""
+        where, params = [], []
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if style_description:
+            where.append("style_description LIKE ? ESCAPE '\\'")
+            escaped = re.sub(r"([\\%_])", r"\\\1", style_description)
+            params.append(f"{escaped}%")
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        return clause, params
+
+    def models(self):
+        """Returns the distinct models that have stored results."""
+        rows = self._connect().execute("SELECT DISTINCT model FROM results ORDER BY model").fetchall()
+        return [row[0] for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """Returns the process-wide ResultStore, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore()
+        return _store
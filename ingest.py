@@ -0,0 +1,238 @@
+"""
+Bulk text extraction for folders of PDF and DOCX documents (brand guides, product sheets).
+
+    python ingest.py docs/ --output ingested --workers 8
+
+Files are extracted in parallel worker processes and results are reported as
+each file finishes. A manifest of content hashes in the output directory lets a
+re-run skip every file that hasn't changed since the last one.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import zipfile
+import argparse
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import PyPDF2
+from docx import Document
+
+DOCUMENT_EXTENSIONS = (".pdf", ".docx")
+MANIFEST_NAME = "manifest.json"
+
+# Result statuses
+EXTRACTED = "extracted"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+def pdf_text(source):
+    """Returns (text, page count) of a PDF given a path or file object."""
+    reader = PyPDF2.PdfReader(source)
+    pages = [page.extract_text() or "" for page in reader.pages]
+    return "".join(pages), len(pages)
+
+
+def docx_text(source):
+    """
+    Returns (text, page count) of a DOCX given a path or file object.
+
+    DOCX files have no fixed pages; the count is the one Word saved in
+    docProps/app.xml, or 1 if it is missing.
+    """
+    text = "\n".join(paragraph.text for paragraph in Document(source).paragraphs)
+    pages = 1
+    try:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        with zipfile.ZipFile(source) as archive:
+            match = re.search(rb"<Pages>(\d+)</Pages>", archive.read("docProps/app.xml"))
+            if match:
+                pages = max(1, int(match.group(1)))
+    except (KeyError, zipfile.BadZipFile):
+        pass
+    return text, pages
+
+
+def extract_document(path, known_digest=None):
+    """
+    Hashes and extracts one document; runs in a worker process.
+
+    Parameters:
+    ----------
+    path : str
+        PDF or DOCX file.
+    known_digest : str, optional
+        SHA-256 recorded for this path by a previous run. If the content still
+        matches, extraction is skipped.
+
+    Returns:
+    -------
+    dict
+        Keys 'path', 'status', 'digest', 'pages', 'text', 'seconds', 'error'.
+    """
+    start = time.perf_counter()
+    result = {"path": path, "status": FAILED, "digest": None, "pages": 0, "text": None, "seconds": 0.0,
+              "error": None}
+    try:
+        with open(path, "rb") as document_file:
+            data = document_file.read()
+        result["digest"] = hashlib.sha256(data).hexdigest()
+        if result["digest"] == known_digest:
+            result["status"] = UNCHANGED
+        else:
+            extract = pdf_text if path.lower().endswith(".pdf") else docx_text
+            result["text"], result["pages"] = extract(BytesIO(data))
+            result["status"] = EXTRACTED
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def find_documents(folder):
+    """Returns the PDF and DOCX files under a folder, recursively, sorted by path."""
+    paths = []
+    for root, _, names in os.walk(folder):
+        paths.extend(os.path.join(root, name) for name in names
+                     if name.lower().endswith(DOCUMENT_EXTENSIONS) and not name.startswith("~$"))
+    return sorted(paths)
+
+
+class DocumentIngester:
+    """
+    Extracts text from many documents on a process pool, skipping unchanged files.
+
+    Extracted text is written to `<output_dir>/texts/<sha256>.txt` and the manifest
+    (`<output_dir>/manifest.json`) maps each absolute path to its size, modification
+    time, content hash and page count. A file whose size and modification time match
+    the manifest is skipped without being read; one whose metadata changed is hashed
+    in a worker and only extracted if its content changed.
+
+    Attributes:
+    ----------
+    output_dir : str
+        Directory holding the manifest and extracted texts.
+    max_workers : int or None
+        Worker processes (None for one per CPU).
+    manifest : dict
+        Absolute path -> {'size', 'mtime_ns', 'digest', 'pages'}.
+    stats : dict
+        Counters of the last `ingest` run: 'files', 'extracted', 'unchanged',
+        'failed', 'pages', 'seconds' and 'pages_per_second'.
+    """
+    def __init__(self, output_dir="ingested", max_workers=None):
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        os.makedirs(os.path.join(output_dir, "texts"), exist_ok=True)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as manifest_file:
+                self.manifest = json.load(manifest_file)
+        self.stats = {}
+
+    def text_path(self, digest):
+        return os.path.join(self.output_dir, "texts", f"{digest}.txt")
+
+    def text(self, path):
+        """Returns the stored text of an ingested document, or None if it has none."""
+        entry = self.manifest.get(os.path.abspath(path))
+        if entry is None or not os.path.exists(self.text_path(entry["digest"])):
+            return None
+        with open(self.text_path(entry["digest"]), encoding="utf-8") as text_file:
+            return text_file.read()
+
+    def ingest(self, paths, force=False):
+        """
+        Extracts documents, yielding a result for each as soon as it is known.
+
+        Parameters:
+        ----------
+        paths : str or list
+            A folder (searched recursively) or a list of document paths.
+        force : bool, optional
+            Re-extract every file even if unchanged (default is False).
+
+        Yields:
+        ------
+        dict
+            Per file, as in `extract_document`; 'text' is None for unchanged files
+            (see `text`).
+        """
+        if isinstance(paths, str):
+            paths = find_documents(paths)
+        paths = [os.path.abspath(path) for path in paths]
+        self.stats = {"files": len(paths), EXTRACTED: 0, UNCHANGED: 0, FAILED: 0, "pages": 0,
+                      "seconds": 0.0, "pages_per_second": 0.0}
+        start = time.perf_counter()
+
+        to_check = []
+        for path in paths:
+            entry = None if force else self.manifest.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                yield self._record({"path": path, "status": FAILED, "digest": None, "pages": 0, "text": None,
+                                    "seconds": 0.0, "error": str(e)}, None)
+                continue
+            # Same size and modification time as last run: trust the manifest without reading the file
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                yield self._record({"path": path, "status": UNCHANGED, "digest": entry["digest"],
+                                    "pages": entry["pages"], "text": None, "seconds": 0.0, "error": None}, stat)
+            else:
+                to_check.append((path, stat, entry["digest"] if entry else None))
+
+        try:
+            if to_check:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    futures = {executor.submit(extract_document, path, digest): stat
+                               for path, stat, digest in to_check}
+                    for future in as_completed(futures):
+                        yield self._record(future.result(), futures[future])
+        finally:
+            self.stats["seconds"] = time.perf_counter() - start
+            if self.stats["seconds"] > 0:
+                self.stats["pages_per_second"] = self.stats["pages"] / self.stats["seconds"]
+            self.save_manifest()
+
+    def _record(self, result, stat):
+        """Stores a worker result in the manifest and output directory and updates stats."""
+        self.stats[result["status"]] += 1
+        if result["status"] == EXTRACTED:
+            with open(self.text_path(result["digest"]), "w", encoding="utf-8") as text_file:
+                text_file.write(result["text"])
+            self.stats["pages"] += result["pages"]
+        if result["status"] == UNCHANGED and result["path"] in self.manifest:
+            result["pages"] = self.manifest[result["path"]]["pages"]
+        if result["status"] != FAILED:
+            self.manifest[result["path"]] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                             "digest": result["digest"], "pages": result["pages"]}
+        return result
+
+    def save_manifest(self):
+        """Writes the manifest atomically, so an interrupted run never leaves it half written."""
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=1)
+        os.replace(temp_path, self.manifest_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract text from a folder of PDF and DOCX files")
+    parser.add_argument("folder")
+    parser.add_argument("--output", default="ingested", help="directory for texts and the manifest")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-extract unchanged files too")
+    args = parser.parse_args()
+
+    ingester = DocumentIngester(args.output, args.workers)
+    for result in ingester.ingest(args.folder, force=args.force):
+        detail = result["error"] if result["status"] == FAILED else f"{result['pages']} pages"
+        print(f"{result['status']:>9}  {result['path']}  ({detail})", flush=True)
+    stats = ingester.stats
+    print(f"{stats['files']} files: {stats[EXTRACTED]} extracted, {stats[UNCHANGED]} unchanged, "
+          f"{stats[FAILED]} failed; {stats['pages']} pages in {stats['seconds']:.1f}s "
+          f"({stats['pages_per_second']:.1f} pages/s)")
@@ -0,0 +1,332 @@
+import os
+import time
+import uuid
+import heapq
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, CancelledError, TimeoutError
+from scheduler import PRIORITY_CLASSES, scheduling, current_scheduling
+from profiling import profile_request
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """
+    A unit of background work tracked by a JobQueue.
+
+    Attributes:
+    ----------
+    id : str
+        Unique job identifier.
+    name : str
+        Human-readable label shown in the UI.
+    status : str
+        One of 'pending', 'running', 'done', 'failed' or 'cancelled'.
+    result : object
+        The return value of the job once it is done.
+    error : str
+        The error message if the job failed.
+    submitted_at, started_at, finished_at : float
+        Wall-clock timestamps (seconds since the epoch), None until reached.
+    metadata : dict
+        Arbitrary caller data stored alongside the job (e.g. the style description).
+    priority : str
+        Priority class the job runs in ('interactive', 'background' or 'batch').
+    """
+    def __init__(self, name, metadata=None, priority=PRIORITY_CLASSES[0]):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.priority = priority
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.metadata = metadata or {}
+        self.future = None
+
+    @property
+    def finished(self):
+        """True once the job is done, failed or cancelled."""
+        return self.status in FINISHED_STATES
+
+    @property
+    def elapsed(self):
+        """Seconds since the job started running (or its total run time once finished)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobQueue:
+    """
+    Runs functions on a worker pool and tracks them by job ID.
+
+    Jobs outlive the Streamlit script run that submitted them, so a rerun or a page
+    switch does not discard in-flight work; pages keep the job IDs in
+    `st.session_state` and poll `get()` for completion. Finished jobs are retained for
+    `retention_seconds`, up to `max_retained` jobs, and then pruned.
+
+    With the thread executor, queued jobs start in priority order (interactive,
+    then background, then batch; first come, first served within a class), and each
+    job runs in its priority class so its API calls are scheduled accordingly.
+    """
+    def __init__(self, max_workers=4, executor='thread', retention_seconds=3600, max_retained=500):
+        """
+        Parameters:
+        ----------
+        max_workers : int, optional
+            Size of the worker pool (default is 4).
+        executor : str, optional
+            'thread' (default) or 'process'. With 'process', functions and their
+            arguments must be picklable.
+        retention_seconds : float, optional
+            How long finished jobs are kept (default is 3600).
+        max_retained : int, optional
+            Maximum number of finished jobs kept (default is 500).
+        """
+        if executor == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        elif executor == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            raise ValueError(f"Unknown executor type: {executor}")
+        self.executor_type = executor
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Jobs waiting for a worker thread: (class rank, sequence, job, fn, args, kwargs, context)
+        self._pending = []
+        self._sequence = 0
+
+    def submit(self, fn, *args, name=None, metadata=None, priority=None, owner=None, **kwargs):
+        """
+        Queues `fn(*args, **kwargs)` and returns its job ID.
+
+        Parameters:
+        ----------
+        fn : callable
+            The function to run.
+        name : str, optional
+            Label for the job (defaults to the function name).
+        metadata : dict, optional
+            Caller data stored on the job.
+        priority : str, optional
+            'interactive', 'background' or 'batch'; defaults to the caller's current
+            priority class (interactive unless set with `scheduler.scheduling`).
+        owner : hashable, optional
+            Fairness owner of the job's API calls, e.g. the browser session (see
+            `session_owner`); defaults to the caller's current owner.
+
+        Returns:
+        -------
+        str
+            The job ID.
+        """
+        self._prune()
+        if owner is None:
+            owner = current_scheduling()[1]
+        if priority is None:
+            priority = current_scheduling()[0]
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        job = Job(name or getattr(fn, "__name__", "job"), metadata, priority)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        if self.executor_type == 'thread':
+            # Run the job in the submitter's context, under its priority class
+            with scheduling(priority, owner):
+                context = contextvars.copy_context()
+            job.future = Future()
+            with self._lock:
+                heapq.heappush(self._pending, (PRIORITY_CLASSES.index(priority), self._sequence,
+                                               job, fn, args, kwargs, context))
+                self._sequence += 1
+            # One worker task per job; each runs whichever queued job ranks first
+            self._executor.submit(self._run_next)
+        else:
+            # Process workers cannot update the Job object, so track state from here.
+            job.future = self._executor.submit(fn, *args, **kwargs)
+            job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job.id
+
+    def _run_next(self):
+        """Runs the highest-priority queued job on this worker thread."""
+        with self._lock:
+            _, _, job, fn, args, kwargs, context = heapq.heappop(self._pending)
+        if not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            context.run(self._run, job, fn, args, kwargs)
+        finally:
+            job.future.set_result(None)
+
+    def _run(self, job, fn, args, kwargs):
+        """Runs a job on a worker thread, recording its state transitions."""
+        if job.status == CANCELLED:
+            return None
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            with profile_request(job.name):
+                result = fn(*args, **kwargs)
+        except Exception as e:
+            if job.status != CANCELLED:
+                job.error = str(e)
+                job.status = FAILED
+        else:
+            # A job cancelled while running keeps its cancelled status and drops the result.
+            if job.status != CANCELLED:
+                job.result = result
+                job.status = DONE
+        job.finished_at = time.time()
+        return None
+
+    def _finish(self, job, future):
+        """Records the outcome of a job that ran in a worker process."""
+        job.finished_at = time.time()
+        if job.started_at is None:
+            job.started_at = job.submitted_at
+        if job.status == CANCELLED:
+            return
+        try:
+            job.result = future.result()
+            job.status = DONE
+        except CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+
+    def get(self, job_id):
+        """Returns the Job for `job_id`, or None if it is unknown or was pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """Returns the status string of a job, or None if it is unknown."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if self.executor_type == 'process' and job.status == PENDING and job.future.running():
+            job.status = RUNNING
+            job.started_at = time.time()
+        return job.status
+
+    def result(self, job_id, timeout=None):
+        """
+        Blocks until a job finishes and returns its result.
+
+        Raises:
+        ------
+        KeyError
+            If the job is unknown.
+        RuntimeError
+            If the job failed or was cancelled.
+        TimeoutError
+            If the job does not finish within `timeout` seconds.
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        try:
+            job.future.result(timeout=timeout)
+        except TimeoutError:
+            raise
+        except Exception:
+            # Failures and cancellation are reflected in job.status below.
+            pass
+        if job.status == DONE:
+            return job.result
+        raise RuntimeError(f"Job {job_id} {job.status}: {job.error or ''}".strip())
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Pending jobs are removed from the pool; running jobs keep
+        running to completion but their result is discarded.
+
+        Returns:
+        -------
+        bool
+            True if the job was cancelled, False if it had already finished or is unknown.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.future.cancel()
+        job.status = CANCELLED
+        job.finished_at = time.time()
+        return True
+
+    def list_jobs(self, job_ids=None):
+        """Returns jobs (all, or those in `job_ids`) ordered by submission time."""
+        with self._lock:
+            if job_ids is None:
+                jobs = list(self._jobs.values())
+            else:
+                jobs = [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+    def _prune(self):
+        """Drops finished jobs past their retention period or beyond `max_retained`."""
+        now = time.time()
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.finished),
+                              key=lambda job: job.finished_at or 0)
+            expired = [job for job in finished if now - (job.finished_at or now) > self.retention_seconds]
+            overflow = finished[:max(0, len(finished) - self.max_retained)]
+            for job in expired + overflow:
+                self._jobs.pop(job.id, None)
+
+    def shutdown(self, wait=True):
+        """Stops the worker pool."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Returns the process-wide JobQueue shared by all Streamlit sessions.
+
+    Created on first use with a thread pool sized by the JOB_WORKERS environment
+    variable (default 4).
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(max_workers=int(os.getenv('JOB_WORKERS', '4')))
+        return _job_queue
+
+
+def session_owner(session_state):
+    """
+    Returns the scheduling owner of a Streamlit session.
+
+    Jobs submitted with it are served round-robin against other sessions' jobs of
+    the same priority class, so one user's bulk run can't hold up everyone else.
+
+    Parameters:
+    ----------
+    session_state : MutableMapping
+        The session's `st.session_state`; the owner ID is stored there on first use.
+
+    Returns:
+    -------
+    str
+        A random ID that stays the same for the life of the session.
+    """
+    return session_state.setdefault("scheduling_owner", uuid.uuid4().hex)
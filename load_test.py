@@ -0,0 +1,237 @@
+"""
+Load test: how many concurrent sessions can one app process sustain?
+
+Simulates N sessions, each alternating the caption and mood flows the pages run,
+against mock_openai_server.py with configurable latency, and reports throughput,
+latency percentiles, memory and thread counts for each concurrency level.
+
+    python load_test.py --levels 1 4 16 64 --duration 20 --latency 1.5 --jitter 1.0
+
+By default requests go through the background job queue exactly as the pages
+submit them, so JOB_WORKERS is part of what is measured; `--mode direct` calls
+the utils functions from the session threads instead. History and hashtag index
+files are written to a temporary directory, never to the app's own.
+`--profile timers|cprofile` records where local time goes (see profiling.py) and
+prints the report after the last level.
+"""
+import os
+import io
+import sys
+import time
+import uuid
+import socket
+import tempfile
+import argparse
+import threading
+import subprocess
+import numpy as np
+from PIL import Image
+
+try:
+    import psutil
+except ImportError:  # Optional: fall back to /proc or getrusage for memory
+    psutil = None
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1e6
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_backend(latency, jitter, error_rate):
+    """Starts the mock API in a subprocess, so its threads don't count against the app."""
+    port = free_port()
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_openai_server.py")
+    process = subprocess.Popen([sys.executable, script, "--port", str(port), "--latency", str(latency),
+                                "--jitter", str(jitter), "--error-rate", str(error_rate)],
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Mock API did not start")
+
+
+def sample_images(count=16, size=(768, 1024)):
+    """JPEG bytes of synthetic outfits in different colours."""
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, size=(size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels).resize(size, Image.NEAREST)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+STYLES = ["cozy autumn layers", "minimalist office chic", "edgy street style", "romantic garden party",
+          "elegant evening wear", "casual weekend denim"]
+
+
+class LevelStats:
+    """Latencies and errors recorded by the sessions of one concurrency level."""
+    def __init__(self):
+        self.latencies = {"caption": [], "mood": []}
+        self.errors = 0
+        self.peak_threads = threading.active_count()
+        self.peak_rss_mb = current_rss_mb()
+        self.lock = threading.Lock()
+
+    def record(self, flow, seconds, ok):
+        with self.lock:
+            self.latencies[flow].append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def sample_resources(self):
+        with self.lock:
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+
+
+def run_session(session_id, stop, stats, images, mode, think_time, run_id):
+    """
+    One simulated user: alternate caption and mood requests until stopped.
+
+    `run_id` is unique per level and run, so no request repeats one made earlier
+    (at this level, a previous level or a previous run sharing the history DB)
+    and every request reaches the API instead of the results cache.
+    """
+    import utils
+    from jobs import get_job_queue
+
+    budget = utils.new_session_budget()
+    iteration = 0
+    while not stop.is_set():
+        image = images[(session_id + iteration) % len(images)]
+        flow = "caption" if iteration % 2 == 0 else "mood"
+        if flow == "caption":
+            # A distinct style per request keeps the results cache from answering it
+            style = f"{STYLES[iteration % len(STYLES)]} #{run_id}-{session_id}-{iteration}"
+            fn, args = utils.get_instagram_caption_from_bytes, (image, style, budget, False)
+        else:
+            # Vary the bytes so every mood request misses the cache as well
+            suffix = f"{run_id}-{session_id}-{iteration}".encode()
+            fn, args = utils.get_outfit_mood_scores_from_bytes, (image + suffix, budget)
+
+        start = time.perf_counter()
+        ok = True
+        try:
+            if mode == "jobs":
+                queue = get_job_queue()
+                job_id = queue.submit(fn, *args, name=f"load-{flow}")
+                queue.result(job_id, timeout=300)
+                ok = queue.status(job_id) == "done"
+            else:
+                fn(*args)
+        except Exception:
+            ok = False
+        stats.record(flow, time.perf_counter() - start, ok)
+
+        iteration += 1
+        if think_time:
+            stop.wait(think_time)
+
+
+def run_level(sessions, duration, images, mode, think_time):
+    """Runs `sessions` concurrent sessions for `duration` seconds and returns their stats."""
+    stats = LevelStats()
+    stop = threading.Event()
+    run_id = f"{sessions}-{uuid.uuid4().hex[:8]}"
+    threads = [threading.Thread(target=run_session, args=(i, stop, stats, images, mode, think_time, run_id),
+                                daemon=True) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while time.perf_counter() - start < duration:
+        stats.sample_resources()
+        time.sleep(0.25)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def report_row(sessions, stats):
+    latencies = np.array(stats.latencies["caption"] + stats.latencies["mood"])
+    count = len(latencies)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if count else (float("nan"),) * 3
+    return (f"{sessions:>8} {count:>8} {stats.errors:>6} {count / stats.elapsed:>8.2f} "
+            f"{p50:>7.2f} {p90:>7.2f} {p99:>7.2f} {stats.peak_rss_mb:>8.0f} {stats.peak_threads:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-session load test")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="concurrent session counts to test")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per level")
+    parser.add_argument("--latency", type=float, default=1.0, help="mock API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="extra random mock latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock API calls that fail")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds each session waits between requests")
+    parser.add_argument("--mode", choices=["jobs", "direct"], default="jobs",
+                        help="submit through the background job queue (as the pages do) or call utils directly")
+    parser.add_argument("--base-url", default=None, help="use an already running mock API instead of starting one")
+    parser.add_argument("--profile", choices=["timers", "cprofile"], default=None,
+                        help="profile each request into --profile-dir and print a report at the end")
+    parser.add_argument("--profile-dir", default=None, help="profile output directory (default: in the temp workdir)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    backend = None
+    if args.base_url is None:
+        backend, args.base_url = start_backend(args.latency, args.jitter, args.error_rate)
+
+    # utils creates its GenAI at import, so the environment must be set first
+    os.environ.update(OPENAI_BASE_URL=args.base_url, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "load-test"),
+                      HISTORY_DB=os.path.join(workdir, "history.db"),
+                      HASHTAG_INDEX=os.path.join(workdir, "hashtag_index.npz"),
+                      OPENAI_WARM_UP="0")
+    import utils
+    import profiling
+    from hashtag_index import get_hashtag_index
+    if args.profile:
+        args.profile_dir = args.profile_dir or os.path.join(workdir, "profiles")
+        profiling.enable(args.profile, args.profile_dir)
+    get_hashtag_index(utils.genai)
+
+    images = sample_images()
+    print(f"mode={args.mode} latency={args.latency}s jitter={args.jitter}s duration={args.duration}s/level "
+          f"JOB_WORKERS={os.getenv('JOB_WORKERS', 'default')}")
+    print(f"{'sessions':>8} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} "
+          f"{'rss MB':>8} {'threads':>7}")
+    try:
+        for sessions in args.levels:
+            print(report_row(sessions, run_level(sessions, args.duration, images, args.mode, args.think_time)),
+                  flush=True)
+    finally:
+        if backend is not None:
+            backend.terminate()
+    if args.profile:
+        print(f"\nProfiles in {args.profile_dir}\n")
+        profiling.report(args.profile_dir)
+
+
+if __name__ == "__main__":
+    main()
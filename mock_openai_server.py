@@ -0,0 +1,323 @@
+"""
+A local stand-in for the parts of the OpenAI API this app uses, for offline testing.
+
+Serves chat completions, embeddings, model listing, file uploads and the Batch API with canned,
+deterministic responses and configurable latency. Point a GenAI at it with
+`GenAI(api_key, base_url="http://127.0.0.1:8765/v1")`.
+
+Run it from the command line:
+
+    python mock_openai_server.py --port 8765 --latency 0.5
+
+or start it in-process with `start_mock_server()`.
+"""
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOOD_CATEGORIES = ["Fierce", "Minimalist", "Whimsical", "Elegant", "Casual", "Romantic"]
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+def _now():
+    return int(time.time())
+
+
+def _seed(text):
+    """Stable integer seed derived from request text."""
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+
+
+CAPTIONS = [
+    "Serving looks and good vibes only ✨ Which piece is your favorite?",
+    "Dressed for the life I'm manifesting 💫 Tell me where you'd wear this!",
+    "Confidence is the best accessory 🔥 Double tap if you agree!",
+    "Main character energy, every single day 🌟 What's your go-to outfit?",
+]
+
+
+def fake_chat_content(body, choice=0):
+    """
+    Returns a deterministic reply for a chat completion request body.
+
+    Mood prompts (which ask for JSON mood scores) get valid JSON, with one entry per
+    image for multi-image prompts; everything else gets a short caption. `choice`
+    varies the caption between the n choices of one request.
+    """
+    text_parts, images = [], 0
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            text_parts.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                text_parts.append(part.get("text", ""))
+            elif part.get("type") == "image_url":
+                images += 1
+    prompt = "\n".join(text_parts)
+    rng = random.Random(_seed(prompt + str(images)))
+
+    def scores():
+        return {mood: rng.randint(5, 95) for mood in MOOD_CATEGORIES}
+
+    if '"results"' in prompt:
+        return json.dumps({"results": [{"image": i + 1, "scores": scores()} for i in range(images)]})
+    if "JSON" in prompt and "Fierce" in prompt:
+        return json.dumps(scores())
+    return CAPTIONS[(rng.randrange(len(CAPTIONS)) + choice) % len(CAPTIONS)]
+
+
+def fake_chat_completion(body):
+    """Builds a chat.completion object for a request body."""
+    choices = [{"index": i, "finish_reason": "stop", "logprobs": None,
+                "message": {"role": "assistant", "content": fake_chat_content(body, choice=i)}}
+               for i in range(body.get("n") or 1)]
+    prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+    completion_tokens = sum(len(choice["message"]["content"]) // 4 for choice in choices)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": _now(),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": choices,
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def fake_embeddings(body):
+    """Builds an embeddings response with deterministic unit vectors."""
+    inputs = body.get("input")
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    data = []
+    for i, text in enumerate(inputs):
+        rng = random.Random(_seed(text))
+        vector = [rng.gauss(0, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+        norm = sum(value * value for value in vector) ** 0.5
+        data.append({"object": "embedding", "index": i, "embedding": [value / norm for value in vector]})
+    return {"object": "list", "data": data, "model": body.get("model"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+
+class MockOpenAIState:
+    """Files and batches held by the mock server."""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, batch_delay=0.5):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.batch_delay = batch_delay
+        self.files = {}
+        self.batches = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def sleep(self):
+        """Simulates upstream latency."""
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def add_file(self, filename, content, purpose):
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": _now(),
+            "filename": filename, "purpose": purpose, "status": "processed", "content": content,
+        }
+        return file_id
+
+    def public_file(self, file_id):
+        return {key: value for key, value in self.files[file_id].items() if key != "content"}
+
+    def create_batch(self, body):
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+            "status": "validating", "created_at": _now(), "output_file_id": None, "error_file_id": None,
+            "metadata": body.get("metadata"), "errors": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        self.batches[batch_id] = batch
+        threading.Thread(target=self._run_batch, args=(batch,), daemon=True).start()
+        return batch
+
+    def _run_batch(self, batch):
+        """Processes a batch's requests in the background."""
+        time.sleep(self.batch_delay / 2)
+        batch["status"] = "in_progress"
+        lines = self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+        outputs, errors = [], []
+        for line in filter(None, lines):
+            request = json.loads(line)
+            batch["request_counts"]["total"] += 1
+            if request.get("url") == "/v1/chat/completions":
+                response = {"status_code": 200, "request_id": uuid.uuid4().hex,
+                            "body": fake_chat_completion(request["body"])}
+                outputs.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"],
+                                "response": response, "error": None})
+                batch["request_counts"]["completed"] += 1
+            else:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request.get("custom_id"),
+                               "response": None,
+                               "error": {"code": "invalid_url", "message": f"Unsupported url {request.get('url')}"}})
+                batch["request_counts"]["failed"] += 1
+        time.sleep(self.batch_delay / 2)
+        if outputs:
+            batch["output_file_id"] = self.add_file(
+                "batch_output.jsonl", "\n".join(json.dumps(o) for o in outputs).encode("utf-8"), "batch_output")
+        if errors:
+            batch["error_file_id"] = self.add_file(
+                "batch_errors.jsonl", "\n".join(json.dumps(e) for e in errors).encode("utf-8"), "batch_output")
+        batch["status"] = "completed"
+        batch["completed_at"] = _now()
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Routes mock API requests; the server's `state` holds files and batches."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_bytes(self, data):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _not_found(self):
+        self._send_json({"error": {"message": f"Unknown route {self.command} {self.path}"}}, status=404)
+
+    def do_POST(self):
+        body = self._read_body()
+        path = self.path.split("?")[0].rstrip("/")
+        with self.state.lock:
+            self.state.requests += 1
+
+        if path.endswith("/chat/completions") or path.endswith("/embeddings"):
+            self.state.sleep()
+            if self.state.error_rate and random.random() < self.state.error_rate:
+                self._send_json({"error": {"message": "Mock upstream error", "type": "server_error"}}, status=500)
+                return
+            request = json.loads(body)
+            if path.endswith("/embeddings"):
+                self._send_json(fake_embeddings(request))
+            else:
+                self._send_json(fake_chat_completion(request))
+        elif path.endswith("/files"):
+            message = BytesParser().parsebytes(
+                b"Content-Type: " + self.headers["Content-Type"].encode("latin-1") + b"\r\n\r\n" + body)
+            fields, filename, content = {}, "upload.jsonl", b""
+            for part in message.get_payload():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename():
+                    filename, content = part.get_filename(), part.get_payload(decode=True)
+                else:
+                    fields[name] = part.get_payload(decode=True).decode("utf-8")
+            file_id = self.state.add_file(filename, content, fields.get("purpose", "batch"))
+            self._send_json(self.state.public_file(file_id))
+        elif path.endswith("/batches"):
+            self._send_json(self.state.create_batch(json.loads(body)))
+        elif re.search(r"/batches/[^/]+/cancel$", path):
+            batch = self.state.batches.get(path.split("/")[-2])
+            if batch is None:
+                return self._not_found()
+            batch["status"] = "cancelled"
+            self._send_json(batch)
+        else:
+            self._not_found()
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/models"):
+            self._send_json({"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "mock"}
+                for model in ("gpt-4o", "gpt-4o-mini", "text-embedding-3-small")]})
+            return
+        match = re.search(r"/files/([^/]+)/content$", path)
+        if match and match.group(1) in self.state.files:
+            self._send_bytes(self.state.files[match.group(1)]["content"])
+            return
+        match = re.search(r"/files/([^/]+)$", path)
+        if match and match.group(1) in self.state.files:
+            self._send_json(self.state.public_file(match.group(1)))
+            return
+        match = re.search(r"/batches/([^/]+)$", path)
+        if match and match.group(1) in self.state.batches:
+            self._send_json(self.state.batches[match.group(1)])
+            return
+        self._not_found()
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, batch_delay=0.5):
+    """
+    Starts the mock server on a background thread.
+
+    Parameters:
+    ----------
+    host : str, optional
+        Interface to bind (default is '127.0.0.1').
+    port : int, optional
+        Port to bind; 0 (default) picks a free port.
+    latency : float, optional
+        Seconds added to every chat/embedding response (default is 0).
+    jitter : float, optional
+        Extra random latency of up to this many seconds (default is 0).
+    error_rate : float, optional
+        Fraction of chat/embedding requests answered with HTTP 500 (default is 0).
+    batch_delay : float, optional
+        Seconds a batch takes to complete (default is 0.5).
+
+    Returns:
+    -------
+    tuple
+        (server, base_url); call `server.shutdown()` to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.state = MockOpenAIState(latency, jitter, error_rate, batch_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--batch-delay", type=float, default=0.5, help="seconds a batch takes to complete")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), MockOpenAIHandler)
+    server.state = MockOpenAIState(args.latency, args.jitter, args.error_rate, args.batch_delay)
+    print(f"Mock OpenAI API listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
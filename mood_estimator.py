@@ -0,0 +1,147 @@
+import cv2
+import numpy as np
+
+# Longest side (in pixels) images are reduced to before feature extraction
+ANALYSIS_SIZE = 256
+
+MOOD_CATEGORIES = ["Fierce", "Minimalist", "Whimsical", "Elegant", "Casual", "Romantic"]
+
+# Linear weights mapping image features (each scaled to 0-1) to mood scores.
+# Hand-tuned heuristics: each row sums to 1 so a mood scores 100 only when every
+# feature it depends on is at its extreme.
+MOOD_WEIGHTS = {
+    "Fierce":     {"contrast": 0.35, "saturation": 0.2, "dark": 0.2, "warm": 0.15, "edges": 0.1},
+    "Minimalist": {"neutral": 0.45, "smooth": 0.3, "narrow_palette": 0.25},
+    "Whimsical":  {"colorfulness": 0.4, "palette": 0.35, "edges": 0.25},
+    "Elegant":    {"contrast": 0.3, "smooth": 0.3, "neutral": 0.2, "muted": 0.2},
+    "Casual":     {"soft_contrast": 0.35, "brightness": 0.3, "light": 0.2, "saturation": 0.15},
+    "Romantic":   {"pink": 0.45, "brightness": 0.3, "soft_contrast": 0.25},
+}
+
+
+def load_image(image):
+    """
+    Loads an image for analysis.
+
+    Parameters:
+    ----------
+    image : str, bytes, memoryview or numpy.ndarray
+        A file path, encoded image bytes, or an already-decoded BGR array.
+
+    Returns:
+    -------
+    numpy.ndarray
+        BGR image no larger than ANALYSIS_SIZE on its longest side.
+    """
+    if isinstance(image, np.ndarray):
+        bgr = image
+    elif isinstance(image, str):
+        bgr = cv2.imread(image, cv2.IMREAD_COLOR)
+    else:
+        bgr = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if bgr is None:
+        raise ValueError("Could not decode image")
+
+    height, width = bgr.shape[:2]
+    scale = ANALYSIS_SIZE / max(height, width)
+    if scale < 1:
+        bgr = cv2.resize(bgr, (max(1, round(width * scale)), max(1, round(height * scale))),
+                         interpolation=cv2.INTER_AREA)
+    return bgr
+
+
+def extract_image_features(image):
+    """
+    Computes colour, contrast and texture features of an image.
+
+    Parameters:
+    ----------
+    image : str, bytes, memoryview or numpy.ndarray
+        See `load_image`.
+
+    Returns:
+    -------
+    dict
+        Feature name to value, each scaled to the range 0-1.
+    """
+    bgr = load_image(image)
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    hue = hsv[..., 0].astype(np.float32)          # 0-179
+    sat = hsv[..., 1].astype(np.float32) / 255.0
+    val = hsv[..., 2].astype(np.float32) / 255.0
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+    # Colourfulness metric of Hasler & Suesstrunk (2003); ~100 is extremely colourful
+    b, g, r = [channel.astype(np.float32) for channel in cv2.split(bgr)]
+    rg = r - g
+    yb = 0.5 * (r + g) - b
+    colorfulness = (np.sqrt(rg.std() ** 2 + yb.std() ** 2)
+                    + 0.3 * np.sqrt(rg.mean() ** 2 + yb.mean() ** 2)) / 100.0
+
+    chromatic = (sat > 0.2) & (val > 0.15)
+    chromatic_share = chromatic.mean()
+
+    # Palette breadth: hue bins (of 12) holding at least 5% of the chromatic pixels
+    if chromatic.any():
+        hist = np.bincount((hue[chromatic] // 15).astype(np.int64), minlength=12)[:12]
+        palette = np.count_nonzero(hist >= 0.05 * hist.sum()) / 12.0
+    else:
+        palette = 0.0
+
+    warm = (chromatic & ((hue < 25) | (hue >= 170))).mean()
+    pink = (chromatic & (hue >= 140) & (hue < 175) & (val > 0.5)).mean()
+    pink += ((hue < 10) | (hue >= 165)).astype(np.float32)[(sat > 0.1) & (sat < 0.45) & (val > 0.7)].sum() / hue.size
+
+    edges = cv2.Canny(gray, 100, 200)
+    edge_density = np.count_nonzero(edges) / edges.size
+
+    contrast = float(gray.std()) / 128.0
+    features = {
+        "saturation": float(sat.mean()),
+        "brightness": float(val.mean()),
+        "contrast": contrast,
+        "soft_contrast": 1.0 - contrast,
+        "colorfulness": float(colorfulness),
+        "muted": 1.0 - float(colorfulness),
+        "palette": palette,
+        "narrow_palette": 1.0 - palette,
+        "neutral": 1.0 - float(chromatic_share),
+        "warm": float(warm) * 2.0,
+        "pink": float(pink) * 3.0,
+        "dark": float((val < 0.25).mean()),
+        "light": 1.0 - float((val < 0.25).mean()),
+        "edges": edge_density / 0.15,
+        "smooth": 1.0 - edge_density / 0.15,
+    }
+    return {name: float(np.clip(value, 0.0, 1.0)) for name, value in features.items()}
+
+
+def estimate_mood_scores(image):
+    """
+    Estimates the six outfit mood scores from image features, without any API call.
+
+    Deterministic and CPU-only; takes a few milliseconds per image. The scores are
+    heuristic and coarser than the model's, which makes them suitable as a fallback,
+    an instant preview, or a pre-filter for bulk jobs.
+
+    Parameters:
+    ----------
+    image : str, bytes, memoryview or numpy.ndarray
+        See `load_image`.
+
+    Returns:
+    -------
+    dict
+        Dictionary with mood labels and confidence percentages (0-100).
+    """
+    features = extract_image_features(image)
+    return {
+        mood: int(round(100 * sum(weight * features[name] for name, weight in weights.items())))
+        for mood, weights in MOOD_WEIGHTS.items()
+    }
+
+
+def score_margin(scores):
+    """Returns the gap between the highest and second-highest mood score."""
+    top, second = sorted(scores.values(), reverse=True)[:2]
+    return top - second
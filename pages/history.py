@@ -0,0 +1,76 @@
+import math
+import datetime
+import streamlit as st
+from history import get_result_store
+
+PAGE_SIZE_OPTIONS = [10, 20, 50]
+
+KIND_LABELS = {
+    "All": None,
+    "Captions": "caption",
+    "Mood Scores": "mood",
+}
+
+def show_history_page():
+    """Results History page: browse stored captions and mood scores"""
+
+    st.markdown("## 🗂️ Results History")
+    st.markdown("Every caption and mood analysis is saved, so you can find it again without paying for it twice.")
+
+    store = get_result_store()
+
+    # Filters
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+    with col1:
+        kind_label = st.selectbox("Type", list(KIND_LABELS.keys()))
+    with col2:
+        style_filter = st.text_input("Style description starts with", placeholder="e.g., 'evening'")
+    with col3:
+        model = st.selectbox("Model", ["All"] + store.models())
+    with col4:
+        page_size = st.selectbox("Per page", PAGE_SIZE_OPTIONS, index=1)
+
+    filters = {
+        "kind": KIND_LABELS[kind_label],
+        "style_description": style_filter or None,
+        "model": None if model == "All" else model,
+    }
+
+    total = store.count(**filters)
+    page_count = max(1, math.ceil(total / page_size))
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    rows, total = store.page(page=page - 1, page_size=page_size, **filters)
+
+    st.caption(f"{total} results · page {page} of {page_count}")
+
+    if not rows:
+        st.info("📭 No results yet. Generate a caption or analyze an outfit to start your history!")
+        return
+
+    for row in rows:
+        created = datetime.datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d %H:%M")
+        if row["kind"] == "caption":
+            title = f"📸 {created} · {row['style_description']}"
+        else:
+            scores = row["result"]
+            top_mood = max(scores.items(), key=lambda x: x[1])
+            title = f"🎭 {created} · {top_mood[0]} ({top_mood[1]}%)"
+
+        with st.expander(title):
+            if row["kind"] == "caption":
+                # Caption variants are stored together as a list
+                captions = row["result"] if isinstance(row["result"], list) else [row["result"]]
+                for caption in captions:
+                    st.code(caption, language=None)
+            else:
+                st.bar_chart(row["result"])
+
+            details = [f"Model: {row['model']}", f"Image: {row['image_hash'][:12]}"]
+            if row["total_tokens"] is not None:
+                details.append(f"Tokens: {row['total_tokens']:,}")
+            if row["latency_ms"] is not None:
+                details.append(f"Latency: {row['latency_ms'] / 1000:.1f}s")
+            st.caption(" · ".join(details))
+
+if __name__ == "__main__":
+    show_history_page()
@@ -1,7 +1,86 @@
+import time
 import streamlit as st
-import tempfile
-import os
-from utils import get_instagram_caption
+from utils import get_instagram_caption_variants_from_bytes, new_session_budget, CAPTION_VARIANTS
+from jobs import get_job_queue, session_owner, PENDING, RUNNING, DONE, FAILED
+from uploads import get_upload_renditions
+
+# Seconds between reruns while a job is still in flight
+POLL_INTERVAL = 1.0
+
+def render_caption(caption):
+    """Display a generated caption in a styled box with a copy block"""
+    caption_container = st.container()
+    with caption_container:
+        # Create a styled caption box with fixed width
+        st.markdown(f"""
+        <div style="
+            background-color: white;
+            border: 2px solid #FF6B6B;
+            padding: 1rem;
+            border-radius: 5px;
+            margin: 1rem 0;
+            font-style: italic;
+            color: black;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+            max-width: 100%;
+            word-wrap: break-word;
+            overflow-wrap: break-word;
+        ">
+            "{caption}"
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Copy button functionality
+        st.markdown("### 📋 Copy Caption")
+        st.code(caption, language=None)
+
+def next_variant(index_key):
+    """Button callback: show the next caption option of a job"""
+    st.session_state[index_key] = st.session_state.get(index_key, 0) + 1
+
+def show_caption_jobs():
+    """Show queued caption jobs for this session and poll until they finish.
+    
+    Returns True if any job is still pending or running."""
+    queue = get_job_queue()
+    job_ids = st.session_state.setdefault("caption_jobs", [])
+    jobs = queue.list_jobs(job_ids)
+    # Forget jobs the queue has pruned
+    st.session_state["caption_jobs"] = [job.id for job in jobs]
+    
+    in_flight = False
+    for job in reversed(jobs):
+        status = queue.status(job.id)
+        st.markdown("---")
+        st.markdown(f"**🎨 {job.metadata.get('style_description', job.name)}**")
+        
+        if status in (PENDING, RUNNING):
+            in_flight = True
+            label = "⏳ Queued..." if status == PENDING else f"🤖 Generating your perfect caption... ({job.elapsed:.0f}s)"
+            info_col, cancel_col = st.columns([3, 1])
+            info_col.info(label)
+            if cancel_col.button("Cancel", key=f"cancel_{job.id}"):
+                queue.cancel(job.id)
+                st.rerun()
+        elif status == DONE:
+            # All options arrived with the job, so cycling through them needs no API call
+            captions = job.result if isinstance(job.result, list) else [job.result]
+            index_key = f"caption_variant_{job.id}"
+            index = st.session_state.get(index_key, 0) % len(captions)
+            st.markdown("### 🎯 Your Generated Caption:")
+            render_caption(captions[index])
+            if len(captions) > 1:
+                option_col, next_col = st.columns([3, 1])
+                option_col.caption(f"Option {index + 1} of {len(captions)}")
+                next_col.button("🔄 Another", key=f"next_{job.id}", on_click=next_variant, args=(index_key,))
+            st.success("✅ Caption generated successfully! Copy it above and use it for your Instagram post.")
+        elif status == FAILED:
+            st.error(f"❌ Error generating caption: {job.error}")
+            st.info("Please try again with a different image or style description.")
+        else:
+            st.caption("🚫 Cancelled")
+    
+    return in_flight
 
 def show_instagram_caption_page():
     """Instagram Caption Generator page"""
@@ -30,6 +109,15 @@ def show_instagram_caption_page():
             help="Describe the style, mood, or occasion for your outfit"
         )
         
+        # Number of alternatives, all generated from one request
+        variants = st.slider(
+            "Caption options",
+            min_value=1,
+            max_value=5,
+            value=CAPTION_VARIANTS,
+            help="Options to choose from. They come from a single request, so the image is only paid for once."
+        )
+        
         # Generate button
         generate_button = st.button(
             "✨ Generate Caption",
@@ -42,61 +130,29 @@ def show_instagram_caption_page():
         st.markdown("### 📝 Generated Caption")
         
         if uploaded_file is not None:
+            # Decode the upload once per file; reruns reuse the thumbnail and API rendition
+            renditions = get_upload_renditions(uploaded_file, st.session_state)
+            
             # Display uploaded image with fixed container
             image_container = st.container()
             with image_container:
-                st.image(uploaded_file, caption="Your uploaded image", use_container_width=True)
+                st.image(renditions.thumbnail, caption="Your uploaded image", use_container_width=True)
             
-            # Process the image and generate caption
+            # Queue the caption job; it keeps running across reruns and page switches.
+            # Pressing Generate always asks for fresh captions rather than the stored ones.
             if generate_button and style_description:
-                with st.spinner("🤖 Generating your perfect caption..."):
-                    try:
-                        # Save uploaded file temporarily
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            temp_image_path = tmp_file.name
-                        
-                        # Generate caption using utils function
-                        caption = get_instagram_caption(temp_image_path, style_description)
-                        
-                        # Clean up temporary file
-                        os.unlink(temp_image_path)
-                        
-                        # Display the generated caption in a fixed container
-                        caption_container = st.container()
-                        with caption_container:
-                            st.markdown("---")
-                            st.markdown("### 🎯 Your Generated Caption:")
-                            
-                            # Create a styled caption box with fixed width
-                            st.markdown(f"""
-                            <div style="
-                                background-color: white;
-                                border: 2px solid #FF6B6B;
-                                padding: 1rem;
-                                border-radius: 5px;
-                                margin: 1rem 0;
-                                font-style: italic;
-                                color: black;
-                                box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                                max-width: 100%;
-                                word-wrap: break-word;
-                                overflow-wrap: break-word;
-                            ">
-                                "{caption}"
-                            </div>
-                            """, unsafe_allow_html=True)
-                            
-                            # Copy button functionality
-                            st.markdown("### 📋 Copy Caption")
-                            st.code(caption, language=None)
-                            
-                            # Success message
-                            st.success("✅ Caption generated successfully! Copy it above and use it for your Instagram post.")
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error generating caption: {str(e)}")
-                        st.info("Please try again with a different image or style description.")
+                job_id = get_job_queue().submit(
+                    get_instagram_caption_variants_from_bytes,
+                    renditions.api_image,
+                    style_description,
+                    variants,
+                    st.session_state.setdefault("token_budget", new_session_budget()),
+                    use_cache=False,
+                    name="caption",
+                    metadata={"style_description": style_description},
+                    owner=session_owner(st.session_state)
+                )
+                st.session_state.setdefault("caption_jobs", []).append(job_id)
             
             elif generate_button and not style_description:
                 st.warning("⚠️ Please enter a style description to generate a caption.")
@@ -109,6 +165,11 @@ def show_instagram_caption_page():
             - Be specific about your style description
             - Include details about the occasion or mood
             """)
+        
+        # Queued and finished captions for this session
+        if show_caption_jobs():
+            time.sleep(POLL_INTERVAL)
+            st.rerun()
 
 if __name__ == "__main__":
     show_instagram_caption_page() 
\ No newline at end of file
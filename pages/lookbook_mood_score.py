@@ -0,0 +1,143 @@
+import time
+import streamlit as st
+from utils import get_outfit_mood_scores_batch_from_bytes
+from jobs import get_job_queue, session_owner, PENDING, RUNNING, DONE, FAILED
+from pages.outfit_mood_score import create_mood_chart_html
+from uploads import get_upload_renditions, MAX_CACHED_UPLOADS
+from scheduler import BACKGROUND
+import streamlit.components.v1 as components
+
+# Seconds between reruns while a job is still in flight
+POLL_INTERVAL = 1.0
+
+def show_lookbook_jobs():
+    """Show queued lookbook analyses for this session and poll until they finish.
+
+    Returns True if any job is still pending or running."""
+    queue = get_job_queue()
+    job_ids = st.session_state.setdefault("lookbook_jobs", [])
+    jobs = queue.list_jobs(job_ids)
+    # Forget jobs the queue has pruned
+    st.session_state["lookbook_jobs"] = [job.id for job in jobs]
+
+    in_flight = False
+    for job in reversed(jobs):
+        status = queue.status(job.id)
+        file_names = job.metadata.get("file_names", [])
+        st.markdown("---")
+        st.markdown(f"**📚 Lookbook of {len(file_names)} looks**")
+
+        if status in (PENDING, RUNNING):
+            in_flight = True
+            label = "⏳ Queued..." if status == PENDING else f"🔍 Analyzing your looks... ({job.elapsed:.0f}s)"
+            info_col, cancel_col = st.columns([3, 1])
+            info_col.info(label)
+            if cancel_col.button("Cancel", key=f"cancel_{job.id}"):
+                queue.cancel(job.id)
+                st.rerun()
+        elif status == DONE:
+            for file_name, result in zip(file_names, job.result):
+                scores = result["scores"]
+                top_mood = max(scores.items(), key=lambda x: x[1])
+                with st.expander(f"{file_name} — {top_mood[0]} ({top_mood[1]}%)"):
+                    components.html(create_mood_chart_html(scores), height=400)
+                    if result["source"] == "local":
+                        st.caption("⚡ Scored locally from colors and textures")
+                    elif result["source"] != "api":
+                        st.warning("⚠️ This look could not be scored by the AI; showing estimated scores.")
+            st.success(f"✅ Analyzed {len(file_names)} looks!")
+        elif status == FAILED:
+            st.error(f"❌ Error analyzing lookbook: {job.error}")
+            st.info("Please try again with different images.")
+        else:
+            st.caption("🚫 Cancelled")
+
+    return in_flight
+
+def show_lookbook_mood_score_page():
+    """Lookbook Mood Score page: score several outfits at once"""
+
+    st.markdown("## 📚 Lookbook Mood Score")
+    st.markdown("Upload a whole lookbook and score every outfit's mood in one go!")
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.markdown("### 📤 Upload Your Looks")
+
+        # Multi-file uploader
+        uploaded_files = st.file_uploader(
+            "Choose outfit images",
+            type=['png', 'jpg', 'jpeg'],
+            accept_multiple_files=True,
+            help="Upload several outfit photos to analyze together"
+        )
+
+        # Images packed into each API request
+        images_per_request = st.slider(
+            "Images per request",
+            min_value=1,
+            max_value=8,
+            value=4,
+            help="More images per request sends the instructions fewer times; fewer keeps each request small"
+        )
+
+        # Local pre-filter for bulk jobs
+        use_prefilter = st.checkbox(
+            "⚡ Skip the AI for clear-cut looks",
+            help="Looks whose top mood is obvious from colors and textures alone are scored locally, without an API call"
+        )
+        prefilter_margin = st.slider(
+            "Minimum lead of the top mood",
+            min_value=5,
+            max_value=50,
+            value=25
+        ) if use_prefilter else None
+
+        # Analyze button
+        analyze_button = st.button(
+            "🔍 Analyze Lookbook",
+            type="primary",
+            use_container_width=True,
+            disabled=not uploaded_files
+        )
+
+    with col2:
+        st.markdown("### 📊 Lookbook Results")
+
+        if uploaded_files:
+            # Decode each upload once; reruns reuse the thumbnails and API renditions
+            max_cached = max(MAX_CACHED_UPLOADS, len(uploaded_files))
+            renditions = [get_upload_renditions(uploaded_file, st.session_state, max_cached)
+                          for uploaded_file in uploaded_files]
+
+            # Display uploaded images as a grid of thumbnails
+            grid = st.columns(4)
+            for i, (uploaded_file, rendition) in enumerate(zip(uploaded_files, renditions)):
+                grid[i % 4].image(rendition.thumbnail, caption=uploaded_file.name, use_container_width=True)
+
+            # Queue the analysis; it keeps running across reruns and page switches
+            if analyze_button:
+                job_id = get_job_queue().submit(
+                    get_outfit_mood_scores_batch_from_bytes,
+                    [rendition.api_image for rendition in renditions],
+                    images_per_request,
+                    prefilter_margin,
+                    name="lookbook",
+                    metadata={"file_names": [uploaded_file.name for uploaded_file in uploaded_files]},
+                    # Bulk scoring yields to single-image requests from other users
+                    priority=BACKGROUND,
+                    owner=session_owner(st.session_state)
+                )
+                st.session_state.setdefault("lookbook_jobs", []).append(job_id)
+
+        else:
+            st.info("📤 Please upload your outfit images to get started!")
+
+        # Queued and finished analyses for this session
+        if show_lookbook_jobs():
+            time.sleep(POLL_INTERVAL)
+            st.rerun()
+
+if __name__ == "__main__":
+    show_lookbook_mood_score_page()
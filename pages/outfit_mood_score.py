@@ -1,9 +1,16 @@
+import time
 import streamlit as st
-import tempfile
-import os
-from utils import get_outfit_mood_scores
+from utils import get_outfit_mood_scores_from_bytes, new_session_budget
+from jobs import get_job_queue, session_owner, PENDING, RUNNING, DONE, FAILED
+from mood_estimator import estimate_mood_scores
+from uploads import get_upload_renditions
+from profiling import timed
 import streamlit.components.v1 as components
 
+# Seconds between reruns while a job is still in flight
+POLL_INTERVAL = 1.0
+
+@timed("create_mood_chart_html")
 def create_mood_chart_html(scores):
     """Create HTML bar chart for mood scores"""
     
@@ -51,6 +58,82 @@ def create_mood_chart_html(scores):
     chart_html += "</div>"
     return chart_html
 
+def render_mood_results(scores):
+    """Display the mood chart, primary mood and style insights for a set of scores"""
+    # Display results
+    st.markdown("---")
+    
+    # Create and display the HTML chart
+    chart_html = create_mood_chart_html(scores)
+    components.html(chart_html, height=400)
+    
+    # Display top mood
+    top_mood = max(scores.items(), key=lambda x: x[1])
+    st.markdown(f"""
+    <div style="
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 20px;
+        border-radius: 10px;
+        text-align: center;
+        margin: 20px 0;
+    ">
+        <h3>🎯 Primary Mood</h3>
+        <h2 style="margin: 0; font-size: 2.5rem;">{top_mood[0]}</h2>
+        <p style="margin: 5px 0 0 0; font-size: 1.2rem;">{top_mood[1]}% confidence</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Additional insights
+    st.markdown("### 💭 Style Insights")
+    if top_mood[1] >= 80:
+        st.info(f"🌟 Your outfit strongly embodies the **{top_mood[0]}** mood! This is a clear style statement.")
+    elif top_mood[1] >= 60:
+        st.info(f"✨ Your outfit has a **{top_mood[0]}** vibe with some mixed elements. Great balance!")
+    else:
+        st.info(f"🎨 Your outfit has a subtle **{top_mood[0]}** influence. Consider adding more elements to strengthen this mood.")
+
+def show_mood_jobs():
+    """Show queued mood analyses for this session and poll until they finish.
+    
+    Returns True if any job is still pending or running."""
+    queue = get_job_queue()
+    job_ids = st.session_state.setdefault("mood_jobs", [])
+    jobs = queue.list_jobs(job_ids)
+    # Forget jobs the queue has pruned
+    st.session_state["mood_jobs"] = [job.id for job in jobs]
+    
+    in_flight = False
+    for job in reversed(jobs):
+        status = queue.status(job.id)
+        st.markdown(f"**🖼️ {job.metadata.get('file_name', job.name)}**")
+        
+        if status in (PENDING, RUNNING):
+            in_flight = True
+            label = "⏳ Queued..." if status == PENDING else f"🔍 Analyzing your outfit's mood... ({job.elapsed:.0f}s)"
+            info_col, cancel_col = st.columns([3, 1])
+            info_col.info(label)
+            if cancel_col.button("Cancel", key=f"cancel_{job.id}"):
+                queue.cancel(job.id)
+                st.rerun()
+            
+            # Instant local estimate while the AI analysis runs
+            preview = job.metadata.get("preview")
+            if preview:
+                st.caption("⚡ Instant preview from image colors and textures — the AI analysis will replace it")
+                components.html(create_mood_chart_html(preview), height=400)
+        elif status == DONE:
+            render_mood_results(job.result)
+            # Success message
+            st.success("✅ Mood analysis completed! Your outfit has been analyzed.")
+        elif status == FAILED:
+            st.error(f"❌ Error analyzing mood: {job.error}")
+            st.info("Please try again with a different image.")
+        else:
+            st.caption("🚫 Cancelled")
+    
+    return in_flight
+
 def show_outfit_mood_score_page():
     """Outfit Mood Score Analysis page"""
     
@@ -95,63 +178,27 @@ def show_outfit_mood_score_page():
         st.markdown("### 📊 Mood Analysis Results")
         
         if uploaded_file is not None:
+            # Decode the upload once per file; reruns reuse the thumbnail and API rendition
+            renditions = get_upload_renditions(uploaded_file, st.session_state)
+            
             # Display uploaded image
-            st.image(uploaded_file, caption="Your outfit", use_container_width=True)
+            st.image(renditions.thumbnail, caption="Your outfit", use_container_width=True)
             
-            # Process the image and analyze mood
+            # Queue the analysis; it keeps running across reruns and page switches
             if analyze_button:
-                with st.spinner("🔍 Analyzing your outfit's mood..."):
-                    try:
-                        # Save uploaded file temporarily
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            temp_image_path = tmp_file.name
-                        
-                        # Get mood scores using utils function
-                        scores = get_outfit_mood_scores(temp_image_path)
-                        
-                        # Clean up temporary file
-                        os.unlink(temp_image_path)
-                        
-                        # Display results
-                        st.markdown("---")
-                        
-                        # Create and display the HTML chart
-                        chart_html = create_mood_chart_html(scores)
-                        components.html(chart_html, height=400)
-                        
-                        # Display top mood
-                        top_mood = max(scores.items(), key=lambda x: x[1])
-                        st.markdown(f"""
-                        <div style="
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            color: white;
-                            padding: 20px;
-                            border-radius: 10px;
-                            text-align: center;
-                            margin: 20px 0;
-                        ">
-                            <h3>🎯 Primary Mood</h3>
-                            <h2 style="margin: 0; font-size: 2.5rem;">{top_mood[0]}</h2>
-                            <p style="margin: 5px 0 0 0; font-size: 1.2rem;">{top_mood[1]}% confidence</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Success message
-                        st.success("✅ Mood analysis completed! Your outfit has been analyzed.")
-                        
-                        # Additional insights
-                        st.markdown("### 💭 Style Insights")
-                        if top_mood[1] >= 80:
-                            st.info(f"🌟 Your outfit strongly embodies the **{top_mood[0]}** mood! This is a clear style statement.")
-                        elif top_mood[1] >= 60:
-                            st.info(f"✨ Your outfit has a **{top_mood[0]}** vibe with some mixed elements. Great balance!")
-                        else:
-                            st.info(f"🎨 Your outfit has a subtle **{top_mood[0]}** influence. Consider adding more elements to strengthen this mood.")
-                        
-                    except Exception as e:
-                        st.error(f"❌ Error analyzing mood: {str(e)}")
-                        st.info("Please try again with a different image.")
+                try:
+                    preview = estimate_mood_scores(renditions.thumbnail)
+                except Exception:
+                    preview = None
+                job_id = get_job_queue().submit(
+                    get_outfit_mood_scores_from_bytes,
+                    renditions.api_image,
+                    st.session_state.setdefault("token_budget", new_session_budget()),
+                    name="mood",
+                    metadata={"file_name": uploaded_file.name, "preview": preview},
+                    owner=session_owner(st.session_state)
+                )
+                st.session_state.setdefault("mood_jobs", []).append(job_id)
         
         else:
             st.info("📤 Please upload an outfit image to get started!")
@@ -162,6 +209,11 @@ def show_outfit_mood_score_page():
             - Include accessories and shoes
             - Avoid cluttered backgrounds
             """)
+        
+        # Queued and finished analyses for this session
+        if show_mood_jobs():
+            time.sleep(POLL_INTERVAL)
+            st.rerun()
 
 if __name__ == "__main__":
     show_outfit_mood_score_page() 
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+Opt-in profiling of the local work around API calls (image encoding, frame
+extraction, chart HTML, JSON cleanup).
+
+    PROFILE=timers streamlit run app.py       # section timers only
+    PROFILE=cprofile python api_server.py     # timers + a cProfile dump per request
+    python profiling.py report profiles/      # summarize what was recorded
+
+With PROFILE unset the hooks cost one flag check per call. When enabled, every
+`timed` section is timed with perf_counter; each request (a background job or an
+API call) appends its wall time and per-section totals to
+`<PROFILE_DIR>/requests.jsonl`, and in 'cprofile' mode also writes
+`<PROFILE_DIR>/<name>-<timestamp>.prof`. Only one request is profiled with
+cProfile at a time; requests that overlap it still record their timers.
+"""
+import os
+import re
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import threading
+import functools
+import itertools
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+# Profiling modes
+OFF = "off"
+TIMERS = "timers"
+CPROFILE = "cprofile"
+PROFILE_MODES = (OFF, TIMERS, CPROFILE)
+DEFAULT_PROFILE_DIR = "profiles"
+REQUESTS_LOG = "requests.jsonl"
+
+_mode = OFF
+_directory = DEFAULT_PROFILE_DIR
+_lock = threading.Lock()
+# Held by the request currently being profiled with cProfile
+_cprofile_lock = threading.Lock()
+# Numbers .prof files of requests that start in the same second
+_profile_sequence = itertools.count()
+# Process-wide section totals: name -> [calls, seconds, max seconds]
+_totals = defaultdict(lambda: [0, 0.0, 0.0])
+# Section totals of the request running in the current context
+_request_timers = contextvars.ContextVar("request_timers", default=None)
+
+
+def enable(mode=TIMERS, directory=None):
+    """
+    Turns profiling on or off for this process.
+
+    Parameters:
+    ----------
+    mode : str, optional
+        'timers', 'cprofile' or 'off' (default is 'timers').
+    directory : str, optional
+        Where request logs and .prof files are written; defaults to $PROFILE_DIR
+        or 'profiles'.
+    """
+    global _mode, _directory
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiling mode: {mode}")
+    _directory = directory or os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    if mode != OFF:
+        os.makedirs(_directory, exist_ok=True)
+    _mode = mode
+
+
+def enabled():
+    return _mode != OFF
+
+
+def _record(name, seconds):
+    with _lock:
+        totals = _totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds)
+        request_timers = _request_timers.get()
+        if request_timers is not None:
+            request_timers[name] = request_timers.get(name, 0.0) + seconds
+
+
+@contextmanager
+def section(name):
+    """Times a block as the named section when profiling is enabled."""
+    if _mode == OFF:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """
+    Decorator timing every call of a function as a section.
+
+    Parameters:
+    ----------
+    name : str, optional
+        Section name (defaults to the function's qualified name).
+    """
+    def decorator(fn):
+        section_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _mode == OFF:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(section_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile_request(name):
+    """
+    Profiles one request: collects its section timers and, in 'cprofile' mode, a
+    cProfile of the calling thread.
+
+    Work the request hands to other threads with a copied context (e.g. hashtag
+    retrieval) adds to its section timers but not to its cProfile.
+    """
+    if _mode == OFF:
+        yield
+        return
+    request_timers = {}
+    token = _request_timers.set(request_timers)
+    profiler = None
+    if _mode == CPROFILE and _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        # Control flow such as Streamlit's rerun is a BaseException and not counted as an error
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _request_timers.reset(token)
+        entry = {"name": name, "started_at": started_at, "seconds": seconds, "error": error,
+                 "sections": request_timers, "profile": None}
+        if profiler is not None:
+            profiler.disable()
+            _cprofile_lock.release()
+            safe_name = re.sub(r"[^\w.-]+", "_", name)
+            entry["profile"] = f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}-{next(_profile_sequence)}.prof"
+            profiler.dump_stats(os.path.join(_directory, entry["profile"]))
+        try:
+            with _lock, open(os.path.join(_directory, REQUESTS_LOG), "a", encoding="utf-8") as log:
+                log.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Error writing profile log: {e}")
+
+
+def stats():
+    """
+    Returns the section timers recorded in this process.
+
+    Returns:
+    -------
+    dict
+        section -> {'calls', 'total_ms', 'mean_ms', 'max_ms'}
+    """
+    with _lock:
+        return {
+            name: {"calls": calls, "total_ms": round(total * 1000, 2),
+                   "mean_ms": round(total / calls * 1000, 2) if calls else 0.0,
+                   "max_ms": round(longest * 1000, 2)}
+            for name, (calls, total, longest) in _totals.items()
+        }
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+def report(directory=DEFAULT_PROFILE_DIR, top=20, out=None):
+    """
+    Prints a summary of the requests recorded in a profile directory.
+
+    Sections are listed with their share of total request wall time; whatever is
+    left is mostly time spent waiting on the API. If .prof files were captured,
+    they are merged and the functions with the most cumulative time are listed.
+    """
+    out = out or sys.stdout
+    log_path = os.path.join(directory, REQUESTS_LOG)
+    if not os.path.exists(log_path):
+        print(f"No profiled requests in {directory}", file=out)
+        return
+    with open(log_path, encoding="utf-8") as log:
+        entries = [json.loads(line) for line in log if line.strip()]
+    if not entries:
+        print(f"No profiled requests in {directory}", file=out)
+        return
+
+    print(f"{len(entries)} requests, {sum(1 for e in entries if e['error'])} failed", file=out)
+    print(f"\n{'request':<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}", file=out)
+    by_name = defaultdict(list)
+    for entry in entries:
+        by_name[entry["name"]].append(entry["seconds"] * 1000)
+    for name, values in sorted(by_name.items()):
+        print(f"{name:<32} {len(values):>6} {_percentile(values, 50):>9.1f} {_percentile(values, 95):>9.1f} "
+              f"{max(values):>9.1f}", file=out)
+
+    wall = sum(entry["seconds"] for entry in entries)
+    sections = defaultdict(list)
+    for entry in entries:
+        for name, seconds in entry["sections"].items():
+            sections[name].append(seconds * 1000)
+    print(f"\n{'section':<32} {'requests':>8} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'% wall':>7}", file=out)
+    for name, values in sorted(sections.items(), key=lambda item: -sum(item[1])):
+        print(f"{name:<32} {len(values):>8} {sum(values):>10.2f} {_percentile(values, 50):>9.2f} "
+              f"{_percentile(values, 95):>9.2f} {sum(values) / 10 / wall if wall else 0:>6.1f}%", file=out)
+
+    profiles = [os.path.join(directory, entry["profile"]) for entry in entries
+                if entry.get("profile") and os.path.exists(os.path.join(directory, entry["profile"]))]
+    if profiles:
+        print(f"\nTop {top} functions by cumulative time across {len(profiles)} cProfile dumps:", file=out)
+        merged = pstats.Stats(*profiles, stream=out)
+        # Don't list every dump file above the table
+        merged.files = []
+        merged.strip_dirs().sort_stats("cumulative").print_stats(top)
+
+
+# Opt in from the environment; entry points can also call enable() from a flag
+if os.getenv("PROFILE", "").lower() not in ("", "0", OFF):
+    enable(CPROFILE if os.getenv("PROFILE").lower() == CPROFILE else TIMERS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize profiles recorded with PROFILE=timers or PROFILE=cprofile")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    report_parser = subcommands.add_parser("report", help="summarize a profile directory")
+    report_parser.add_argument("directory", nargs="?", default=os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR))
+    report_parser.add_argument("--top", type=int, default=20, help="functions to list from cProfile dumps")
+    args = parser.parse_args()
+
+    report(args.directory, args.top)
@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+from collections import Counter, deque
+from genai import TRANSIENT_API_ERRORS, CircuitOpenError
+from token_budget import TokenBudgetExceeded
+
+# Models tried in order, cheapest and fastest first; override with MODEL_CASCADE
+DEFAULT_CASCADE = ["gpt-4o-mini", "gpt-4o"]
+
+# Errors a stronger model would hit just the same: the API is unhealthy, the breaker
+# is open, or the session can't afford the request. They are raised, not escalated.
+NON_ESCALATING_ERRORS = (CircuitOpenError, TokenBudgetExceeded, *TRANSIENT_API_ERRORS)
+
+
+class ModelRouter:
+    """
+    Routes a task through a cascade of models, escalating only when needed.
+
+    Each task starts on the first model. If its output fails the task's validation
+    (unparseable, incomplete or low-confidence) or the model rejects the request
+    (e.g. a 400 or 404), the next model is tried, unless a latency budget says there
+    is no time left for it. Transient API errors, an open circuit breaker and an
+    exhausted token budget are raised at once instead. Escalation rates per task are
+    recorded for `stats`.
+
+    Attributes:
+    ----------
+    models : list
+        Model names, cheapest first.
+    latency_budget : float or None
+        Default seconds a routed task may take before escalation stops.
+    """
+    def __init__(self, models=None, latency_budget=None, latency_window=100):
+        self.models = list(models or DEFAULT_CASCADE)
+        if not self.models:
+            raise ValueError("A model cascade needs at least one model")
+        self.latency_budget = latency_budget
+        self._lock = threading.Lock()
+        self._latencies = {model: deque(maxlen=latency_window) for model in self.models}
+        self._stats = {}
+
+    @classmethod
+    def from_env(cls):
+        """Builds a router from MODEL_CASCADE (comma-separated) and ROUTING_LATENCY_BUDGET (seconds)."""
+        models = [model.strip() for model in os.getenv("MODEL_CASCADE", "").split(",") if model.strip()]
+        latency_budget = os.getenv("ROUTING_LATENCY_BUDGET")
+        return cls(models or None, float(latency_budget) if latency_budget else None)
+
+    def expected_latency(self, model):
+        """Median recent latency of a model, or 0 before it has been used."""
+        with self._lock:
+            samples = sorted(self._latencies[model])
+        return samples[len(samples) // 2] if samples else 0.0
+
+    def run(self, task, attempt, validate=None, latency_budget=None):
+        """
+        Runs a task through the cascade.
+
+        Parameters:
+        ----------
+        task : str
+            Task name for the statistics, e.g. 'caption' or 'mood'.
+        attempt : callable
+            attempt(model) -> value; may raise to signal failure.
+        validate : callable, optional
+            validate(value) -> reason string if the value should be escalated, or None
+            if it is good enough.
+        latency_budget : float, optional
+            Seconds the whole task may take; defaults to the router's.
+
+        Returns:
+        -------
+        tuple
+            (value, model). If every model is exhausted, the last value that was
+            produced is returned even if it failed validation.
+
+        Raises:
+        ------
+        CircuitOpenError, TokenBudgetExceeded or a transient API error
+            As soon as an attempt raises one (see NON_ESCALATING_ERRORS).
+        Exception
+            The last model's error, if no model produced a value at all.
+        """
+        latency_budget = latency_budget if latency_budget is not None else self.latency_budget
+        start = time.perf_counter()
+        best, error, reasons = None, None, []
+
+        for position, model in enumerate(self.models):
+            call_start = time.perf_counter()
+            try:
+                value = attempt(model)
+            except NON_ESCALATING_ERRORS as e:
+                reasons.append(f"error: {type(e).__name__}")
+                self._record(task, None, reasons)
+                raise
+            except Exception as e:
+                error, reason = e, f"error: {type(e).__name__}"
+            else:
+                with self._lock:
+                    self._latencies[model].append(time.perf_counter() - call_start)
+                best = (value, model)
+                reason = validate(value) if validate else None
+                if reason is None:
+                    self._record(task, model, reasons)
+                    return best
+            reasons.append(reason)
+
+            next_model = self.models[position + 1] if position + 1 < len(self.models) else None
+            if next_model is None:
+                break
+            if latency_budget is not None and best is not None:
+                elapsed = time.perf_counter() - start
+                if elapsed + self.expected_latency(next_model) > latency_budget:
+                    reasons.append("latency budget")
+                    break
+
+        self._record(task, best[1] if best else None, reasons)
+        if best is None:
+            raise error
+        return best
+
+    def _record(self, task, model, reasons):
+        with self._lock:
+            stats = self._stats.setdefault(task, {"calls": 0, "escalated": 0, "models": Counter(),
+                                                  "reasons": Counter()})
+            stats["calls"] += 1
+            if model is None or model != self.models[0]:
+                stats["escalated"] += 1
+            stats["models"][model or "failed"] += 1
+            stats["reasons"].update(reasons)
+
+    def stats(self):
+        """
+        Returns escalation statistics per task.
+
+        Returns:
+        -------
+        dict
+            task -> {'calls', 'escalated', 'escalation_rate', 'models', 'reasons'}, where
+            'models' counts the model that produced each final answer and 'reasons'
+            counts why earlier models were passed over.
+        """
+        with self._lock:
+            return {
+                task: {
+                    "calls": stats["calls"],
+                    "escalated": stats["escalated"],
+                    "escalation_rate": stats["escalated"] / stats["calls"] if stats["calls"] else 0.0,
+                    "models": dict(stats["models"]),
+                    "reasons": dict(stats["reasons"]),
+                }
+                for task, stats in self._stats.items()
+            }
@@ -0,0 +1,265 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+
+# Priority classes, highest first
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BATCH = "batch"
+PRIORITY_CLASSES = (INTERACTIVE, BACKGROUND, BATCH)
+
+# Concurrent API calls allowed in total and per class. Background and batch work
+# together can never take every slot, so an interactive call always finds one free.
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_CLASS_LIMITS = {INTERACTIVE: 8, BACKGROUND: 3, BATCH: 3}
+
+# Priority class and fairness owner of the code running in the current context
+_scheduling = contextvars.ContextVar("scheduling", default=(INTERACTIVE, None))
+
+
+@contextmanager
+def scheduling(priority, owner=None):
+    """
+    Runs a block with the given priority class.
+
+    API calls made inside the block (on this thread, or in work that copies the
+    context, such as JobQueue jobs) are scheduled in that class.
+
+    Parameters:
+    ----------
+    priority : str
+        'interactive', 'background' or 'batch'.
+    owner : hashable, optional
+        Who the work is for, e.g. a session or batch ID. Waiting calls of one class
+        are served round-robin across owners, so one large run can't hold up another.
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    token = _scheduling.set((priority, owner))
+    try:
+        yield
+    finally:
+        _scheduling.reset(token)
+
+
+def current_scheduling():
+    """Returns the (priority, owner) of the current context."""
+    return _scheduling.get()
+
+
+class _Waiter:
+    __slots__ = ("event", "priority", "enqueued_at", "granted")
+
+    def __init__(self, priority):
+        self.event = threading.Event()
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class PriorityScheduler:
+    """
+    Grants API call slots by priority class.
+
+    When a slot is free, the highest-priority class with waiting calls that is below
+    its own limit goes first; within a class, owners take turns and each owner's
+    calls run in arrival order.
+
+    Attributes:
+    ----------
+    max_concurrent : int
+        Calls allowed to run at once across all classes.
+    class_limits : dict
+        Calls allowed to run at once per class.
+    """
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, class_limits=None, wait_window=500):
+        """
+        Parameters:
+        ----------
+        max_concurrent : int, optional
+            Total concurrent calls (default is DEFAULT_MAX_CONCURRENT).
+        class_limits : dict, optional
+            Per-class limits, merged over DEFAULT_CLASS_LIMITS.
+        wait_window : int, optional
+            Recent wait times kept per class for `stats` (default is 500).
+        """
+        self.max_concurrent = max_concurrent
+        unknown = set(class_limits or {}) - set(PRIORITY_CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown priority classes: {', '.join(sorted(unknown))}")
+        self.class_limits = dict(DEFAULT_CLASS_LIMITS, **(class_limits or {}))
+        self._lock = threading.Lock()
+        # Per class: owner -> deque of waiters; owners rotate to the back when served
+        self._queues = {priority: OrderedDict() for priority in PRIORITY_CLASSES}
+        self._running = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self._waiting = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self._granted = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self._waits = {priority: deque(maxlen=wait_window) for priority in PRIORITY_CLASSES}
+
+    def acquire(self, priority=None, owner=None, timeout=None):
+        """
+        Blocks until a slot is granted.
+
+        Parameters:
+        ----------
+        priority : str, optional
+            Priority class; defaults to the current context's (see `scheduling`).
+        owner : hashable, optional
+            Fairness owner; defaults to the current context's.
+        timeout : float, optional
+            Seconds to wait before raising TimeoutError (default is None, wait forever).
+
+        Returns:
+        -------
+        str
+            The priority class, to pass to `release`.
+        """
+        if priority is None:
+            priority, context_owner = current_scheduling()
+            owner = owner if owner is not None else context_owner
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        waiter = _Waiter(priority)
+        with self._lock:
+            self._queues[priority].setdefault(owner, deque()).append(waiter)
+            self._waiting[priority] += 1
+            self._dispatch()
+
+        if not waiter.event.wait(timeout):
+            with self._lock:
+                if not waiter.granted:
+                    queue = self._queues[priority].get(owner)
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[priority][owner]
+                    self._waiting[priority] -= 1
+                    raise TimeoutError(f"No {priority} slot within {timeout}s")
+        return priority
+
+    def try_acquire(self, priority=None):
+        """
+        Takes a slot only if one is free right now, without queueing.
+
+        A slot is refused while calls of the same or a higher class are waiting, so
+        opportunistic work (such as a hedged duplicate request) never overtakes them.
+
+        Returns:
+        -------
+        str or None
+            The priority class to pass to `release`, or None if no slot was free.
+        """
+        if priority is None:
+            priority = current_scheduling()[0]
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        with self._lock:
+            ahead = PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1]
+            if (any(self._queues[waiting] for waiting in ahead)
+                    or sum(self._running.values()) >= self.max_concurrent
+                    or self._running[priority] >= self.class_limits[priority]):
+                return None
+            self._running[priority] += 1
+            self._granted[priority] += 1
+            self._waits[priority].append(0.0)
+            return priority
+
+    def release(self, priority):
+        """Frees a slot granted by `acquire` or `try_acquire`."""
+        with self._lock:
+            self._running[priority] -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority=None, owner=None, timeout=None):
+        """Holds a slot for the duration of a block."""
+        priority = self.acquire(priority, owner, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def _dispatch(self):
+        """Grants free slots to waiters; the caller holds the lock."""
+        while sum(self._running.values()) < self.max_concurrent:
+            for priority in PRIORITY_CLASSES:
+                owners = self._queues[priority]
+                if owners and self._running[priority] < self.class_limits[priority]:
+                    break
+            else:
+                return
+            owner, queue = next(iter(owners.items()))
+            waiter = queue.popleft()
+            if queue:
+                owners.move_to_end(owner)
+            else:
+                del owners[owner]
+            self._waiting[priority] -= 1
+            self._running[priority] += 1
+            self._granted[priority] += 1
+            self._waits[priority].append(time.monotonic() - waiter.enqueued_at)
+            waiter.granted = True
+            waiter.event.set()
+
+    def stats(self):
+        """
+        Returns queue depth and wait times per class.
+
+        Returns:
+        -------
+        dict
+            priority -> {'running', 'waiting', 'limit', 'granted', 'wait_p50_ms', 'wait_p95_ms'}
+            with wait percentiles over recent grants (None before the first one).
+        """
+        with self._lock:
+            stats = {}
+            for priority in PRIORITY_CLASSES:
+                waits = sorted(self._waits[priority])
+
+                def percentile(p):
+                    if not waits:
+                        return None
+                    return round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))] * 1000, 1)
+
+                stats[priority] = {
+                    "running": self._running[priority],
+                    "waiting": self._waiting[priority],
+                    "limit": self.class_limits[priority],
+                    "granted": self._granted[priority],
+                    "wait_p50_ms": percentile(50),
+                    "wait_p95_ms": percentile(95),
+                }
+            return stats
+
+
+def parse_class_limits(value):
+    """Parses 'interactive=8,background=3,batch=3' into a dict."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        priority, _, limit = item.partition("=")
+        limits[priority.strip()] = int(limit)
+    return limits
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Returns the process-wide PriorityScheduler, creating it on first use.
+
+    Sized by SCHEDULER_MAX_CONCURRENT (default DEFAULT_MAX_CONCURRENT) and
+    SCHEDULER_CLASS_LIMITS (e.g. 'interactive=8,background=3,batch=3').
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PriorityScheduler(
+                max_concurrent=int(os.getenv("SCHEDULER_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)),
+                class_limits=parse_class_limits(os.getenv("SCHEDULER_CLASS_LIMITS", "")),
+            )
+        return _scheduler
@@ -0,0 +1,71 @@
+"""
+Shared fixtures. The tests run against the local stand-in API in
+mock_openai_server.py, so they need no OpenAI key or network access.
+"""
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_openai_server import start_mock_server
+
+_server, _base_url = start_mock_server(batch_delay=0.2)
+_workdir = tempfile.mkdtemp(prefix="tests_")
+
+# utils creates its GenAI at import, so the environment must be set before any test imports it
+os.environ.update(OPENAI_BASE_URL=_base_url, OPENAI_API_KEY="test",
+                  HISTORY_DB=os.path.join(_workdir, "history.db"),
+                  HASHTAG_INDEX=os.path.join(_workdir, "hashtag_index.npz"),
+                  OPENAI_WARM_UP="0")
+
+
+@pytest.fixture
+def mock_api():
+    """The shared mock server: (server, base_url)."""
+    return _server, _base_url
+
+
+@pytest.fixture
+def start_mock():
+    """Starts extra mock servers with custom latency or error rate; stops them afterwards."""
+    servers = []
+
+    def start(**options):
+        server, base_url = start_mock_server(**options)
+        servers.append(server)
+        return server, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def _make_image(color=(200, 40, 40), size=(64, 96)):
+    """JPEG bytes of a plain image."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_bytes():
+    return _make_image()
+
+
+@pytest.fixture
+def image_path(tmp_path, image_bytes):
+    path = tmp_path / "outfit.jpg"
+    path.write_bytes(image_bytes)
+    return str(path)
+
+
+@pytest.fixture
+def images():
+    """JPEG bytes of three differently coloured images."""
+    return [_make_image(color) for color in ((200, 40, 40), (40, 200, 40), (40, 40, 200))]
@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from api_server import create_app
+
+
+@pytest.fixture
+def app():
+    app = create_app(max_concurrent=2, max_queued=0)
+    yield app
+    app.state.executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+def _encoded(images):
+    return [base64.b64encode(image).decode("ascii") for image in images]
+
+
+def test_health(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["running"] == 0
+
+
+def test_mood(client, app, image_bytes):
+    response = client.post("/mood", files={"image": ("outfit.jpg", image_bytes, "image/jpeg")})
+    assert response.status_code == 200
+    assert response.json()["scores"]
+    assert app.state.admission.running == 0
+
+
+def test_caption_requires_style_description(client, app, image_bytes):
+    response = client.post("/caption", json={"image": _encoded([image_bytes])[0]})
+    assert response.status_code == 400
+    assert "style_description" in response.json()["error"]
+    assert app.state.admission.running == 0
+
+
+def test_full_queue_answers_429(client, app, image_bytes):
+    admission = app.state.admission
+    for _ in range(admission.max_concurrent):
+        asyncio.run(admission.acquire())
+    try:
+        response = client.post("/mood", json={"image": _encoded([image_bytes])[0]})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+    finally:
+        for _ in range(admission.max_concurrent):
+            admission.release()
+    assert client.post("/mood", json={"image": _encoded([image_bytes])[0]}).status_code == 200
+
+
+def test_batch_mood_streams_one_line_per_image(client, app, images):
+    response = client.post("/batch/mood", json={"images": _encoded(images), "images_per_request": 2})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(len(images)))
+    assert all(line["scores"] for line in lines)
+    assert app.state.admission.running == 0
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"json": ["not", "an", "object"]},
+    {"json": {"images": []}},
+    {"json": {"images": ["not base64!"]}},
+    {"content": b"no boundary", "headers": {"Content-Type": "multipart/form-data"}},
+])
+def test_rejected_batch_requests_release_their_slot(client, app, images, kwargs):
+    admission = app.state.admission
+    # More bad requests than there are slots: a leaked slot would turn the last ones into 429s
+    for _ in range(admission.max_concurrent + 1):
+        response = client.post("/batch/mood", **kwargs)
+        assert response.status_code == 400
+    assert admission.running == 0
+    assert client.post("/batch/mood", json={"images": _encoded(images[:1])}).status_code == 200
+
+
+def test_invalid_batch_options_release_their_slot(client, app, images):
+    response = client.post("/batch/mood", json={"images": _encoded(images), "images_per_request": "many"})
+    assert response.status_code == 400
+    assert app.state.admission.running == 0
+
+
+def _call_asgi(app, path, body, send):
+    """Sends one JSON POST straight to the ASGI app, as a server speaking ASGI 2.4 would."""
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": [(b"content-type", b"application/json")],
+             "client": ("127.0.0.1", 5000), "server": ("testserver", 80)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def run():
+        try:
+            await app(scope, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(run())
+
+
+def test_batch_slot_is_released_when_the_client_leaves_before_streaming(app, images):
+    async def send(message):
+        # The client is gone before the response headers go out
+        raise OSError("connection reset")
+
+    body = json.dumps({"images": _encoded(images)}).encode()
+    _call_asgi(app, "/batch/mood", body, send)
+    assert app.state.admission.running == 0
+
+
+def test_batch_slot_is_released_when_the_client_leaves_mid_stream(app, images):
+    sent = []
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            raise OSError("connection reset")
+        sent.append(message)
+
+    body = json.dumps({"images": _encoded(images), "images_per_request": 1}).encode()
+    _call_asgi(app, "/batch/mood", body, send)
+    assert sent[0]["status"] == 200
+    assert app.state.admission.running == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from genai import GenAI
+
+
+@pytest.fixture
+def genai(mock_api):
+    _, base_url = mock_api
+    return GenAI("test", base_url=base_url, transport=False)
+
+
+def test_run_batch_returns_results_in_request_order(genai, image_path):
+    requests = [
+        genai.text_batch_request("text", "Write a caption"),
+        genai.image_description_batch_request("image", [image_path], "Describe the outfit"),
+    ]
+    results = genai.run_batch(requests, poll_interval=0.05, timeout=10)
+
+    assert len(results) == 2
+    for result in results:
+        assert result["error"] is None
+        assert result["content"]
+        assert result["usage"]["total_tokens"] > 0
+
+
+def test_run_batch_reports_failed_requests(genai):
+    requests = [
+        genai.text_batch_request("ok", "Write a caption"),
+        {"custom_id": "bad", "method": "POST", "url": "/v1/unknown", "body": {}},
+    ]
+    ok, bad = genai.run_batch(requests, poll_interval=0.05, timeout=10)
+
+    assert ok["error"] is None
+    assert bad["content"] is None
+    assert "Unsupported url" in bad["error"]
+
+
+def test_submit_batch_rejects_duplicate_ids(genai):
+    request = genai.text_batch_request("same", "Write a caption")
+    with pytest.raises(ValueError, match="Duplicate custom_id"):
+        genai.submit_batch([request, request])
@@ -0,0 +1,79 @@
+import time
+
+import httpx
+import openai
+import pytest
+
+from genai import GenAI, CircuitBreaker, CircuitOpenError
+
+
+def _api_error(error_type, status_code):
+    request = httpx.Request("POST", "http://test/v1/chat/completions")
+    return error_type("error", response=httpx.Response(status_code, request=request), body=None)
+
+
+def test_state_transitions():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_error(_api_error(openai.InternalServerError, 500))
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_error(_api_error(openai.InternalServerError, 500))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # After the recovery timeout one probe is let through
+    time.sleep(0.25)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # A failed probe re-opens the breaker
+    breaker.record_error(_api_error(openai.RateLimitError, 429))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.25)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_ignores_client_errors():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.2)
+    breaker.record_error(_api_error(openai.BadRequestError, 400))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_error(_api_error(openai.InternalServerError, 500))
+    time.sleep(0.25)
+    breaker.before_call()
+    # A rejected probe gives its slot back without re-opening the breaker
+    breaker.record_error(_api_error(openai.BadRequestError, 400))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+def test_client_errors_reset_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    for _ in range(3):
+        breaker.record_error(_api_error(openai.InternalServerError, 500))
+        breaker.record_error(_api_error(openai.NotFoundError, 404))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_opens_on_upstream_errors(start_mock, image_path):
+    server, base_url = start_mock(error_rate=1.0)
+    genai = GenAI("test", base_url=base_url, transport=False,
+                  circuit_breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=60))
+    genai.client = genai.client.with_options(max_retries=0)
+
+    for instructions in ("first", "second"):
+        with pytest.raises(openai.InternalServerError):
+            genai.generate_image_description([image_path], instructions)
+    assert genai.circuit_breaker.state == CircuitBreaker.OPEN
+
+    # While open, calls fail fast without reaching the API
+    with pytest.raises(CircuitOpenError):
+        genai.generate_image_description([image_path], "third")
+    assert server.state.requests == 2
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import hashtag_index
+from hashtag_index import HashtagIndex, HashtagIndexUnavailable, get_hashtag_index, start_hashtag_index
+
+VOCABULARY = {"#denim": "denim, jeans", "#boho": "boho, fringe", "#glam": "sequins, sparkle"}
+
+
+class FakeEmbeddings:
+    """Deterministic embeddings; counts the texts embedded and can be made to fail."""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.embedded = 0
+
+    def get_embeddings(self, texts, model=None):
+        if self.fail:
+            raise ConnectionError("embedding API down")
+        self.embedded += len(texts)
+        return [np.random.default_rng(sum(map(ord, text))).normal(size=8).tolist() for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(hashtag_index, "HASHTAGS", dict(VOCABULARY))
+    monkeypatch.setattr(hashtag_index, "_index", None)
+    monkeypatch.setattr(hashtag_index, "_index_failed_at", None)
+    monkeypatch.setenv("HASHTAG_INDEX", str(tmp_path / "hashtag_index.npz"))
+
+
+def _reset():
+    hashtag_index._index = None
+
+
+def test_top_k_orders_by_similarity():
+    index = HashtagIndex(["#a", "#b", "#c"], [[1, 0], [0.6, 0.8], [0, 1]])
+    assert [tag for tag, _ in index.top_k([1, 0.1], k=2)] == ["#a", "#b"]
+    assert index.top_k([0, 2], k=1)[0] == ("#c", pytest.approx(1.0))
+
+
+def test_saved_index_is_reused():
+    genai = FakeEmbeddings()
+    built = get_hashtag_index(genai)
+    assert genai.embedded == len(VOCABULARY)
+
+    _reset()
+    loaded = get_hashtag_index(genai)
+    assert genai.embedded == len(VOCABULARY)
+    assert loaded.tags == built.tags
+    np.testing.assert_allclose(loaded.matrix, built.matrix)
+
+
+def test_changed_vocabulary_rebuilds_the_saved_index(monkeypatch):
+    genai = FakeEmbeddings()
+    get_hashtag_index(genai)
+
+    _reset()
+    monkeypatch.setattr(hashtag_index, "HASHTAGS", {**VOCABULARY, "#cozy": "knitwear"})
+    assert "#cozy" in get_hashtag_index(genai).tags
+    assert genai.embedded == 2 * len(VOCABULARY) + 1
+
+
+def test_index_saved_without_fingerprint_is_rebuilt(tmp_path):
+    path = str(tmp_path / "old.npz")
+    np.savez_compressed(path, tags=np.array(list(VOCABULARY)), matrix=np.ones((len(VOCABULARY), 8)))
+    genai = FakeEmbeddings()
+    get_hashtag_index(genai, path)
+    assert genai.embedded == len(VOCABULARY)
+
+
+def test_failed_build_is_not_retried_during_cooldown(monkeypatch):
+    genai = FakeEmbeddings(fail=True)
+    with pytest.raises(ConnectionError):
+        get_hashtag_index(genai)
+    genai.fail = False
+    with pytest.raises(HashtagIndexUnavailable):
+        get_hashtag_index(genai)
+    assert genai.embedded == 0
+
+    monkeypatch.setattr(hashtag_index, "BUILD_RETRY_SECONDS", 0)
+    assert get_hashtag_index(genai).tags == list(VOCABULARY)
+
+
+def test_start_builds_in_the_background():
+    genai = FakeEmbeddings()
+    start_hashtag_index(genai).join(5)
+    assert hashtag_index._index is not None
+    assert genai.embedded == len(VOCABULARY)
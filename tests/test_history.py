@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from history import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "history.db"))
+
+
+def test_lookup_returns_the_latest_matching_result(store):
+    store.add("caption", "abc", "first", "gpt-4o-mini", "boho chic")
+    store.add("caption", "abc", "second", "gpt-4o-mini", "boho chic")
+    assert store.lookup("caption", "abc", "gpt-4o-mini", "boho chic") == "second"
+
+
+@pytest.mark.parametrize("kind, image_hash, model, style_description", [
+    ("mood", "abc", "gpt-4o-mini", "boho chic"),
+    ("caption", "def", "gpt-4o-mini", "boho chic"),
+    ("caption", "abc", "gpt-4o", "boho chic"),
+    ("caption", "abc", "gpt-4o-mini", "street style"),
+])
+def test_lookup_matches_every_input(store, kind, image_hash, model, style_description):
+    store.add("caption", "abc", ["a", "b"], "gpt-4o-mini", "boho chic")
+    assert store.lookup(kind, image_hash, model, style_description) is None
+
+
+def test_lookup_ignores_results_older_than_max_age(store):
+    store.add("mood", "abc", {"Fierce": 80}, "gpt-4o-mini")
+    assert store.lookup("mood", "abc", "gpt-4o-mini", max_age=60) == {"Fierce": 80}
+    time.sleep(0.05)
+    assert store.lookup("mood", "abc", "gpt-4o-mini", max_age=0.01) is None
+
+
+def test_page_filters_by_case_insensitive_style_prefix(store):
+    for style in ("Boho chic", "boho summer", "modern boho", "100% cotton", "100 percent linen", "a_b", "axb"):
+        store.add("caption", style, "caption", "gpt-4o-mini", style)
+
+    rows, total = store.page(style_description="BOHO")
+    assert total == 2
+    assert {row["style_description"] for row in rows} == {"Boho chic", "boho summer"}
+    # LIKE wildcards in the filter match literally
+    assert [row["style_description"] for row in store.page(style_description="100%")[0]] == ["100% cotton"]
+    assert [row["style_description"] for row in store.page(style_description="a_")[0]] == ["a_b"]
+
+
+def test_page_orders_newest_first_and_paginates(store):
+    for i in range(5):
+        store.add("mood", f"hash{i}", {"i": i}, "gpt-4o-mini")
+    rows, total = store.page(page=1, page_size=2, kind="mood", model="gpt-4o-mini")
+    assert total == 5
+    assert [row["result"]["i"] for row in rows] == [2, 1]
+    assert store.count(kind="caption") == 0
+    assert store.models() == ["gpt-4o-mini"]
+
+
+def test_style_filter_uses_the_style_index(store):
+    clause, params = store._filters(None, "boho", None)
+    plan = store._connect().execute(f"EXPLAIN QUERY PLAN SELECT * FROM results{clause}", params).fetchall()
+    assert any("idx_results_style" in row["detail"] for row in plan)
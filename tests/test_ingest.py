@@ -0,0 +1,92 @@
+import os
+
+import PyPDF2
+import pytest
+from docx import Document
+
+from ingest import DocumentIngester, find_documents, EXTRACTED, UNCHANGED, FAILED
+
+
+def write_docx(path, *paragraphs):
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+def write_pdf(path, pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, "wb") as pdf_file:
+        writer.write(pdf_file)
+
+
+@pytest.fixture
+def documents(tmp_path):
+    folder = tmp_path / "docs"
+    (folder / "sheets").mkdir(parents=True)
+    write_docx(folder / "guide.docx", "Brand voice", "Warm and direct")
+    write_pdf(folder / "sheets" / "lookbook.pdf", 3)
+    (folder / "notes.txt").write_text("not a document")
+    (folder / "~$guide.docx").write_text("Word lock file")
+    return folder
+
+
+def ingest(ingester, folder):
+    return {os.path.basename(result["path"]): result for result in ingester.ingest(str(folder))}
+
+
+def test_find_documents(documents):
+    assert [os.path.relpath(path, documents) for path in find_documents(str(documents))] == \
+        ["guide.docx", os.path.join("sheets", "lookbook.pdf")]
+
+
+def test_rerun_skips_unchanged_files(documents, tmp_path):
+    output = tmp_path / "ingested"
+    ingester = DocumentIngester(str(output), max_workers=2)
+    results = ingest(ingester, documents)
+    assert {name: result["status"] for name, result in results.items()} == \
+        {"guide.docx": EXTRACTED, "lookbook.pdf": EXTRACTED}
+    assert results["lookbook.pdf"]["pages"] == 3
+    assert ingester.stats["pages"] == 4
+    assert ingester.text(documents / "guide.docx") == "Brand voice\nWarm and direct"
+
+    # A new ingester reads the manifest and skips both files without extracting them
+    ingester = DocumentIngester(str(output), max_workers=2)
+    results = ingest(ingester, documents)
+    assert {name: result["status"] for name, result in results.items()} == \
+        {"guide.docx": UNCHANGED, "lookbook.pdf": UNCHANGED}
+    assert results["lookbook.pdf"]["pages"] == 3
+    assert (ingester.stats[EXTRACTED], ingester.stats[UNCHANGED], ingester.stats["pages"]) == (0, 2, 0)
+    assert ingester.text(documents / "guide.docx") == "Brand voice\nWarm and direct"
+
+
+def test_touched_file_is_hashed_but_only_extracted_if_changed(documents, tmp_path):
+    output = tmp_path / "ingested"
+    ingester = DocumentIngester(str(output), max_workers=2)
+    ingest(ingester, documents)
+
+    # New modification time, same content: hashed in a worker, not extracted
+    guide = documents / "guide.docx"
+    os.utime(guide, ns=(guide.stat().st_atime_ns, guide.stat().st_mtime_ns + 10**9))
+    assert ingest(ingester, documents)["guide.docx"]["status"] == UNCHANGED
+    assert ingester.manifest[str(guide)]["mtime_ns"] == guide.stat().st_mtime_ns
+
+    write_docx(guide, "Brand voice", "Playful")
+    results = ingest(ingester, documents)
+    assert results["guide.docx"]["status"] == EXTRACTED
+    assert results["lookbook.pdf"]["status"] == UNCHANGED
+    assert ingester.text(guide) == "Brand voice\nPlayful"
+
+    assert {result["status"] for result in ingester.ingest(str(documents), force=True)} == {EXTRACTED}
+
+
+def test_unreadable_file_fails_without_stopping_the_run(documents, tmp_path):
+    (documents / "broken.pdf").write_bytes(b"not a pdf")
+    ingester = DocumentIngester(str(tmp_path / "ingested"), max_workers=2)
+    results = ingest(ingester, documents)
+    assert results["broken.pdf"]["status"] == FAILED
+    assert results["broken.pdf"]["error"]
+    assert results["guide.docx"]["status"] == EXTRACTED
+    assert str(documents / "broken.pdf") not in ingester.manifest
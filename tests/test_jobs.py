@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from jobs import JobQueue, session_owner, PENDING, DONE, FAILED, CANCELLED
+from scheduler import current_scheduling, scheduling
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=1)
+    yield queue
+    queue.shutdown(wait=False)
+
+
+def test_result_of_finished_job(queue):
+    job_id = queue.submit(sum, [1, 2, 3])
+    assert queue.result(job_id, timeout=5) == 6
+    assert queue.status(job_id) == DONE
+
+
+def test_failed_job_records_error(queue):
+    def fail():
+        raise ValueError("boom")
+
+    job_id = queue.submit(fail, name="fail")
+    with pytest.raises(RuntimeError, match="failed: boom"):
+        queue.result(job_id, timeout=5)
+    assert queue.status(job_id) == FAILED
+    assert queue.get(job_id).error == "boom"
+
+
+def test_cancel_pending_job(queue):
+    release = threading.Event()
+    blocker = queue.submit(release.wait, 5)
+    ran = []
+    pending = queue.submit(ran.append, "ran")
+    assert queue.status(pending) == PENDING
+
+    assert queue.cancel(pending)
+    release.set()
+    assert queue.result(blocker, timeout=5) is True
+    with pytest.raises(RuntimeError, match="cancelled"):
+        queue.result(pending, timeout=5)
+    assert queue.status(pending) == CANCELLED
+    assert ran == []
+    # Finished jobs cannot be cancelled
+    assert not queue.cancel(blocker)
+
+
+
+def test_queued_jobs_start_in_priority_order(queue):
+    release = threading.Event()
+    blocker = queue.submit(release.wait, 5)
+    order = []
+    job_ids = [queue.submit(order.append, priority, priority=priority)
+               for priority in ("batch", "background", "interactive")]
+    release.set()
+    queue.result(blocker, timeout=5)
+    for job_id in job_ids:
+        queue.result(job_id, timeout=5)
+    assert order == ["interactive", "background", "batch"]
+
+
+def test_jobs_run_under_their_owner(queue):
+    session_state = {}
+    owner = session_owner(session_state)
+    assert session_owner(session_state) == owner
+    assert session_owner({}) != owner
+
+    job_id = queue.submit(current_scheduling, priority="background", owner=owner)
+    assert queue.result(job_id, timeout=5) == ("background", owner)
+    # Without an explicit owner the submitter's context is used
+    with scheduling("batch", owner="run-1"):
+        job_id = queue.submit(current_scheduling)
+    assert queue.result(job_id, timeout=5) == ("batch", "run-1")
@@ -0,0 +1,19 @@
+import pytest
+
+# Imported up front as load_test.main does, so sessions don't spend the level importing it
+import utils  # noqa: F401
+from load_test import run_level, report_row
+
+
+@pytest.mark.parametrize("mode", ["direct", "jobs"])
+def test_every_request_of_every_level_reaches_the_api(mock_api, images, mode):
+    server, _ = mock_api
+    for sessions in (1, 2):
+        before = server.state.requests
+        stats = run_level(sessions, 0.5, images, mode, think_time=0)
+        count = len(stats.latencies["caption"]) + len(stats.latencies["mood"])
+        assert count > 0
+        assert stats.errors == 0
+        # None answered from the results cache; captions also embed their style description
+        assert server.state.requests - before >= count
+        assert report_row(sessions, stats).split()[:3] == [str(sessions), str(count), "0"]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import utils
+from mood_estimator import MOOD_CATEGORIES
+
+GOOD = {"Fierce": 80, "Minimalist": 20, "Whimsical": 10, "Elegant": 60, "Casual": 30, "Romantic": 15}
+OTHER = {"Fierce": 10, "Minimalist": 90, "Whimsical": 5, "Elegant": 70, "Casual": 40, "Romantic": 20}
+FLAT = {mood: 50 for mood in MOOD_CATEGORIES}
+
+
+@pytest.fixture
+def image_paths(tmp_path, images):
+    paths = []
+    for i, image in enumerate(images[:2]):
+        path = tmp_path / f"outfit{i}.jpg"
+        path.write_bytes(image)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Answers multi-image prompts with `responses['batch']` and single ones with `responses['single']`."""
+    responses = {"batch": None, "single": GOOD, "calls": []}
+
+    def generate_image_description(image_paths, instructions, model='gpt-4o-mini', budget=None,
+                                   return_usage=False, n=1):
+        responses["calls"].append((len(image_paths), model))
+        key = "batch" if len(image_paths) > 1 else "single"
+        return json.dumps(responses[key]), {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110}
+
+    monkeypatch.setattr(utils.genai, "generate_image_description", generate_image_description)
+    return responses
+
+
+def test_entries_are_mapped_by_image_number(image_paths, responses):
+    responses["batch"] = {"results": [{"image": 2, "scores": OTHER}, {"image": 1, "scores": GOOD}]}
+    results = utils.get_outfit_mood_scores_batch(image_paths, use_cache=False)
+
+    assert [result["scores"] for result in results] == [GOOD, OTHER]
+    assert [result["source"] for result in results] == ["api", "api"]
+    assert responses["calls"] == [(2, "gpt-4o-mini")]
+
+
+def test_duplicated_entries_are_not_trusted(image_paths, responses):
+    responses["batch"] = {"results": [{"image": 1, "scores": GOOD}, {"image": 1, "scores": OTHER},
+                                      {"image": 2, "scores": OTHER}]}
+    results = utils.get_outfit_mood_scores_batch(image_paths, use_cache=False)
+
+    assert results[0]["source"] == "fallback"
+    assert results[1] == {"image_path": image_paths[1], "scores": OTHER, "source": "api"}
+    # The incomplete response was retried on the stronger model first
+    assert responses["calls"] == [(2, "gpt-4o-mini"), (2, "gpt-4o")]
+
+
+def test_malformed_entries_are_ignored(image_paths, responses):
+    responses["batch"] = {"results": [{"image": 3, "scores": GOOD}, {"image": "2", "scores": GOOD},
+                                      {"image": 1, "scores": "high"}, {"image": 2, "scores": OTHER}]}
+    results = utils.get_outfit_mood_scores_batch(image_paths, use_cache=False)
+
+    assert [result["source"] for result in results] == ["fallback", "api"]
+    assert results[1]["scores"] == OTHER
+
+
+def test_flat_entries_are_scored_alone(image_paths, responses):
+    responses["batch"] = {"results": [{"image": 1, "scores": GOOD}, {"image": 2, "scores": FLAT}]}
+    results = utils.get_outfit_mood_scores_batch(image_paths, use_cache=False)
+
+    assert results[0]["scores"] == GOOD
+    assert results[1] == {"image_path": image_paths[1], "scores": GOOD, "source": "api"}
+    assert responses["calls"] == [(2, "gpt-4o-mini"), (1, "gpt-4o-mini")]
+
+
+def test_missing_moods_are_filled_locally(image_paths, responses):
+    partial = {mood: score for mood, score in OTHER.items() if mood != "Romantic"}
+    responses["batch"] = {"results": [{"image": 1, "scores": GOOD}, {"image": 2, "scores": partial}]}
+    results = utils.get_outfit_mood_scores_batch(image_paths, use_cache=False)
+
+    assert set(results[1]["scores"]) == set(MOOD_CATEGORIES)
+    assert {mood: results[1]["scores"][mood] for mood in partial} == partial
@@ -0,0 +1,20 @@
+from mood_estimator import MOOD_CATEGORIES, estimate_mood_scores, score_margin
+
+
+def test_scores_every_mood_in_range(image_path):
+    scores = estimate_mood_scores(image_path)
+    assert set(scores) == set(MOOD_CATEGORIES)
+    assert all(0 <= score <= 100 for score in scores.values())
+
+
+def test_same_image_from_path_or_bytes(image_path, image_bytes):
+    assert estimate_mood_scores(image_path) == estimate_mood_scores(image_bytes)
+    assert estimate_mood_scores(image_bytes) == estimate_mood_scores(memoryview(image_bytes))
+
+
+def test_different_images_score_differently(images):
+    assert estimate_mood_scores(images[0]) != estimate_mood_scores(images[2])
+
+
+def test_score_margin():
+    assert score_margin({"Fierce": 80, "Elegant": 65, "Casual": 10}) == 15
@@ -0,0 +1,86 @@
+import io
+import json
+import time
+from collections import defaultdict
+
+import pytest
+
+import profiling
+from profiling import section, timed, profile_request, REQUESTS_LOG
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """Enables profiling into a temporary directory, with fresh process totals."""
+    monkeypatch.setattr(profiling, "_totals", defaultdict(lambda: [0, 0.0, 0.0]))
+    yield lambda mode: profiling.enable(mode, str(tmp_path)) or tmp_path
+    profiling.enable(profiling.OFF)
+
+
+def read_log(directory):
+    with open(directory / REQUESTS_LOG, encoding="utf-8") as log:
+        return [json.loads(line) for line in log]
+
+
+@timed("encode")
+def encode():
+    time.sleep(0.01)
+    return "encoded"
+
+
+def test_disabled_hooks_record_nothing(profile_dir, tmp_path):
+    with profile_request("caption"):
+        with section("chart"):
+            pass
+        assert encode() == "encoded"
+    assert profiling.stats() == {}
+    assert not (tmp_path / REQUESTS_LOG).exists()
+
+
+def test_request_log_has_section_totals(profile_dir):
+    directory = profile_dir(profiling.TIMERS)
+    with profile_request("caption"):
+        encode()
+        encode()
+        with section("chart"):
+            pass
+    with pytest.raises(ValueError):
+        with profile_request("mood"):
+            raise ValueError("bad json")
+
+    caption, mood = read_log(directory)
+    assert (caption["name"], caption["error"], caption["profile"]) == ("caption", None, None)
+    assert set(caption["sections"]) == {"encode", "chart"}
+    assert caption["sections"]["encode"] >= 0.02
+    assert caption["seconds"] >= caption["sections"]["encode"]
+    assert (mood["error"], mood["sections"]) == ("ValueError", {})
+    stats = profiling.stats()
+    assert (stats["encode"]["calls"], stats["chart"]["calls"]) == (2, 1)
+
+
+def test_cprofile_dump_and_report(profile_dir):
+    directory = profile_dir(profiling.CPROFILE)
+    with profile_request("lookbook/batch"):
+        encode()
+    entry, = read_log(directory)
+    assert entry["profile"].startswith("lookbook_batch-")
+    assert (directory / entry["profile"]).exists()
+
+    out = io.StringIO()
+    profiling.report(str(directory), top=5, out=out)
+    text = out.getvalue()
+    assert "1 requests, 0 failed" in text
+    assert "lookbook/batch" in text
+    assert "encode" in text
+    assert "cProfile dumps" in text
+
+
+def test_report_without_requests(tmp_path):
+    out = io.StringIO()
+    profiling.report(str(tmp_path), out=out)
+    assert out.getvalue().startswith("No profiled requests")
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        profiling.enable("sampling")
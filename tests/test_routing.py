@@ -0,0 +1,107 @@
+import time
+
+import httpx
+import openai
+import pytest
+
+from genai import CircuitOpenError
+from routing import ModelRouter
+from token_budget import TokenBudgetExceeded
+
+
+def api_error(error_class, status):
+    request = httpx.Request("POST", "http://api.test/v1/chat/completions")
+    return error_class("upstream said no", response=httpx.Response(status, request=request), body=None)
+
+
+def scripted(outcomes):
+    """Returns an attempt function answering each model from `outcomes`, recording the calls."""
+    calls = []
+
+    def attempt(model):
+        calls.append(model)
+        outcome = outcomes[model]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return attempt, calls
+
+
+def validate(value):
+    return None if value.startswith("good") else "invalid"
+
+
+def test_first_valid_answer_wins():
+    router = ModelRouter(["mini", "large"])
+    attempt, calls = scripted({"mini": "good mini", "large": "good large"})
+    assert router.run("caption", attempt, validate) == ("good mini", "mini")
+    assert calls == ["mini"]
+    assert router.stats()["caption"]["escalation_rate"] == 0.0
+
+
+def test_invalid_answer_escalates():
+    router = ModelRouter(["mini", "large"])
+    attempt, calls = scripted({"mini": "bad", "large": "good large"})
+    assert router.run("mood", attempt, validate) == ("good large", "large")
+    assert calls == ["mini", "large"]
+
+    # With every model invalid, the last answer is returned
+    attempt, _ = scripted({"mini": "bad", "large": "worse"})
+    assert router.run("mood", attempt, validate) == ("worse", "large")
+    stats = router.stats()["mood"]
+    assert (stats["calls"], stats["escalated"]) == (2, 2)
+    assert stats["reasons"] == {"invalid": 3}
+    assert stats["models"] == {"large": 2}
+
+
+def test_rejected_request_escalates():
+    router = ModelRouter(["mini", "large"])
+    attempt, calls = scripted({"mini": api_error(openai.BadRequestError, 400), "large": "good large"})
+    assert router.run("caption", attempt, validate) == ("good large", "large")
+    assert router.stats()["caption"]["reasons"] == {"error: BadRequestError": 1}
+
+    attempt, calls = scripted({"mini": api_error(openai.NotFoundError, 404),
+                               "large": api_error(openai.BadRequestError, 400)})
+    with pytest.raises(openai.BadRequestError):
+        router.run("caption", attempt, validate)
+    assert calls == ["mini", "large"]
+
+
+@pytest.mark.parametrize("error", [
+    api_error(openai.RateLimitError, 429),
+    api_error(openai.InternalServerError, 500),
+    openai.APITimeoutError(httpx.Request("POST", "http://api.test")),
+    CircuitOpenError("circuit open"),
+    TokenBudgetExceeded("no tokens left"),
+])
+def test_transient_and_budget_errors_do_not_escalate(error):
+    router = ModelRouter(["mini", "large"])
+    attempt, calls = scripted({"mini": error, "large": "good large"})
+    with pytest.raises(type(error)):
+        router.run("caption", attempt, validate)
+    assert calls == ["mini"]
+    stats = router.stats()["caption"]
+    assert stats["models"] == {"failed": 1}
+    assert stats["reasons"] == {f"error: {type(error).__name__}": 1}
+
+
+def test_latency_budget_stops_escalation():
+    router = ModelRouter(["mini", "large"], latency_budget=0.05)
+
+    def attempt(model):
+        time.sleep(0.1 if model == "large" else 0)
+        return "bad"
+
+    # The large model's latency is unknown at first, so it is tried once
+    assert router.run("mood", attempt, validate) == ("bad", "large")
+    assert router.expected_latency("large") >= 0.1
+    assert router.run("mood", attempt, validate) == ("bad", "mini")
+    assert router.stats()["mood"]["reasons"] == {"invalid": 3, "latency budget": 1}
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("MODEL_CASCADE", "a, b ,")
+    monkeypatch.setenv("ROUTING_LATENCY_BUDGET", "2.5")
+    router = ModelRouter.from_env()
+    assert (router.models, router.latency_budget) == (["a", "b"], 2.5)
@@ -0,0 +1,91 @@
+import time
+import threading
+
+import pytest
+
+from scheduler import PriorityScheduler, scheduling, current_scheduling, parse_class_limits, \
+    INTERACTIVE, BACKGROUND, BATCH
+
+
+def queue_waiters(scheduler, requests):
+    """Starts one thread per (priority, owner) that records the order it is granted a slot."""
+    order = []
+    threads = []
+    for priority, owner in requests:
+        def wait(priority=priority, owner=owner):
+            scheduler.acquire(priority, owner, timeout=5)
+            order.append((priority, owner))
+            scheduler.release(priority)
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        threads.append(thread)
+        # Wait until the thread is queued so arrival order is deterministic
+        while sum(stats["waiting"] for stats in scheduler.stats().values()) < len(threads):
+            time.sleep(0.001)
+    return order, threads
+
+
+def test_scheduling_sets_context():
+    assert current_scheduling() == (INTERACTIVE, None)
+    with scheduling(BATCH, owner="run-1"):
+        assert current_scheduling() == (BATCH, "run-1")
+    assert current_scheduling() == (INTERACTIVE, None)
+    with pytest.raises(ValueError):
+        with scheduling("urgent"):
+            pass
+
+
+def test_higher_classes_are_served_first():
+    scheduler = PriorityScheduler(max_concurrent=1)
+    held = scheduler.acquire(INTERACTIVE)
+    order, threads = queue_waiters(scheduler, [(BATCH, None), (BACKGROUND, None), (INTERACTIVE, None)])
+    scheduler.release(held)
+    for thread in threads:
+        thread.join(5)
+    assert [priority for priority, _ in order] == [INTERACTIVE, BACKGROUND, BATCH]
+
+
+def test_owners_take_turns_within_a_class():
+    scheduler = PriorityScheduler(max_concurrent=1)
+    held = scheduler.acquire(BACKGROUND)
+    order, threads = queue_waiters(scheduler, [(BACKGROUND, "a"), (BACKGROUND, "a"), (BACKGROUND, "a"),
+                                               (BACKGROUND, "b"), (BACKGROUND, "b")])
+    scheduler.release(held)
+    for thread in threads:
+        thread.join(5)
+    assert [owner for _, owner in order] == ["a", "b", "a", "b", "a"]
+
+
+def test_class_limits_keep_a_slot_for_interactive_calls():
+    scheduler = PriorityScheduler(max_concurrent=3, class_limits={BACKGROUND: 1, BATCH: 1})
+    assert scheduler.try_acquire(BACKGROUND) == BACKGROUND
+    assert scheduler.try_acquire(BACKGROUND) is None
+    assert scheduler.try_acquire(BATCH) == BATCH
+    assert scheduler.try_acquire(INTERACTIVE) == INTERACTIVE
+    # Every slot is taken now
+    assert scheduler.try_acquire(INTERACTIVE) is None
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(INTERACTIVE, timeout=0.05)
+    assert scheduler.stats()[INTERACTIVE]["waiting"] == 0
+
+
+def test_try_acquire_does_not_overtake_waiting_calls():
+    scheduler = PriorityScheduler(max_concurrent=3, class_limits={BACKGROUND: 1})
+    held = scheduler.acquire(BACKGROUND)
+    order, threads = queue_waiters(scheduler, [(BACKGROUND, None)])
+    # Slots are free, but a background call is waiting for one
+    assert scheduler.try_acquire(BATCH) is None
+    assert scheduler.try_acquire(BACKGROUND) is None
+    assert scheduler.try_acquire(INTERACTIVE) == INTERACTIVE
+    scheduler.release(INTERACTIVE)
+    scheduler.release(held)
+    for thread in threads:
+        thread.join(5)
+    assert order == [(BACKGROUND, None)]
+
+
+def test_parse_class_limits():
+    assert parse_class_limits(" interactive=6, batch=2 ,") == {INTERACTIVE: 6, BATCH: 2}
+    with pytest.raises(ValueError):
+        PriorityScheduler(class_limits={"urgent": 1})
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from genai import GenAI, SingleFlight
+from scheduler import scheduling
+
+
+def test_concurrent_calls_share_one_result():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(single_flight.do, "key", work)
+        started.wait(5)
+        followers = [pool.submit(single_flight.do, "key", work) for _ in range(3)]
+        assert single_flight.in_flight() == 1
+        release.set()
+        results = [future.result(5) for future in [leader] + followers]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert single_flight.in_flight() == 0
+    # Once the call is done the key is forgotten
+    assert single_flight.do("key", lambda: "again") == "again"
+
+
+def test_errors_are_shared_and_forgotten():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", fail)
+    assert single_flight.in_flight() == 0
+
+
+def test_identical_image_requests_make_one_api_call(start_mock, image_path):
+    server, base_url = start_mock(latency=0.3)
+    genai = GenAI("test", base_url=base_url, transport=False)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: genai.generate_image_description([image_path], "Describe it"), range(4)))
+
+    assert len(set(results)) == 1
+    assert server.state.requests == 1
+
+
+def test_requests_of_different_priority_classes_are_not_coalesced(start_mock, image_path):
+    server, base_url = start_mock(latency=0.3)
+    genai = GenAI("test", base_url=base_url, transport=False)
+
+    def describe(priority):
+        with scheduling(priority):
+            return genai.generate_image_description([image_path], "Describe it")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(describe, ["interactive", "batch"]))
+
+    assert server.state.requests == 2
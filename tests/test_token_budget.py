@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+import pytest
+
+from genai import GenAI, DESCRIPTION_MAX_TOKENS
+from token_budget import (TokenBudget, TokenBudgetExceeded, estimate_image_tokens, plan_image_request,
+                          scaled_size)
+
+
+@pytest.mark.parametrize("width, height, detail, model, tokens", [
+    # OpenAI's documented examples for gpt-4o
+    (1024, 1024, "high", "gpt-4o", 765),
+    (2048, 4096, "high", "gpt-4o", 1105),
+    (4096, 8192, "low", "gpt-4o", 85),
+    # Small images are one tile
+    (300, 200, "high", "gpt-4o", 255),
+    (512, 512, "high", "gpt-4o-mini", 2833 + 5667),
+    # Unknown models use the gpt-4o rates
+    (1024, 1024, "auto", "some-model", 765),
+])
+def test_image_tokens(width, height, detail, model, tokens):
+    assert estimate_image_tokens(width, height, detail, model) == tokens
+
+
+def test_scaled_size_keeps_aspect_ratio():
+    assert scaled_size(4000, 3000, 1024) == (1024, 768)
+    assert scaled_size(800, 600, 1024) == (800, 600)
+
+
+def test_plan_picks_the_least_downscaling_that_fits():
+    sizes = [(2048, 2048)]
+    full = plan_image_request(sizes, "Describe it", "gpt-4o")
+    assert (full["detail"], full["max_side"]) == ("high", None)
+
+    text_tokens = full["tokens"] - 765
+    plan = plan_image_request(sizes, "Describe it", "gpt-4o", max_tokens=text_tokens + 300)
+    assert (plan["detail"], plan["max_side"], plan["tokens"]) == ("high", 512, text_tokens + 255)
+
+    plan = plan_image_request(sizes, "Describe it", "gpt-4o", max_tokens=text_tokens + 100)
+    assert (plan["detail"], plan["tokens"]) == ("low", text_tokens + 85)
+
+    with pytest.raises(TokenBudgetExceeded):
+        plan_image_request(sizes, "Describe it", "gpt-4o", max_tokens=text_tokens + 50)
+
+
+def test_reservations_count_against_the_session():
+    budget = TokenBudget(per_call=800, per_session=1000)
+    budget.reserve(600)
+    assert budget.remaining() == 400
+    with pytest.raises(TokenBudgetExceeded):
+        budget.reserve(600)
+    with pytest.raises(TokenBudgetExceeded):
+        budget.reserve(900)
+    assert budget.reserved == 600
+
+    budget.settle(600, 650)
+    assert (budget.spent, budget.reserved, budget.remaining()) == (650, 0, 350)
+    budget.reserve(300)
+    budget.release(300)
+    assert (budget.spent, budget.reserved) == (650, 0)
+
+
+def test_output_tokens_are_reserved_but_not_limited_per_call():
+    budget = TokenBudget(per_call=500, per_session=2000)
+    assert budget.limit(output_tokens=1600) == 400
+    assert budget.limit(output_tokens=3000) == 0
+    budget.reserve(400, output_tokens=1000)
+    assert budget.reserved == 1400
+    with pytest.raises(TokenBudgetExceeded):
+        budget.reserve(100, output_tokens=1000)
+    budget.settle(1400, 900)
+    assert (budget.spent, budget.reserved) == (900, 0)
+
+
+def test_concurrent_requests_cannot_overspend(start_mock, image_path):
+    server, base_url = start_mock(latency=0.3)
+    genai = GenAI("test", base_url=base_url, transport=False)
+    # Room for one high-detail request of the small test image, not two even at low detail
+    single = genai.estimate_image_description([image_path], "Describe it 0")["tokens"]
+    budget = TokenBudget(per_session=single + DESCRIPTION_MAX_TOKENS + 100)
+
+    def describe(i):
+        try:
+            return genai.generate_image_description([image_path], f"Describe it {i}", budget=budget)
+        except TokenBudgetExceeded:
+            return None
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(describe, range(3)))
+
+    assert sum(result is not None for result in results) == 1
+    assert server.state.requests == 1
+    assert budget.reserved == 0
+    assert budget.spent > 0
+
+
+def test_failed_request_releases_its_reservation(start_mock, image_path):
+    _, base_url = start_mock(error_rate=1.0)
+    genai = GenAI("test", base_url=base_url, transport=False, circuit_breaker=False)
+    genai.client = genai.client.with_options(max_retries=0)
+    budget = TokenBudget(per_session=100_000)
+
+    with pytest.raises(openai.InternalServerError):
+        genai.generate_image_description([image_path], "Describe it", budget=budget)
+    assert (budget.spent, budget.reserved) == (0, 0)
+
+
+def test_budget_covers_the_output_of_every_variant(start_mock, image_path):
+    server, base_url = start_mock()
+    genai = GenAI("test", base_url=base_url, transport=False)
+    plan = genai.estimate_image_description([image_path], "Describe it", "gpt-4o", n=3)
+    assert plan["output_tokens"] == 3 * DESCRIPTION_MAX_TOKENS
+    # Enough for the input and one description's output, not three even at low detail
+    budget = TokenBudget(per_session=plan["tokens"] + 2 * DESCRIPTION_MAX_TOKENS)
+
+    with pytest.raises(TokenBudgetExceeded):
+        genai.generate_image_description([image_path], "Describe it", "gpt-4o", budget=budget, n=3)
+    assert server.state.requests == 0
+
+    genai.generate_image_description([image_path], "Describe it", "gpt-4o", budget=budget)
+    assert server.state.requests == 1
+    assert budget.reserved == 0
@@ -0,0 +1,53 @@
+import pytest
+
+from genai import GenAI
+
+
+@pytest.fixture
+def genai():
+    return GenAI("test", transport=False)
+
+
+def test_exact_overlap_is_removed(genai):
+    assert genai.stitch_transcripts(["a red dress with white", "with white shoes"]) == \
+        "a red dress with white shoes"
+
+
+def test_overlap_matches_ignore_case_and_punctuation(genai):
+    assert genai.stitch_transcripts(["Hello there, friend.", "there friend how are you"]) == \
+        "Hello there, friend. how are you"
+
+
+def test_short_overlap_between_word_fragments_is_removed(genai):
+    texts = ["the blue shirt pairs well with den", "ans well with denim for a casual look"]
+    assert genai.stitch_transcripts(texts) == "the blue shirt pairs well with denim for a casual look"
+
+
+def test_long_overlap_between_word_fragments_is_removed(genai):
+    texts = ["this coat is warm enough for the coldest win", "er enough for the coldest winter days"]
+    assert genai.stitch_transcripts(texts) == "this coat is warm enough for the coldest winter days"
+
+
+def test_stray_common_word_is_not_taken_for_an_overlap(genai):
+    assert genai.stitch_transcripts(["I went to the", "ans the shop"]) == "I went to the ans the shop"
+
+
+def test_three_segments(genai):
+    texts = ["one two three four", "three four five six", "five six seven"]
+    assert genai.stitch_transcripts(texts) == "one two three four five six seven"
+
+
+def test_timed_transcripts_split_overlap_at_midpoint(genai):
+    # Segments start at 0s and 25s with 5s of overlap, so the cut is at 27.5s
+    first = ("a tailored jacket and den", [("a", 21.0), ("tailored", 22.0), ("jacket", 24.0), ("and", 26.0),
+                                            ("den", 29.6)])
+    second = ("ket and denim jeans", [("ket", 0.0), ("and", 1.0), ("denim", 3.0), ("jeans", 4.0)])
+    assert genai.stitch_timed_transcripts([first, second], [0.0, 25.0], 5.0) == \
+        "a tailored jacket and denim jeans"
+
+
+def test_timed_transcripts_use_the_timestamped_words(genai):
+    # Whisper's text and word list can tokenize differently; only the word list is used
+    first = ("a well-known brand", [("a", 1.0), ("well", 2.0), ("known", 2.3), ("brand", 3.0)])
+    second = ("brand new, season", [("brand", 1.0), ("new", 3.0), ("season", 3.5)])
+    assert genai.stitch_timed_transcripts([first, second], [0.0, 2.0], 2.0) == "a well known brand new season"
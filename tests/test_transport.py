@@ -0,0 +1,36 @@
+import httpx
+
+from genai import GenAI
+from transport import TransportSettings, get_http_client
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("OPENAI_MAX_CONNECTIONS", "10")
+    monkeypatch.setenv("OPENAI_KEEPALIVE_EXPIRY", "30")
+    monkeypatch.setenv("OPENAI_HTTP2", "true")
+    monkeypatch.setenv("OPENAI_PROXY", "")
+    settings = TransportSettings.from_env()
+    assert (settings.max_connections, settings.keepalive_expiry, settings.http2, settings.proxy) == \
+        (10, 30.0, True, None)
+
+
+def test_client_options():
+    options = TransportSettings(max_connections=7, keepalive_expiry=45).client_options()
+    assert isinstance(options["limits"], httpx.Limits)
+    assert options["limits"].max_connections == 7
+    assert options["limits"].keepalive_expiry == 45
+
+
+def test_equal_settings_share_one_client():
+    assert get_http_client(TransportSettings()) is get_http_client(TransportSettings())
+    assert get_http_client(TransportSettings()) is not get_http_client(TransportSettings(max_connections=3))
+
+
+def test_genai_uses_the_shared_pool(mock_api, image_path):
+    _, base_url = mock_api
+    settings = TransportSettings(read_timeout=10)
+    first, second = GenAI("test", base_url=base_url, transport=settings), GenAI("test", base_url=base_url,
+                                                                                transport=settings)
+    assert first.client._client is second.client._client
+    assert first.generate_image_description([image_path], "Describe it")
+    assert first.warm_up()
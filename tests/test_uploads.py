@@ -0,0 +1,71 @@
+import io
+
+from PIL import Image
+
+from uploads import THUMBNAIL_SIDE, API_SIDE, prepare_upload, get_upload_renditions
+
+
+def _encoded(size, format="JPEG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (90, 120, 200)).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class FakeUpload:
+    """The parts of Streamlit's UploadedFile that get_upload_renditions uses."""
+    def __init__(self, file_id, data):
+        self.file_id = file_id
+        self.data = data
+        self.reads = 0
+
+    def getvalue(self):
+        self.reads += 1
+        return self.data
+
+
+def _size(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_small_jpeg_is_sent_as_is():
+    data = _encoded((800, 600))
+    renditions = prepare_upload(data)
+    assert renditions.api_image is data
+    assert renditions.size == (800, 600)
+    assert max(_size(renditions.thumbnail)) == THUMBNAIL_SIDE
+
+
+def test_other_buffers_are_copied():
+    data = bytearray(_encoded((800, 600)))
+    renditions = prepare_upload(memoryview(data))
+    assert isinstance(renditions.api_image, bytes)
+    assert renditions.api_image == bytes(data)
+
+
+def test_large_or_non_jpeg_images_are_reencoded():
+    renditions = prepare_upload(_encoded((3000, 1500)))
+    assert _size(renditions.api_image) == (API_SIDE, API_SIDE // 2)
+    assert renditions.size == (3000, 1500)
+
+    renditions = prepare_upload(_encoded((400, 300), "PNG"))
+    assert renditions.api_image[:2] == b"\xff\xd8"
+    assert _size(renditions.api_image) == (400, 300)
+
+
+def test_renditions_are_cached_per_upload():
+    session_state = {}
+    upload = FakeUpload("a", _encoded((640, 480)))
+    first = get_upload_renditions(upload, session_state)
+    assert get_upload_renditions(upload, session_state) is first
+    assert upload.reads == 1
+
+
+def test_cache_keeps_the_most_recent_uploads():
+    session_state = {}
+    uploads = [FakeUpload(str(i), _encoded((64, 64))) for i in range(4)]
+    for upload in uploads[:3]:
+        get_upload_renditions(upload, session_state, max_cached=2)
+    get_upload_renditions(uploads[1], session_state, max_cached=2)
+    get_upload_renditions(uploads[3], session_state, max_cached=2)
+    assert list(session_state["upload_renditions"]) == ["1", "3"]
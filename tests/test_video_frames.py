@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+import pytest
+
+from genai import GenAI, VIDEO_FRAME_SIDES, VIDEO_JPEG_QUALITIES
+
+
+@pytest.fixture
+def genai():
+    return GenAI("test", transport=False)
+
+
+def _noise(height, width, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+def _flat(height, width):
+    return np.full((height, width, 3), 120, dtype=np.uint8)
+
+
+@pytest.fixture
+def encodes(monkeypatch):
+    """Counts JPEG encodes."""
+    calls = []
+    imencode = cv2.imencode
+
+    def counting(*args, **kwargs):
+        calls.append(args[1].shape)
+        return imencode(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "imencode", counting)
+    return calls
+
+
+def test_frames_fit_the_payload_budget(genai):
+    frames = [_noise(720, 1280, seed) for seed in range(4)]
+    encoded, stats = genai.encode_frames(frames, target_bytes=400_000)
+    assert len(encoded) == 4
+    assert stats["payload_bytes"] == sum(map(len, encoded)) <= 400_000
+
+
+def test_frame_sizes_above_the_frame_are_skipped(genai, encodes):
+    # A small noisy frame that fits at no quality: only its own size is tried
+    _, stats = genai.encode_frames([_noise(200, 300)], target_bytes=1000)
+    assert len(encodes) == len(VIDEO_JPEG_QUALITIES)
+    assert stats["frame_settings"][0][:2] == (300, VIDEO_JPEG_QUALITIES[-1])
+
+
+def test_small_frames_keep_their_size_and_top_quality(genai):
+    _, stats = genai.encode_frames([_flat(600, 800)], target_bytes=1_000_000)
+    assert stats["frame_settings"][0][:2] == (800, VIDEO_JPEG_QUALITIES[0])
+
+
+def test_settings_move_back_up_after_a_large_frame(genai):
+    frames = [_noise(1536, 2048), _flat(1536, 2048), _flat(1536, 2048)]
+    _, stats = genai.encode_frames(frames, target_bytes=300_000)
+    (first_side, first_quality, _), second, third = stats["frame_settings"]
+    assert (first_side, first_quality) != (VIDEO_FRAME_SIDES[0], VIDEO_JPEG_QUALITIES[0])
+    assert second[:2] == third[:2] == (VIDEO_FRAME_SIDES[0], VIDEO_JPEG_QUALITIES[0])
+
+
+def test_without_a_budget_frames_are_sent_as_is(genai):
+    _, stats = genai.encode_frames([_flat(100, 200)])
+    assert stats["frame_settings"][0][:2] == (200, None)
@@ -0,0 +1,268 @@
+import math
+import threading
+from PIL import Image
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a characters-per-token estimate
+    tiktoken = None
+
+# Image token accounting per model: (base tokens, tokens per 512px tile) for detail='high';
+# detail='low' costs the base tokens only. gpt-4o-mini bills images at a higher token
+# count so that image cost roughly matches gpt-4o.
+IMAGE_TOKEN_RATES = {
+    'gpt-4o': (85, 170),
+    'gpt-4o-mini': (2833, 5667),
+}
+DEFAULT_IMAGE_TOKEN_RATES = (85, 170)
+
+# Approximate input price in USD per 1M tokens; override entries to match current pricing.
+INPUT_PRICE_PER_MILLION = {
+    'gpt-4o': 2.50,
+    'gpt-4o-mini': 0.15,
+}
+
+# Fixed overhead per chat message (role and formatting tokens)
+MESSAGE_OVERHEAD_TOKENS = 7
+
+# (detail, longest side in pixels) settings tried in order until the request fits.
+# None keeps the original size (the API still fits it within 2048x2048).
+DOWNSCALE_LADDER = [
+    ('high', None),
+    ('high', 1536),
+    ('high', 1024),
+    ('high', 768),
+    ('high', 512),
+    ('low', 512),
+]
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a request cannot fit within the per-call or per-session token budget."""
+
+
+class TokenBudget:
+    """
+    Tracks token spend against optional per-call and per-session limits.
+
+    Thread-safe, so one budget can be shared by background jobs of the same
+    Streamlit session. Requests in flight hold a reservation for their estimated
+    tokens (see `reserve`), so concurrent requests cannot all pass the check
+    against the same remaining balance.
+
+    Attributes:
+    ----------
+    per_call : int or None
+        Maximum estimated input tokens for a single request.
+    per_session : int or None
+        Maximum total tokens across all requests charged to this budget.
+    spent : int
+        Tokens charged so far.
+    reserved : int
+        Tokens held by requests that are still in flight.
+    """
+    def __init__(self, per_call=None, per_session=None):
+        self.per_call = per_call
+        self.per_session = per_session
+        self.spent = 0
+        self.reserved = 0
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Returns the tokens left in the session budget, net of reservations, or None if unlimited."""
+        if self.per_session is None:
+            return None
+        with self._lock:
+            return self._remaining()
+
+    def _remaining(self):
+        return max(0, self.per_session - self.spent - self.reserved)
+
+    def limit(self, output_tokens=0):
+        """
+        Returns the most input tokens the next request may use, or None if unlimited,
+        leaving room in the session budget for `output_tokens` of completion.
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            remaining = max(0, remaining - output_tokens)
+        limits = [value for value in (self.per_call, remaining) if value is not None]
+        return min(limits) if limits else None
+
+    def check(self, tokens):
+        """
+        Raises TokenBudgetExceeded if a request estimated at `tokens` would exceed a limit.
+        """
+        if self.per_call is not None and tokens > self.per_call:
+            raise TokenBudgetExceeded(f"Request needs ~{tokens} tokens; per-call limit is {self.per_call}")
+        remaining = self.remaining()
+        if remaining is not None and tokens > remaining:
+            raise TokenBudgetExceeded(f"Request needs ~{tokens} tokens; {remaining} left in session budget")
+
+    def reserve(self, tokens, output_tokens=0):
+        """
+        Checks a request estimated at `tokens` input tokens, plus up to `output_tokens`
+        of completion, against the limits and holds the total until the request is
+        settled or released, in one atomic step. The per-call limit applies to input.
+
+        Raises:
+        ------
+        TokenBudgetExceeded
+            If the request would exceed a limit; nothing is reserved.
+        """
+        if self.per_call is not None and tokens > self.per_call:
+            raise TokenBudgetExceeded(f"Request needs ~{tokens} tokens; per-call limit is {self.per_call}")
+        total = tokens + output_tokens
+        with self._lock:
+            if self.per_session is not None and total > self._remaining():
+                raise TokenBudgetExceeded(
+                    f"Request needs up to ~{total} tokens; {self._remaining()} left in session budget")
+            self.reserved += total
+
+    def settle(self, reserved, tokens):
+        """Replaces a reservation of `reserved` tokens with the `tokens` actually used."""
+        with self._lock:
+            self.reserved -= reserved
+            self.spent += tokens
+
+    def release(self, reserved):
+        """Gives back a reservation of a request that failed."""
+        with self._lock:
+            self.reserved -= reserved
+
+    def charge(self, tokens):
+        """Adds `tokens` to the amount spent."""
+        with self._lock:
+            self.spent += tokens
+
+
+def estimate_text_tokens(text, model='gpt-4o-mini'):
+    """
+    Estimates the number of tokens in `text`.
+
+    Uses tiktoken when it is installed, otherwise about four characters per token.
+    """
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding('o200k_base')
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def scaled_size(width, height, max_side=None):
+    """Returns (width, height) shrunk so the longest side is at most `max_side`."""
+    if max_side is None or max(width, height) <= max_side:
+        return width, height
+    scale = max_side / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def estimate_image_tokens(width, height, detail='high', model='gpt-4o-mini'):
+    """
+    Estimates the input tokens of one image from its dimensions.
+
+    Follows OpenAI's documented accounting: with detail='high' the image is fit within
+    2048x2048, its shortest side scaled to 768px, and billed per 512px tile plus a base
+    amount; detail='low' is billed the base amount only.
+
+    Parameters:
+    ----------
+    width, height : int
+        Image dimensions in pixels.
+    detail : str, optional
+        'high' (default), 'low' or 'auto' (treated as 'high', the worst case).
+    model : str, optional
+        The model the image is sent to (default is 'gpt-4o-mini').
+
+    Returns:
+    -------
+    int
+        Estimated image tokens.
+    """
+    base, per_tile = IMAGE_TOKEN_RATES.get(model, DEFAULT_IMAGE_TOKEN_RATES)
+    if detail == 'low':
+        return base
+
+    width, height = scaled_size(width, height, 2048)
+    if min(width, height) > 768:
+        width, height = scaled_size(width, height, round(768 * max(width, height) / min(width, height)))
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return base + per_tile * tiles
+
+
+def image_size(image_path):
+    """Returns (width, height) of an image, reading only its header."""
+    with Image.open(image_path) as image:
+        return image.size
+
+
+def estimate_request_tokens(image_sizes, instructions, model='gpt-4o-mini', detail='high', max_side=None):
+    """
+    Estimates the input tokens of a vision request.
+
+    Parameters:
+    ----------
+    image_sizes : list
+        (width, height) of each image.
+    instructions : str
+        The text prompt.
+    model : str, optional
+        The model the request is sent to (default is 'gpt-4o-mini').
+    detail : str, optional
+        Image detail level (default is 'high').
+    max_side : int, optional
+        Longest image side after downscaling, or None for the original size.
+
+    Returns:
+    -------
+    int
+        Estimated input tokens.
+    """
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_text_tokens(instructions, model)
+    for width, height in image_sizes:
+        width, height = scaled_size(width, height, max_side)
+        tokens += estimate_image_tokens(width, height, detail, model)
+    return tokens
+
+
+def estimate_cost(tokens, model='gpt-4o-mini'):
+    """Returns the approximate USD input cost of `tokens`, or None if the model is not priced."""
+    price = INPUT_PRICE_PER_MILLION.get(model)
+    if price is None:
+        return None
+    return tokens * price / 1_000_000
+
+
+def plan_image_request(image_sizes, instructions, model='gpt-4o-mini', max_tokens=None):
+    """
+    Picks the least aggressive detail/downscale setting that fits a token limit.
+
+    Parameters:
+    ----------
+    image_sizes : list
+        (width, height) of each image.
+    instructions : str
+        The text prompt.
+    model : str, optional
+        The model the request is sent to (default is 'gpt-4o-mini').
+    max_tokens : int, optional
+        Input token limit. If None, the original images are sent at high detail.
+
+    Returns:
+    -------
+    dict
+        Keys 'detail', 'max_side' (None for original size), 'tokens' and 'cost'.
+
+    Raises:
+    ------
+    TokenBudgetExceeded
+        If the request does not fit even at the smallest setting.
+    """
+    for detail, max_side in DOWNSCALE_LADDER:
+        tokens = estimate_request_tokens(image_sizes, instructions, model, detail, max_side)
+        if max_tokens is None or tokens <= max_tokens:
+            return {'detail': detail, 'max_side': max_side, 'tokens': tokens,
+                    'cost': estimate_cost(tokens, model)}
+    raise TokenBudgetExceeded(f"Request needs at least ~{tokens} tokens; limit is {max_tokens}")
@@ -0,0 +1,118 @@
+import os
+import threading
+import importlib.util
+import httpx
+import openai
+
+# Environment variables read by TransportSettings.from_env, with their defaults
+ENV_DEFAULTS = {
+    "OPENAI_MAX_CONNECTIONS": "100",
+    "OPENAI_MAX_KEEPALIVE": "20",
+    "OPENAI_KEEPALIVE_EXPIRY": "60",
+    "OPENAI_HTTP2": "0",
+    "OPENAI_CONNECT_TIMEOUT": "5",
+    "OPENAI_READ_TIMEOUT": "120",
+    "OPENAI_PROXY": "",
+}
+
+
+class TransportSettings:
+    """
+    Connection pool, protocol and timeout settings for the HTTP client behind GenAI.
+
+    Attributes:
+    ----------
+    max_connections : int
+        Maximum concurrent connections to the API.
+    max_keepalive_connections : int
+        Idle connections kept open for reuse.
+    keepalive_expiry : float
+        Seconds an idle connection stays open. httpx closes them after 5s by default,
+        which makes the next request after a short pause pay for a new TLS handshake.
+    http2 : bool
+        Multiplex requests over HTTP/2 (needs the `h2` package; falls back to HTTP/1.1).
+    connect_timeout : float
+        Seconds to establish a connection.
+    read_timeout : float
+        Seconds to wait for response data; vision requests can take a while.
+    proxy : str or None
+        Proxy URL, e.g. 'http://proxy.internal:3128'. HTTPS_PROXY is honoured when unset.
+    """
+    def __init__(self, max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0,
+                 http2=False, connect_timeout=5.0, read_timeout=120.0, proxy=None):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.proxy = proxy or None
+
+    @classmethod
+    def from_env(cls):
+        """Builds settings from the OPENAI_* variables in ENV_DEFAULTS."""
+        env = {name: os.getenv(name, default) for name, default in ENV_DEFAULTS.items()}
+        return cls(
+            max_connections=int(env["OPENAI_MAX_CONNECTIONS"]),
+            max_keepalive_connections=int(env["OPENAI_MAX_KEEPALIVE"]),
+            keepalive_expiry=float(env["OPENAI_KEEPALIVE_EXPIRY"]),
+            http2=env["OPENAI_HTTP2"].lower() in ("1", "true", "yes"),
+            connect_timeout=float(env["OPENAI_CONNECT_TIMEOUT"]),
+            read_timeout=float(env["OPENAI_READ_TIMEOUT"]),
+            proxy=env["OPENAI_PROXY"],
+        )
+
+    def key(self):
+        """Hashable identity of the HTTP client options; clients are shared between equal keys."""
+        return (self.max_connections, self.max_keepalive_connections, self.keepalive_expiry,
+                self.http2, self.proxy)
+
+    def client_options(self):
+        """Keyword arguments for openai.DefaultHttpxClient / DefaultAsyncHttpxClient."""
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        return {
+            "limits": httpx.Limits(max_connections=self.max_connections,
+                                   max_keepalive_connections=self.max_keepalive_connections,
+                                   keepalive_expiry=self.keepalive_expiry),
+            "http2": http2,
+            "proxy": self.proxy,
+        }
+
+    def timeout(self):
+        """
+        Timeout for openai.Client / AsyncClient. The openai library sets a timeout on
+        every request, so it has to be given there rather than on the HTTP client.
+        """
+        return openai.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+_http_clients = {}
+_http_clients_lock = threading.Lock()
+
+
+def get_http_client(settings):
+    """
+    Returns the process-wide HTTP client for the given settings, creating it on first use.
+
+    Every GenAI with the same settings shares the client, so they share one connection
+    pool (and one TLS context) instead of each opening its own connections.
+    """
+    with _http_clients_lock:
+        client = _http_clients.get(settings.key())
+        if client is None:
+            client = openai.DefaultHttpxClient(**settings.client_options())
+            _http_clients[settings.key()] = client
+        return client
+
+
+def create_async_http_client(settings):
+    """
+    Returns a new async HTTP client for the given settings.
+
+    Async connection pools belong to the event loop that opened them, so these are
+    not shared across instances.
+    """
+    return openai.DefaultAsyncHttpxClient(**settings.client_options())
@@ -0,0 +1,122 @@
+import hashlib
+from io import BytesIO
+from collections import OrderedDict
+from PIL import Image, ImageOps
+
+# Longest side (in pixels) of the preview shown in the browser
+THUMBNAIL_SIDE = 512
+# Longest side sent to the API; the API fits images within 2048x2048 anyway
+API_SIDE = 2048
+# Renditions kept per Streamlit session (pages showing more uploads at once raise it)
+MAX_CACHED_UPLOADS = 4
+
+
+class UploadRenditions:
+    """
+    Display and API renditions of one uploaded image, produced from a single decode.
+
+    Attributes:
+    ----------
+    thumbnail : bytes
+        JPEG no larger than THUMBNAIL_SIDE, for `st.image`.
+    api_image : bytes
+        JPEG within API_SIDE to send to the API. When the upload already is one,
+        these are the upload's bytes; otherwise the original is not kept.
+    size : tuple
+        (width, height) of the original image.
+    digest : str
+        SHA-256 of the original bytes.
+    """
+    def __init__(self, thumbnail, api_image, size, digest):
+        self.thumbnail = thumbnail
+        self.api_image = api_image
+        self.size = size
+        self.digest = digest
+
+
+def _encode_jpeg(image, quality):
+    """Return a PIL image as JPEG bytes."""
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def prepare_upload(buffer, thumbnail_side=THUMBNAIL_SIDE, api_side=API_SIDE):
+    """
+    Decodes an uploaded image once and builds its display and API renditions.
+
+    Parameters:
+    ----------
+    buffer : bytes, bytearray or memoryview
+        The encoded image, e.g. `uploaded_file.getvalue()`. Nothing keeps a
+        reference to it afterwards unless it is itself the API rendition.
+    thumbnail_side : int, optional
+        Longest side of the thumbnail (default is THUMBNAIL_SIDE).
+    api_side : int, optional
+        Longest side of the API rendition (default is API_SIDE).
+
+    Returns:
+    -------
+    UploadRenditions
+    """
+    view = memoryview(buffer)
+    digest = hashlib.sha256(view).hexdigest()
+
+    # BytesIO over a bytes object shares its buffer; only other buffer types are copied
+    with Image.open(BytesIO(buffer if isinstance(buffer, bytes) else view)) as image:
+        original_format = image.format
+        size = image.size
+        # EXIF orientation other than 1 means the stored pixels need rotating
+        rotated = image.getexif().get(0x0112, 1) != 1
+        # Let the JPEG decoder skip detail beyond what the largest rendition needs
+        image.draft("RGB", (api_side, api_side))
+        rgb = ImageOps.exif_transpose(image).convert("RGB")
+
+    # Downscale in stages (original -> API size -> thumbnail) so each resize is cheap
+    rgb.thumbnail((api_side, api_side), Image.LANCZOS)
+    if original_format == "JPEG" and max(size) <= api_side and not rotated:
+        # Already a valid API rendition; bytes are reused, other buffers copied so
+        # the cache never holds a view into the caller's buffer
+        api_image = buffer if isinstance(buffer, bytes) else view.tobytes()
+    else:
+        api_image = _encode_jpeg(rgb, quality=90)
+
+    rgb.thumbnail((thumbnail_side, thumbnail_side), Image.LANCZOS)
+    thumbnail = _encode_jpeg(rgb, quality=80)
+
+    return UploadRenditions(thumbnail, api_image, size, digest)
+
+
+def get_upload_renditions(uploaded_file, session_state, max_cached=MAX_CACHED_UPLOADS):
+    """
+    Returns cached renditions for a Streamlit upload, preparing them on first use.
+
+    Renditions are keyed by the upload's file ID in `session_state`, so reruns reuse
+    them instead of decoding the upload again. Only the thumbnail and API rendition
+    are cached, never the original upload, for the `max_cached` most recent uploads.
+
+    Parameters:
+    ----------
+    uploaded_file : streamlit.runtime.uploaded_file_manager.UploadedFile
+        The uploaded file.
+    session_state : streamlit.runtime.state.SessionStateProxy
+        `st.session_state`.
+    max_cached : int, optional
+        Uploads to keep renditions for (default is MAX_CACHED_UPLOADS); pages that
+        show several uploads at once pass their count.
+
+    Returns:
+    -------
+    UploadRenditions
+    """
+    cache = session_state.setdefault("upload_renditions", OrderedDict())
+    key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    renditions = cache.get(key)
+    if renditions is None:
+        renditions = prepare_upload(uploaded_file.getvalue())
+        cache[key] = renditions
+        while len(cache) > max_cached:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return renditions
@@ -1,6 +1,19 @@
 import os
+import re
+import json
+import time
 import random
+import tempfile
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from genai import GenAI
+from scheduler import get_scheduler
+from routing import ModelRouter
+from profiling import timed
+from token_budget import TokenBudget
+from history import get_result_store, hash_image_file
+from hashtag_index import get_hashtag_index, embed_query
+from mood_estimator import MOOD_CATEGORIES, estimate_mood_scores, score_margin
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -11,9 +24,144 @@ openai_api_key = os.getenv('OPENAI_API_KEY')
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables. Please set it in your .env file or environment.")
 
-genai = GenAI(openai_api_key)
+genai = GenAI(openai_api_key, scheduler=get_scheduler())
+# Tries the cheap model first and escalates on bad or low-confidence output
+model_router = ModelRouter.from_env()
 
-def get_instagram_caption(image_path: str, style_description: str) -> str:
+def new_session_budget():
+    """
+    Create a token budget for one Streamlit session from the environment.
+    
+    SESSION_TOKEN_BUDGET caps the total tokens a session may spend and
+    CALL_TOKEN_BUDGET caps the input tokens of a single request (oversized
+    images are downscaled to fit). Returns None if neither is set.
+    """
+    per_session = os.getenv('SESSION_TOKEN_BUDGET')
+    per_call = os.getenv('CALL_TOKEN_BUDGET')
+    if not per_session and not per_call:
+        return None
+    return TokenBudget(
+        per_call=int(per_call) if per_call else None,
+        per_session=int(per_session) if per_session else None
+    )
+
+MOOD_CATEGORY_DESCRIPTIONS = """- Fierce: Bold, confident, statement-making, powerful
+        - Minimalist: Clean, simple, understated elegance, refined
+        - Whimsical: Playful, creative, artistic, fun
+        - Elegant: Sophisticated, refined, classic, timeless
+        - Casual: Relaxed, comfortable, everyday, laid-back
+        - Romantic: Soft, feminine, dreamy, delicate"""
+
+# Hashtags appended to captions
+HASHTAGS_PER_CAPTION = 4
+# Instagram's caption length limit
+MAX_CAPTION_CHARS = 2200
+# Phrases that mark a refusal rather than a caption
+REFUSAL_MARKERS = ("i'm sorry", "i am sorry", "i can't", "i cannot", "i'm unable", "i am unable")
+# Mood scores whose highest and lowest differ by less than this are too flat to trust
+MIN_MOOD_SPREAD = 15
+# Caption options generated per request by default. Each option can add up to
+# genai.DESCRIPTION_MAX_TOKENS of output, so more are only generated when asked for.
+CAPTION_VARIANTS = 1
+DEFAULT_HASHTAGS = ["#fashion", "#style", "#ootd"]
+
+# Runs hashtag retrieval alongside the vision request
+_hashtag_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hashtags")
+
+def retrieve_hashtags(style_description: str, k: int = HASHTAGS_PER_CAPTION) -> list:
+    """
+    Pick the k hashtags most relevant to a style description from the local index.
+    
+    The style description is embedded once (repeats are cached) and compared
+    against the precomputed hashtag embeddings with a single matrix product.
+    
+    Parameters:
+    ----------
+    style_description : str
+        User-provided description of the fashion style or mood
+    k : int, optional
+        Number of hashtags to return (default is HASHTAGS_PER_CAPTION)
+        
+    Returns:
+    -------
+    list
+        Hashtags, most relevant first
+    """
+    index = get_hashtag_index(genai)
+    return [tag for tag, _ in index.top_k(embed_query(genai, style_description), k)]
+
+def _lookup_result(kind: str, image_hash: str, model: str, style_description: str = ""):
+    """Return a stored result for the same inputs, or None (including if the store is unavailable)"""
+    try:
+        return get_result_store().lookup(kind, image_hash, model, style_description)
+    except Exception as e:
+        print(f"Error reading results history: {e}")
+        return None
+
+def _add_usage(total: dict, usage: dict):
+    """Add one call's token usage into a running total (all attempts of a routed request)"""
+    for key, value in usage.items():
+        if value is not None:
+            total[key] = (total.get(key) or 0) + value
+
+def _lookup_routed_result(kind: str, image_hash: str, style_description: str = ""):
+    """Look up a stored result from any model in the routing cascade, as (result, model)"""
+    for model in model_router.models:
+        cached = _lookup_result(kind, image_hash, model, style_description)
+        if cached is not None:
+            return cached, model
+    return None, None
+
+def validate_captions(captions: list):
+    """Return why generated captions should be escalated to a stronger model, or None"""
+    for caption in captions:
+        text = caption.strip()
+        if not text:
+            return "empty caption"
+        if len(text) > MAX_CAPTION_CHARS:
+            return "caption too long"
+        if text.lower().startswith(REFUSAL_MARKERS):
+            return "refusal"
+    return None
+
+def validate_mood_scores(scores) -> str:
+    """Return why parsed mood scores should be escalated to a stronger model, or None"""
+    if not isinstance(scores, dict):
+        return "not a JSON object"
+    values = [scores.get(mood) for mood in MOOD_CATEGORIES]
+    if any(value is not None and not isinstance(value, (int, float)) for value in values):
+        return "non-numeric score"
+    present = [value for value in values if value is not None]
+    if len(present) < len(MOOD_CATEGORIES) - 1:
+        return "missing moods"
+    if max(present) - min(present) < MIN_MOOD_SPREAD:
+        return "flat distribution"
+    return None
+
+def _save_result(kind: str, image_hash: str, result, model: str, style_description: str = "",
+                 usage: dict = None, latency_ms: float = None):
+    """Store a result in the history; storage errors never fail the request"""
+    try:
+        get_result_store().add(kind, image_hash, result, model, style_description, usage, latency_ms)
+    except Exception as e:
+        print(f"Error writing results history: {e}")
+
+def caption_prompt(style_description: str) -> str:
+    """Returns the vision prompt asking for a caption in the given style."""
+    return f"""Analyze this fashion image and create an Instagram caption.
+        
+        Style/Mood Description: {style_description}
+        
+        Please generate a compelling caption that matches this style and mood.
+        Reply with the caption sentences only, without hashtags."""
+
+def add_hashtags(caption: str, hashtags: list) -> str:
+    """Replaces any trailing hashtags the model added with the retrieved ones."""
+    caption = re.sub(r'(\s*#\w+)+\s*$', '', caption.strip())
+    return f"{caption}\n\n{' '.join(hashtags)}"
+
+def get_instagram_caption(image_path: str, style_description: str, budget: TokenBudget = None,
+                          use_cache: bool = True) -> str:
     """
     Generate an Instagram caption for a fashion image.
     
@@ -23,41 +171,103 @@ def get_instagram_caption(image_path: str, style_description: str) -> str:
         Path to the uploaded image file
     style_description : str
         User-provided description of the fashion style or mood
+    budget : TokenBudget, optional
+        Token limits to apply and charge (default is None, unlimited)
+    use_cache : bool, optional
+        Return a stored caption for the same image and style if there is one
+        (default is True)
         
     Returns:
     -------
     str
         Generated Instagram caption
     """
+    return get_instagram_caption_variants(image_path, style_description, 1, budget, use_cache)[0]
+
+def get_instagram_caption_variants(image_path: str, style_description: str, variants: int = CAPTION_VARIANTS,
+                                   budget: TokenBudget = None, use_cache: bool = True) -> list:
+    """
+    Generate several alternative Instagram captions for a fashion image in one request.
+    
+    The variants come back as choices of a single vision request, so the image is
+    uploaded and billed once however many captions are asked for.
+    
+    Parameters:
+    ----------
+    image_path : str
+        Path to the uploaded image file
+    style_description : str
+        User-provided description of the fashion style or mood
+    variants : int, optional
+        Number of captions to generate (default is CAPTION_VARIANTS)
+    budget : TokenBudget, optional
+        Token limits to apply and charge (default is None, unlimited)
+    use_cache : bool, optional
+        Return stored captions for the same image and style if there are at
+        least `variants` of them (default is True). Pass False when the user
+        explicitly asks for new captions; the result is still stored.
+        
+    Returns:
+    -------
+    list
+        Generated Instagram captions
+    """
     try:
+        image_hash = hash_image_file(image_path)
+        if use_cache:
+            cached, _ = _lookup_routed_result('caption', image_hash, style_description)
+            # Stored as a string for a single caption, a list for variants
+            cached = [cached] if isinstance(cached, str) else cached
+            if cached is not None and len(cached) >= variants:
+                return cached[:variants]
+        
+
         # Instructions for the AI to generate fashion captions
         instructions = """You are a fashion expert and social media influencer. 
         Generate engaging, trendy Instagram captions for fashion photos. 
         The caption should be:
         - 1-3 sentences long
-        - Include relevant hashtags (3-5 hashtags)
         - Match the style/mood described
         - Be authentic and relatable
         - Use emojis appropriately
         - Include a call-to-action or personal touch
         
-        Format: Caption text followed by hashtags on new lines."""
+        Format: Caption text only. Hashtags are added separately."""
         
         # Create the prompt
-        prompt = f"""Analyze this fashion image and create an Instagram caption.
+        prompt = caption_prompt(style_description)
         
-        Style/Mood Description: {style_description}
+        # Hashtags come from the local index, retrieved while the image is analyzed
+        hashtags_future = _hashtag_executor.submit(contextvars.copy_context().run, retrieve_hashtags,
+                                                   style_description)
         
-        Please generate a compelling caption that matches this style and mood."""
+        # Generate captions using the GenAI class, escalating to a stronger model if needed
+        usage = {}
+        def attempt(model):
+            captions, attempt_usage = genai.generate_image_description(
+                image_paths=[image_path],
+                instructions=prompt,
+                model=model,
+                budget=budget,
+                return_usage=True,
+                n=variants
+            )
+            _add_usage(usage, attempt_usage)
+            return captions if variants > 1 else [captions]
         
-        # Generate caption using the GenAI class
-        caption = genai.generate_image_description(
-            image_paths=[image_path],
-            instructions=prompt,
-            model='gpt-4o-mini'
-        )
+        start = time.perf_counter()
+        captions, model = model_router.run('caption', attempt, validate_captions)
         
-        return caption.strip()
+        try:
+            hashtags = hashtags_future.result()
+        except Exception as e:
+            print(f"Error retrieving hashtags: {e}")
+            hashtags = DEFAULT_HASHTAGS
+        captions = [add_hashtags(caption, hashtags) for caption in captions]
+        
+        _save_result('caption', image_hash, captions[0] if variants == 1 else captions, model,
+                     style_description, usage, (time.perf_counter() - start) * 1000)
+        return captions
         
     except Exception as e:
         print(f"Error generating caption: {e}")
@@ -69,9 +279,9 @@ def get_instagram_caption(image_path: str, style_description: str) -> str:
             f"Feeling confident in this {style_description} ensemble! 💃 #style #fashion",
             f"Style is a way to say who you are without having to speak. {style_description} edition! ✨ #fashion #lifestyle"
         ]
-        return random.choice(fallback_captions)
+        return random.sample(fallback_captions, min(variants, len(fallback_captions)))
 
-def get_outfit_mood_scores(image_path: str) -> dict:
+def get_outfit_mood_scores(image_path: str, budget: TokenBudget = None, use_cache: bool = True) -> dict:
     """
     Analyze an outfit image and return mood scores.
     
@@ -79,66 +289,249 @@ def get_outfit_mood_scores(image_path: str) -> dict:
     ----------
     image_path : str
         Path to the uploaded outfit image
+    budget : TokenBudget, optional
+        Token limits to apply and charge (default is None, unlimited)
+    use_cache : bool, optional
+        Return stored scores for the same image if there are any (default is True)
         
     Returns:
     -------
     dict
         Dictionary with mood labels and confidence percentages
     """
+    try:
+        image_hash = hash_image_file(image_path)
+        if use_cache:
+            cached, _ = _lookup_routed_result('mood', image_hash)
+            if cached is not None:
+                return cached
+        return _score_outfit_mood(image_path, image_hash, budget)[0]
+    except Exception as e:
+        # Fallback scores if AI analysis fails
+        return generate_fallback_scores(image_path)
+
+def _score_outfit_mood(image_path: str, image_hash: str, budget: TokenBudget = None) -> tuple:
+    """Score one outfit through the model cascade and store the result; returns (scores, 'api' or 'fallback')"""
     try:
         # Instructions for the AI to analyze outfit mood
         instructions = """You are a fashion psychologist and style analyst. 
         Analyze this outfit image and determine the mood and style characteristics.
         
         Please analyze the outfit for these mood categories and provide confidence scores (0-100):
-        - Fierce: Bold, confident, statement-making, powerful
-        - Minimalist: Clean, simple, understated elegance, refined
-        - Whimsical: Playful, creative, artistic, fun
-        - Elegant: Sophisticated, refined, classic, timeless
-        - Casual: Relaxed, comfortable, everyday, laid-back
-        - Romantic: Soft, feminine, dreamy, delicate
+        """ + MOOD_CATEGORY_DESCRIPTIONS + """
         
         Return ONLY a JSON object with the mood categories as keys and scores (0-100) as values.
         Example: {"Fierce": 85, "Minimalist": 30, "Whimsical": 15, "Elegant": 60, "Casual": 20, "Romantic": 10}"""
         
-        # Generate mood analysis using the GenAI class
-        analysis = genai.generate_image_description(
-            image_paths=[image_path],
-            instructions=instructions,
-            model='gpt-4o-mini'
-        )
+        # Generate mood analysis using the GenAI class; unparseable, incomplete or
+        # flat scores are retried on a stronger model
+        usage = {}
+        def attempt(model):
+            analysis, attempt_usage = genai.generate_image_description(
+                image_paths=[image_path],
+                instructions=instructions,
+                model=model,
+                budget=budget,
+                return_usage=True
+            )
+            _add_usage(usage, attempt_usage)
+            return parse_json_response(analysis)
         
-        # Try to parse the response as JSON
-        import json
-        try:
-            # Clean the response and extract JSON
-            analysis = analysis.strip()
-            if analysis.startswith('```json'):
-                analysis = analysis[7:]
-            if analysis.endswith('```'):
-                analysis = analysis[:-3]
-            
-            scores = json.loads(analysis)
-            
-            # Ensure all required moods are present
-            required_moods = ["Fierce", "Minimalist", "Whimsical", "Elegant", "Casual", "Romantic"]
-            for mood in required_moods:
-                if mood not in scores:
-                    scores[mood] = random.randint(5, 25)
-            
-            return scores
-            
-        except json.JSONDecodeError:
-            # Fallback to random scores if JSON parsing fails
-            return generate_fallback_scores()
+        start = time.perf_counter()
+        scores, model = model_router.run('mood', attempt, validate_mood_scores)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if not isinstance(scores, dict):
+            # Fallback to local estimate if no model returned a JSON object
+            return generate_fallback_scores(image_path), "fallback"
+        
+        scores = _fill_missing_moods(scores, image_path)
+        _save_result('mood', image_hash, scores, model, usage=usage, latency_ms=latency_ms)
+        return scores, "api"
             
     except Exception as e:
         # Fallback scores if AI analysis fails
-        return generate_fallback_scores()
+        return generate_fallback_scores(image_path), "fallback"
+
+def _fill_missing_moods(scores: dict, image_path: str) -> dict:
+    """Fill moods the model left out (or didn't score with a number) from the local estimate"""
+    missing = [mood for mood in MOOD_CATEGORIES if not isinstance(scores.get(mood), (int, float))]
+    if missing:
+        local_scores = generate_fallback_scores(image_path)
+        for mood in missing:
+            scores[mood] = local_scores[mood]
+    return scores
 
-def generate_fallback_scores() -> dict:
-    """Generate fallback mood scores when AI analysis fails"""
-    moods = ["Fierce", "Minimalist", "Whimsical", "Elegant", "Casual", "Romantic"]
+@timed("parse_json_response")
+def parse_json_response(analysis: str):
+    """Strip Markdown code fences from a model response and parse it as JSON"""
+    analysis = analysis.strip()
+    if analysis.startswith('```json'):
+        analysis = analysis[7:]
+    if analysis.endswith('```'):
+        analysis = analysis[:-3]
+    return json.loads(analysis)
+
+def get_outfit_mood_scores_batch(image_paths: list, images_per_request: int = 4, max_workers: int = 4,
+                                 prefilter_margin: int = None, use_cache: bool = True) -> list:
+    """
+    Score several outfit images, packing multiple images into each request.
+    
+    The mood instructions are sent once per request instead of once per image. Each
+    request asks for results keyed by the image's position in that request, and the
+    response is validated against the inputs: images with a missing, duplicated or
+    malformed entry (or whose request failed) get fallback scores instead. Entries
+    that fail the same checks as single-image scores (validate_mood_scores, e.g. a
+    flat distribution) are re-scored on their own through the single-image path.
+    
+    Parameters:
+    ----------
+    image_paths : list
+        Paths to the outfit images
+    images_per_request : int, optional
+        Number of images packed into one API request (default is 4)
+    max_workers : int, optional
+        Number of requests sent concurrently (default is 4)
+    prefilter_margin : int, optional
+        If set, images are first scored by the local estimator, and those whose top
+        mood leads the runner-up by at least this many points keep the local scores
+        and are not sent to the API (default is None, send everything)
+    use_cache : bool, optional
+        Reuse stored scores for images scored before (default is True)
+        
+    Returns:
+    -------
+    list
+        One dict per input image, in input order, with keys:
+        - 'image_path': the input path
+        - 'scores': dictionary with mood labels and confidence percentages
+        - 'source': 'api' if the scores came from the model (in the batch request or
+          re-scored alone), 'cache' if they were stored from an earlier run, 'local'
+          if the pre-filter kept the local estimate, 'fallback' if the model failed
+    """
+    if images_per_request < 1:
+        raise ValueError("images_per_request must be at least 1")
+    
+    results = {}
+    remote_paths = list(image_paths)
+    if use_cache:
+        remote_paths = []
+        for image_path in image_paths:
+            cached, _ = _lookup_routed_result('mood', hash_image_file(image_path))
+            if cached is not None:
+                results[image_path] = {"image_path": image_path, "scores": cached, "source": "cache"}
+            else:
+                remote_paths.append(image_path)
+    
+    if prefilter_margin is not None:
+        candidates, remote_paths = remote_paths, []
+        for image_path in candidates:
+            try:
+                local_scores = estimate_mood_scores(image_path)
+            except Exception:
+                remote_paths.append(image_path)
+                continue
+            if score_margin(local_scores) >= prefilter_margin:
+                results[image_path] = {"image_path": image_path, "scores": local_scores, "source": "local"}
+            else:
+                remote_paths.append(image_path)
+    
+    chunks = [remote_paths[i:i + images_per_request] for i in range(0, len(remote_paths), images_per_request)]
+    
+    # Chunk requests keep the caller's priority class (see scheduler.py)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks) or 1))) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, _score_mood_chunk, chunk) for chunk in chunks]
+        for future in futures:
+            for result in future.result():
+                results[result["image_path"]] = result
+    
+    return [dict(results[image_path]) for image_path in image_paths]
+
+def _score_mood_chunk(image_paths: list) -> list:
+    """Score one request's worth of images and map the response back to the inputs"""
+    count = len(image_paths)
+    instructions = f"""You are a fashion psychologist and style analyst. 
+        You will receive {count} outfit images, numbered 1 to {count} in the order they appear.
+        Analyze each outfit separately and determine its mood and style characteristics.
+        
+        For each image provide confidence scores (0-100) for these mood categories:
+        """ + MOOD_CATEGORY_DESCRIPTIONS + """
+        
+        Return ONLY a JSON object of the form
+        {"results": [{"image": 1, "scores": {"Fierce": 85, "Minimalist": 30, "Whimsical": 15, "Elegant": 60, "Casual": 20, "Romantic": 10}}, ...]}
+        with exactly one entry per image."""
+    
+    parsed = {}
+    try:
+        usage = {}
+        def attempt(model):
+            analysis, attempt_usage = genai.generate_image_description(
+                image_paths=image_paths,
+                instructions=instructions,
+                model=model,
+                return_usage=True
+            )
+            _add_usage(usage, attempt_usage)
+            entries = parse_json_response(analysis).get("results", [])
+            
+            parsed = {}
+            seen = set()
+            for entry in entries:
+                index = entry.get("image")
+                scores = entry.get("scores")
+                if not isinstance(index, int) or not 1 <= index <= count or not isinstance(scores, dict):
+                    continue
+                if index in seen:
+                    # Ambiguous mapping; don't trust either entry
+                    parsed.pop(index, None)
+                    continue
+                seen.add(index)
+                # Kept even if incomplete or degenerate; validated per image below
+                parsed[index] = {mood: int(value) if isinstance(value, (int, float)) else value
+                                 for mood, value in scores.items() if mood in MOOD_CATEGORIES}
+            return parsed
+        
+        # A response missing any image is retried on a stronger model
+        start = time.perf_counter()
+        parsed, model = model_router.run('mood_batch', attempt,
+                                         lambda parsed: None if len(parsed) == count else "incomplete results")
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        # Record each image with its share of the request's usage
+        share = {key: value // count if value is not None else None for key, value in usage.items()}
+        for index, scores in list(parsed.items()):
+            if validate_mood_scores(scores) is not None:
+                continue
+            parsed[index] = _fill_missing_moods(scores, image_paths[index - 1])
+            _save_result('mood', hash_image_file(image_paths[index - 1]), parsed[index], model,
+                         usage=share, latency_ms=latency_ms)
+    except Exception as e:
+        print(f"Error scoring outfit batch: {e}")
+    
+    results = []
+    for index, image_path in enumerate(image_paths, start=1):
+        scores = parsed.get(index)
+        if scores is not None and validate_mood_scores(scores) is None:
+            results.append({"image_path": image_path, "scores": scores, "source": "api"})
+        elif scores is not None and count > 1:
+            # Degenerate scores the single-image path would escalate: score this image alone
+            scores, source = _score_outfit_mood(image_path, hash_image_file(image_path))
+            results.append({"image_path": image_path, "scores": scores, "source": source})
+        else:
+            results.append({"image_path": image_path, "scores": generate_fallback_scores(image_path), "source": "fallback"})
+    return results
+
+def generate_fallback_scores(image_path: str = None) -> dict:
+    """Generate fallback mood scores when AI analysis fails.
+    
+    Uses the local image-feature estimator when an image is available, so the
+    fallback reflects the outfit; random scores are only used without an image."""
+    if image_path is not None:
+        try:
+            return estimate_mood_scores(image_path)
+        except Exception as e:
+            print(f"Error estimating mood locally: {e}")
+    
+    moods = MOOD_CATEGORIES
     scores = {}
     
     # Generate random scores that sum to a reasonable total
@@ -158,6 +551,137 @@ def generate_fallback_scores() -> dict:
     
     return scores
 
+def _with_temp_image(image_bytes: bytes, fn, *args):
+    """Write image bytes to a temporary file, call fn(path, *args) and clean up."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
+        tmp_file.write(image_bytes)
+        temp_image_path = tmp_file.name
+    try:
+        return fn(temp_image_path, *args)
+    finally:
+        os.unlink(temp_image_path)
+
+def get_instagram_caption_from_bytes(image_bytes: bytes, style_description: str, budget: TokenBudget = None,
+                                     use_cache: bool = True) -> str:
+    """
+    Generate an Instagram caption from raw image bytes (e.g. a Streamlit upload).
+    
+    Suitable for submitting to a background JobQueue, since it owns its temporary file.
+    """
+    return _with_temp_image(image_bytes, get_instagram_caption, style_description, budget, use_cache)
+
+def get_instagram_caption_variants_from_bytes(image_bytes: bytes, style_description: str,
+                                              variants: int = CAPTION_VARIANTS, budget: TokenBudget = None,
+                                              use_cache: bool = True) -> list:
+    """
+    Generate several Instagram captions from raw image bytes (e.g. a Streamlit upload).
+    
+    Suitable for submitting to a background JobQueue, since it owns its temporary file.
+    """
+    return _with_temp_image(image_bytes, get_instagram_caption_variants, style_description, variants, budget,
+                            use_cache)
+
+def get_outfit_mood_scores_from_bytes(image_bytes: bytes, budget: TokenBudget = None) -> dict:
+    """
+    Analyze an outfit from raw image bytes (e.g. a Streamlit upload).
+    
+    Suitable for submitting to a background JobQueue, since it owns its temporary file.
+    """
+    return _with_temp_image(image_bytes, get_outfit_mood_scores, budget)
+
+def get_outfit_mood_scores_batch_from_bytes(images: list, images_per_request: int = 4,
+                                            prefilter_margin: int = None) -> list:
+    """
+    Score several outfits from raw image bytes (e.g. Streamlit uploads).
+    
+    Same as get_outfit_mood_scores_batch, without the 'image_path' key in the results.
+    """
+    temp_image_paths = []
+    try:
+        for image_bytes in images:
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
+                tmp_file.write(image_bytes)
+                temp_image_paths.append(tmp_file.name)
+        results = get_outfit_mood_scores_batch(temp_image_paths, images_per_request,
+                                               prefilter_margin=prefilter_margin)
+    finally:
+        for temp_image_path in temp_image_paths:
+            os.unlink(temp_image_path)
+    for result in results:
+        del result["image_path"]
+    return results
+
+def submit_catalog_captions(image_paths: list, style_description: str, model: str = 'gpt-4o-mini') -> str:
+    """
+    Submit captions for a catalog of images as one Batch API job.
+    
+    Batch jobs cost less than interactive calls but may take up to 24 hours, so
+    this suits nightly catalog runs. Collect the results with collect_catalog_captions.
+    
+    Parameters:
+    ----------
+    image_paths : list
+        Paths of the images to caption
+    style_description : str
+        Style or mood applied to every caption
+    model : str, optional
+        Vision model (default is 'gpt-4o-mini')
+        
+    Returns:
+    -------
+    str
+        The batch ID
+    """
+    prompt = caption_prompt(style_description)
+    requests = [genai.image_description_batch_request(f"caption-{i}", image_path, prompt, model)
+                for i, image_path in enumerate(image_paths)]
+    return genai.submit_batch(requests, metadata={"kind": "caption", "style_description": style_description[:512]})
+
+def collect_catalog_captions(batch_id: str, image_paths: list, style_description: str,
+                             model: str = 'gpt-4o-mini', poll_interval: float = 30,
+                             timeout: float = None) -> list:
+    """
+    Wait for a catalog caption batch and map its results back to the images.
+    
+    Hashtags are appended as for interactive captions, and successful captions are
+    saved to the results history so later interactive requests reuse them.
+    
+    Parameters:
+    ----------
+    batch_id : str
+        ID returned by submit_catalog_captions
+    image_paths, style_description, model
+        The same values passed to submit_catalog_captions
+    poll_interval : float, optional
+        Seconds between status checks (default is 30)
+    timeout : float, optional
+        Seconds to wait before raising TimeoutError (default is None)
+        
+    Returns:
+    -------
+    list
+        One dict per image with keys 'image_path', 'caption' (None on failure) and 'error'
+    """
+    batch = genai.wait_for_batch(batch_id, poll_interval=poll_interval, timeout=timeout)
+    results = genai.get_batch_results(batch)
+    try:
+        hashtags = retrieve_hashtags(style_description)
+    except Exception as e:
+        print(f"Error retrieving hashtags: {e}")
+        hashtags = DEFAULT_HASHTAGS
+    
+    captions = []
+    for i, image_path in enumerate(image_paths):
+        result = results.get(f"caption-{i}") or {"content": None, "usage": None,
+                                                 "error": f"Not processed (batch {batch.status})"}
+        caption = None
+        if result["content"] is not None:
+            caption = add_hashtags(result["content"], hashtags)
+            _save_result('caption', hash_image_file(image_path), caption, model, style_description,
+                         result["usage"])
+        captions.append({"image_path": image_path, "caption": caption, "error": result["error"]})
+    return captions
+
 # Example usage and testing functions
 def test_instagram_caption():
     """Test function for Instagram caption generation"""